@@ -0,0 +1,207 @@
+"""
+Bulk position analysis.
+
+Analyses many positions at once by spreading them over a pool of worker
+processes. Positions are sent to the workers in chunks, so the cost of
+passing work between processes is paid once per chunk instead of once
+per position, and only a bounded number of chunks is in flight at any
+time, so the positions can come from an iterator of any length.
+
+    from src.analysis import analyse_many
+    from src.search import Limits
+
+    for result in analyse_many(epds, limits=Limits(time=None, depth=3)):
+        print(result.epd, result.checkmate, result.best_move)
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future,
+                                ProcessPoolExecutor, wait)
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from .chess import Chess
+from .epd import EPDString, load_EPD
+from .search import Limits, Searcher
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+
+
+@dataclass
+class Analysis:
+    """The analysis of a position."""
+
+    index: int
+    "position of the EPD in the input"
+
+    epd: EPDString
+    "the analysed position"
+
+    moves: "list[MoveT]" = field(default_factory=list)
+    "legal moves of the active player"
+
+    check: bool = False
+    "the active player is in check"
+
+    checkmate: bool = False
+    "the active player is checkmated"
+
+    stalemate: bool = False
+    "the active player is stalemated"
+
+    draw: bool = False
+    "the position is dead, repeated three times or past the fifty-move rule"
+
+    best_move: Optional[MoveT] = None
+    "best move found by the search, if one was run"
+
+    score: Optional[int] = None
+    "score of the best move in centipawns for the active player"
+
+    depth: int = 0
+    "depth of the last completed search iteration"
+
+    nodes: int = 0
+    "positions visited by the search"
+
+    error: Optional[str] = None
+    "why the position couldn't be analysed, None if it was"
+
+
+_searcher: Optional[Searcher] = None
+"The searcher of the current process, kept between positions"
+
+
+def _init_worker(hash_mb: float):
+    """Create the searcher of a worker process."""
+    global _searcher
+    _searcher = Searcher(hash_mb)
+
+
+def analyse(
+    epd: EPDString,
+    limits: Optional[Limits] = None,
+    index: int = 0,
+    hash_mb: float = 16,
+) -> Analysis:
+    """
+    Analyse a single position.
+
+    Args:
+            epd: the position
+            limits: the budget of a search for the best move, no search is
+                    run if None
+            index: the position of the EPD in the input, copied to the
+                    result
+            hash_mb: memory cap of the transposition table in megabytes,
+                    used if this process has no searcher yet
+    Return:
+            the analysis of the position
+    """
+    global _searcher
+    result = Analysis(index, epd)
+    game = Chess()
+    if not load_EPD(game, epd):
+        result.error = "Invalid EPD"
+        return result
+    state = game.get_state()
+    result.moves = game.get_move_list(state.legal_moves)
+    result.check = state.check
+    result.checkmate = state.checkmate
+    result.stalemate = state.stalemate
+    result.draw = (
+        game._is_dead_position()
+        or game._is_threefold_repetition()
+        or game._is_fifty_move_rule()
+    )
+    if limits is not None and result.moves:
+        if _searcher is None:
+            _searcher = Searcher(hash_mb)
+        found = _searcher.search(game, limits)
+        result.best_move = found.move
+        result.score = found.score
+        result.depth = found.depth
+        result.nodes = found.nodes
+    return result
+
+
+def _analyse_chunk(
+    chunk: "list[tuple[int, EPDString]]",
+    limits: Optional[Limits],
+    hash_mb: float,
+) -> "list[Analysis]":
+    """Analyse a chunk of positions in a worker process."""
+    return [analyse(epd, limits, index, hash_mb) for index, epd in chunk]
+
+
+def analyse_many(
+    epds: Iterable[EPDString],
+    limits: Optional[Limits] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    hash_mb: float = 16,
+) -> Iterator[Analysis]:
+    """
+    Analyse many positions over a pool of worker processes.
+
+    Results are yielded as soon as they are ready, either in the order of
+    the input or in the order the chunks complete. `Analysis.index` tells
+    which input every result belongs to.
+
+    Args:
+            epds: the positions to analyse
+            limits: the budget of a search for the best move of every
+                    position, no search is run if None
+            workers: the number of worker processes, defaults to the
+                    number of CPUs. 0 analyses the positions in this
+                    process.
+            chunksize: the number of positions sent to a worker at once
+            ordered: yield the results in the order of the input
+            hash_mb: memory cap of the transposition table of every worker
+    Return:
+            an iterator over the analysis of every position
+    """
+    if chunksize < 1:
+        raise ValueError("Invalid chunk size.")
+    numbered = enumerate(epds)
+    if workers == 0:
+        for index, epd in numbered:
+            yield analyse(epd, limits, index, hash_mb)
+        return
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(lambda: list(islice(numbered, chunksize)), [])
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(hash_mb,)
+    ) as pool:
+        pending: "deque[Future[list[Analysis]]]" = deque()
+
+        def submit() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            pending.append(
+                pool.submit(_analyse_chunk, chunk, limits, hash_mb)
+            )
+            return True
+
+        # keep every worker busy with one chunk queued behind it
+        for _ in range(2 * workers):
+            if not submit():
+                break
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield from future.result()
+                submit()
@@ -0,0 +1,371 @@
+"""
+Vectorized evaluation of many positions at once.
+
+Positions are stacked into a NumPy array of piece planes of shape
+``(N, 12, 64)``: one plane per piece ID (white pawn to white king, then
+black pawn to black king) and one cell per square, numbered like
+`Game.board` and the bitboards (``a8`` is 0 and ``h1`` is 63). Every term
+of the evaluation is then worked out for the whole batch with array
+operations instead of a Python loop per position:
+
+* material, from `evaluation.PIECE_VALUES`
+* piece-square tables, from `evaluation.PIECE_SQUARE_TABLES`
+* mobility, counted as the cells every knight, bishop, rook and queen
+  attacks that aren't taken by a piece of its own colour
+* pawn structure: doubled, isolated and passed pawns
+
+Mobility and pawn structure pack the planes into one 64-bit bitboard per
+piece ID and position, so sliding attacks are worked out with a handful of
+shifts on ``(N,)`` arrays.
+
+Material and piece-square tables add up to exactly `evaluation.evaluate`.
+
+    from src.batch_evaluation import evaluate_epds
+
+    scores = evaluate_epds(epds)  # one score per EPD, for the side to move
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError(
+        "'numpy' not found, install using 'pip install numpy'"
+    ) from error
+
+from .evaluation import PIECE_VALUES, SQUARE_VALUES
+from .piece import notations
+
+if TYPE_CHECKING:
+    from .game import Game
+
+PIECE_IDS = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], np.int8)
+"Piece ID of every plane"
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+"Plane of every white piece, add 6 for the black one"
+
+MOBILITY = {KNIGHT: 4, BISHOP: 5, ROOK: 2, QUEEN: 1}
+"Centipawns per cell a piece attacks"
+
+DOUBLED_PAWN = 15
+"Penalty of every pawn on a file beyond the first"
+
+ISOLATED_PAWN = 10
+"Penalty of a pawn with no pawn of its colour on the files next to it"
+
+PASSED_PAWN = (0, 10, 15, 25, 40, 60, 90, 0)
+"Bonus of a passed pawn by its rank counted from its side, from 0"
+
+CHUNK_SIZE = 65536
+"Positions evaluated at once by `evaluate_epds`, about 50MB of planes"
+
+_VALUES = np.array([PIECE_VALUES[abs(p)] * (1 if p > 0 else -1)
+                    for p in PIECE_IDS], np.int32)
+"Signed material value of every plane"
+
+_SQUARES = np.array(
+    [SQUARE_VALUES[p + 6] for p in PIECE_IDS], np.int32
+) - _VALUES[:, None]
+"Signed piece-square bonus of every plane on every cell"
+
+_KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2),
+                 (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+_BISHOP_STEPS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_ROOK_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+_FILES = {
+    dx: np.uint64(sum(
+        1 << (y * 8 + x) for y in range(8) for x in range(8)
+        if 0 <= x - dx < 8
+    ))
+    for dx in range(-2, 3)
+}
+"Cells a bit can land on when moved by a number of files, by the number"
+
+_FILE_MASKS = [
+    np.uint64(sum(1 << (y * 8 + x) for y in range(8))) for x in range(8)
+]
+"Cells of every file, from a to h"
+
+_RANK_MASKS = {
+    side: [
+        np.uint64(0xFF << (8 * (7 - rank if side == 1 else rank)))
+        for rank in range(8)
+    ]
+    for side in (1, -1)
+}
+"Cells of every rank counted from either side, from its first rank"
+
+_BITS = np.array([bin(n).count("1") for n in range(256)], np.uint8)
+"Bits set in every byte"
+
+_CELLS = np.zeros(256, np.int8)
+"Piece ID of every FEN piece character, by byte"
+
+for _char in "pnbrqkPNBRQK":
+    _CELLS[ord(_char)] = notations.get_id(_char, True)
+
+_EMPTY = str.maketrans({"/": "", **{str(n): "." * n for n in range(1, 9)}})
+"Expands the empty cells of a FEN piece placement and drops the slashes"
+
+
+def board_planes(games: Iterable[Game]) -> "tuple[np.ndarray, np.ndarray]":
+    """
+    Stack the boards of games into piece planes.
+
+    Args:
+            games: the positions
+    Return:
+            the ``(N, 12, 64)`` piece planes and the ``(N,)`` active
+            players (1 or -1)
+    """
+    cells = []
+    players = []
+    for game in games:
+        cells.append([piece for row in game.board for piece in row])
+        players.append(game.player)
+    return (
+        _planes(np.array(cells, np.int8).reshape(-1, 64)),
+        np.array(players, np.int8),
+    )
+
+
+def epd_planes(epds: Sequence[str]) -> "tuple[np.ndarray, np.ndarray]":
+    """
+    Stack the positions of EPD or FEN strings into piece planes.
+
+    The strings are read directly, without building a game for each, so
+    invalid EPDs aren't caught.
+
+    Args:
+            epds: the positions
+    Return:
+            the ``(N, 12, 64)`` piece planes and the ``(N,)`` active
+            players (1 or -1)
+    Raises:
+            ValueError: if a piece placement doesn't have 64 cells
+    """
+    placements = []
+    players = []
+    for epd in epds:
+        placement, _, rest = epd.strip().partition(" ")
+        placements.append(placement.translate(_EMPTY))
+        players.append(-1 if rest[:1] == "b" else 1)
+    data = "".join(placements).encode("ascii")
+    if len(data) != 64 * len(placements) or any(
+        len(cells) != 64 for cells in placements
+    ):
+        raise ValueError("Invalid EPD piece placement.")
+    cells = _CELLS[np.frombuffer(data, np.uint8)].reshape(-1, 64)
+    return _planes(cells), np.array(players, np.int8)
+
+
+def _planes(cells: np.ndarray) -> np.ndarray:
+    """Turn ``(N, 64)`` piece IDs into ``(N, 12, 64)`` piece planes."""
+    return (cells[:, None, :] == PIECE_IDS[None, :, None]).astype(np.uint8)
+
+
+def material(planes: np.ndarray) -> np.ndarray:
+    """Return the material balance of every position, for white."""
+    return planes.sum(axis=2, dtype=np.int32) @ _VALUES
+
+
+def piece_squares(planes: np.ndarray) -> np.ndarray:
+    """Return the piece-square table balance of every position, for white."""
+    return np.einsum("npk,pk->n", planes, _SQUARES, dtype=np.int32)
+
+
+def bitboards(planes: np.ndarray) -> np.ndarray:
+    """
+    Pack piece planes into bitboards.
+
+    Args:
+            planes: the ``(N, 12, 64)`` piece planes
+    Return:
+            the ``(N, 12)`` bitboards, bit ``y * 8 + x`` set for every
+            piece like `bitboard.Bitboards`
+    """
+    packed = np.packbits(planes, axis=2, bitorder="little")
+    return packed.view("<u8")[..., 0].astype(np.uint64)
+
+
+def _popcount(boards: np.ndarray) -> np.ndarray:
+    """Count the bits set in every bitboard."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(boards).astype(np.int32)
+    return _BITS[boards[..., None].view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+
+def _shift(boards: np.ndarray, shift: int) -> np.ndarray:
+    """Shift bitboards towards higher bits, or lower if negative."""
+    if shift > 0:
+        return boards << np.uint64(shift)
+    return boards >> np.uint64(-shift)
+
+
+def _step(boards: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Move every bit of bitboards by an offset, dropping those leaving."""
+    return _shift(boards, dy * 8 + dx) & _FILES[dx]
+
+
+def _ray(pieces: np.ndarray, empty: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """
+    Return the cells pieces slide to in a direction, up to and including
+    the first occupied cell, doubling the length of the rays every round.
+    """
+    # the empty cells a ray can enter without wrapping around the board
+    empty = empty & _FILES[dx]
+    shift = dy * 8 + dx
+    for _ in range(3):
+        pieces = pieces | (empty & _shift(pieces, shift))
+        empty = empty & _shift(empty, shift)
+        shift *= 2
+    return _step(pieces, dx, dy)
+
+
+def mobility(planes: np.ndarray) -> np.ndarray:
+    """
+    Return the mobility balance of every position, for white.
+
+    Every knight, bishop, rook and queen scores `MOBILITY` centipawns for
+    every cell it attacks that isn't taken by a piece of its own colour.
+    Pins and checks are ignored.
+    """
+    boards = bitboards(planes)
+    empty = ~np.bitwise_or.reduce(boards, axis=1)
+    score = np.zeros(len(planes), np.int32)
+    for side, sign in ((0, 1), (6, -1)):
+        free = ~np.bitwise_or.reduce(boards[:, side : side + 6], axis=1)
+        # a cell is reached by at most one piece of a kind from any one
+        # direction, so counting direction by direction counts every piece
+        knights = boards[:, side + KNIGHT]
+        for dx, dy in _KNIGHT_STEPS:
+            score += sign * MOBILITY[KNIGHT] * _popcount(
+                _step(knights, dx, dy) & free
+            )
+        for piece, steps in (
+            (BISHOP, _BISHOP_STEPS),
+            (ROOK, _ROOK_STEPS),
+            (QUEEN, _BISHOP_STEPS + _ROOK_STEPS),
+        ):
+            sliders = boards[:, side + piece]
+            if not sliders.any():
+                continue
+            for dx, dy in steps:
+                score += sign * MOBILITY[piece] * _popcount(
+                    _ray(sliders, empty, dx, dy) & free
+                )
+    return score
+
+
+def pawn_structure(planes: np.ndarray) -> np.ndarray:
+    """
+    Return the pawn structure balance of every position, for white.
+
+    Doubled and isolated pawns are penalized with `DOUBLED_PAWN` and
+    `ISOLATED_PAWN`, and passed pawns, which no enemy pawn can stop on
+    their own or the next files, get `PASSED_PAWN` by their rank.
+    """
+    boards = bitboards(planes)
+    pawns = {1: boards[:, PAWN], -1: boards[:, PAWN + 6]}
+    score = np.zeros(len(planes), np.int32)
+    for side, own in pawns.items():
+        files = np.stack([_popcount(own & mask) for mask in _FILE_MASKS], 1)
+        has = files > 0
+        neighbours = np.zeros_like(has)
+        neighbours[:, 1:] |= has[:, :-1]
+        neighbours[:, :-1] |= has[:, 1:]
+        doubled = np.maximum(files - 1, 0).sum(axis=1)
+        isolated = (files * ~neighbours).sum(axis=1)
+        score -= side * (DOUBLED_PAWN * doubled + ISOLATED_PAWN * isolated)
+
+        # white pawns advance towards the first row of the board, so the
+        # enemy pawns stopping them are spread over the rows below them
+        enemy = pawns[-side]
+        forward = -8 * side
+        stoppers = enemy | _step(enemy, 1, 0) | _step(enemy, -1, 0)
+        for _ in range(3):
+            stoppers = stoppers | _shift(stoppers, -forward)
+            forward *= 2
+        passed = own & ~_shift(stoppers, 8 * side)
+        for rank, mask in enumerate(_RANK_MASKS[side]):
+            score += side * PASSED_PAWN[rank] * _popcount(passed & mask)
+    return score
+
+
+def evaluate_planes(
+    planes: np.ndarray,
+    players: np.ndarray,
+    mobility_terms: bool = True,
+    pawn_terms: bool = True,
+) -> np.ndarray:
+    """
+    Evaluate a batch of positions.
+
+    Args:
+            planes: the ``(N, 12, 64)`` piece planes
+            players: the ``(N,)`` active players
+            mobility_terms: add the mobility balance
+            pawn_terms: add the pawn structure balance
+    Return:
+            the ``(N,)`` scores in centipawns, positive when the active
+            player is ahead, like `evaluation.evaluate`
+    """
+    score = material(planes) + piece_squares(planes)
+    if mobility_terms:
+        score += mobility(planes)
+    if pawn_terms:
+        score += pawn_structure(planes)
+    return score * players
+
+
+def evaluate_games(games: Iterable[Game], **terms: bool) -> np.ndarray:
+    """
+    Evaluate a batch of games.
+
+    Args:
+            games: the positions
+            terms: the terms of `evaluate_planes` to leave out
+    Return:
+            the ``(N,)`` scores, for the active player of every position
+    """
+    return evaluate_planes(*board_planes(games), **terms)
+
+
+def evaluate_epds(
+    epds: Iterable[str], chunksize: int = CHUNK_SIZE, **terms: bool
+) -> np.ndarray:
+    """
+    Evaluate any number of EPD or FEN strings, a chunk at a time so only
+    one chunk of piece planes is held in memory.
+
+    Args:
+            epds: the positions
+            chunksize: the number of positions evaluated at once
+            terms: the terms of `evaluate_planes` to leave out
+    Return:
+            the ``(N,)`` scores, for the active player of every position
+    """
+    scores = [
+        evaluate_planes(*epd_planes(chunk), **terms)
+        for chunk in _chunks(epds, chunksize)
+    ]
+    return np.concatenate(scores) if scores else np.zeros(0, np.int32)
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator["list[str]"]:
+    """Split an iterable into lists of a fixed size, the last one shorter."""
+    if size < 1:
+        raise ValueError("Invalid chunk size.")
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,549 @@
+"""
+Bitboard move generation.
+
+A bitboard is a 64-bit integer where every bit stands for a cell on the
+chess board. Cells are numbered in the same row-major order as
+`Game.board`, so bit ``y * 8 + x`` holds the cell at coordinates ``(x, y)``
+(``a8`` is bit 0 and ``h1`` is bit 63).
+
+A position is described by twelve bitboards, one for every piece ID, plus
+the occupancy of each player. The attacks of knights, kings and pawns are
+read from tables that are built when the module is imported, while the
+sliding pieces walk precomputed rays that are cut short at the first
+blocker.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .epd import BoardT, CoordT
+    from .game import Game, MoveRecord
+    from .piece import PlayerT
+
+
+FULL = (1 << 64) - 1
+"A bitboard with every cell set"
+
+COORDS: "list[CoordT]" = [(sq & 7, sq >> 3) for sq in range(64)]
+"The coordinates of every cell, indexed by cell number"
+
+BIT = [1 << sq for sq in range(64)]
+"The bitboard of every cell, indexed by cell number"
+
+
+def _leaper_table(deltas: "tuple[CoordT, ...]") -> "list[int]":
+    """Build the attack table of a piece that jumps by fixed offsets."""
+    table = []
+    for x, y in COORDS:
+        mask = 0
+        for dx, dy in deltas:
+            if 0 <= x + dx <= 7 and 0 <= y + dy <= 7:
+                mask |= BIT[(y + dy) * 8 + x + dx]
+        table.append(mask)
+    return table
+
+
+def _ray_table(dx: int, dy: int) -> "list[int]":
+    """Build the table of rays leaving every cell in one direction."""
+    table = []
+    for x, y in COORDS:
+        mask = 0
+        x, y = x + dx, y + dy
+        while 0 <= x <= 7 and 0 <= y <= 7:
+            mask |= BIT[y * 8 + x]
+            x, y = x + dx, y + dy
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(
+    ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+)
+"Cells attacked by a knight standing on a cell"
+
+KING_ATTACKS = _leaper_table(
+    ((0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1))
+)
+"Cells attacked by a king standing on a cell"
+
+PAWN_ATTACKS: "dict[int, list[int]]" = {
+    1: _leaper_table(((-1, -1), (1, -1))),
+    -1: _leaper_table(((-1, 1), (1, 1))),
+}
+"Cells attacked by a pawn of a player standing on a cell"
+
+ROOK_DIRECTIONS: "tuple[CoordT, ...]" = ((0, -1), (1, 0), (0, 1), (-1, 0))
+BISHOP_DIRECTIONS: "tuple[CoordT, ...]" = ((1, -1), (1, 1), (-1, 1), (-1, -1))
+
+RAYS: "dict[CoordT, list[int]]" = {
+    d: _ray_table(*d) for d in ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+}
+"Rays leaving every cell, indexed by direction then by cell number"
+
+
+
+def _between_table() -> "list[list[int]]":
+    """Build the table of cells strictly between two aligned cells."""
+    table = [[0] * 64 for _ in range(64)]
+    for a, (x, y) in enumerate(COORDS):
+        for dx, dy in RAYS:
+            passed = 0
+            x1, y1 = x + dx, y + dy
+            while 0 <= x1 <= 7 and 0 <= y1 <= 7:
+                table[a][y1 * 8 + x1] = passed
+                passed |= BIT[y1 * 8 + x1]
+                x1, y1 = x1 + dx, y1 + dy
+    return table
+
+
+BETWEEN = _between_table()
+"Cells strictly between two cells on the same line, indexed by both cells"
+
+# (rays, ascending) pairs. A ray is ascending when its cell numbers grow,
+# in which case the nearest blocker is the lowest set bit.
+_ROOK_RAYS = [(RAYS[d], d[1] * 8 + d[0] > 0) for d in ROOK_DIRECTIONS]
+_BISHOP_RAYS = [(RAYS[d], d[1] * 8 + d[0] > 0) for d in BISHOP_DIRECTIONS]
+_QUEEN_RAYS = _ROOK_RAYS + _BISHOP_RAYS
+
+
+def _slide(sq: int, occupied: int, rays: list) -> int:
+    """Return the cells a slider on `sq` reaches along `rays`."""
+    attacks = 0
+    for table, ascending in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if ascending:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """
+    Get the cells attacked by a rook.
+
+    Args:
+            sq: the cell number of the rook
+            occupied: a bitboard of every occupied cell
+    Return:
+            a bitboard of the attacked cells
+    """
+    return _slide(sq, occupied, _ROOK_RAYS)
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """
+    Get the cells attacked by a bishop.
+
+    Args:
+            sq: the cell number of the bishop
+            occupied: a bitboard of every occupied cell
+    Return:
+            a bitboard of the attacked cells
+    """
+    return _slide(sq, occupied, _BISHOP_RAYS)
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    """
+    Get the cells attacked by a queen.
+
+    Args:
+            sq: the cell number of the queen
+            occupied: a bitboard of every occupied cell
+    Return:
+            a bitboard of the attacked cells
+    """
+    return _slide(sq, occupied, _QUEEN_RAYS)
+
+
+def to_square(coord: "CoordT") -> int:
+    """Convert board coordinates to a cell number."""
+    return coord[1] * 8 + coord[0]
+
+
+def to_coords(bb: int) -> "list[CoordT]":
+    """Convert a bitboard to the list of coordinates of its cells."""
+    result = []
+    while bb:
+        low = bb & -bb
+        result.append(COORDS[low.bit_length() - 1])
+        bb ^= low
+    return result
+
+
+class Bitboards:
+    """The bitboards of a chess position."""
+
+    __slots__ = ("pieces", "sides", "occupied")
+
+    def __init__(self):
+        self.pieces = [0] * 13
+        "a bitboard for every piece ID, indexed by `piece_id + 6`"
+
+        self.sides: "dict[int, int]" = {1: 0, -1: 0}
+        "the cells occupied by each player"
+
+        self.occupied = 0
+        "the cells occupied by any piece"
+
+    @classmethod
+    def from_board(cls, board: "BoardT") -> Bitboards:
+        """
+        Build the bitboards of a position.
+
+        Args:
+                board: an 8x8 chess board
+        Return:
+                the bitboards of the position
+        """
+        new = cls()
+        pieces = new.pieces
+        white = black = 0
+        sq = 0
+        for row in board:
+            for piece in row:
+                if piece:
+                    pieces[piece + 6] |= BIT[sq]
+                    if piece > 0:
+                        white |= BIT[sq]
+                    else:
+                        black |= BIT[sq]
+                sq += 1
+        new.sides[1] = white
+        new.sides[-1] = black
+        new.occupied = white | black
+        return new
+
+    @classmethod
+    def from_game(cls, game: "Game") -> Bitboards:
+        """
+        Build the bitboards of a position from the piece lists of a game.
+
+        Only the cells holding a piece are visited, instead of the whole
+        board.
+
+        Args:
+                game: an instance of the chess game
+        Return:
+                the bitboards of the position
+        """
+        new = cls()
+        pieces = new.pieces
+        board = game.board
+        for side in (1, -1):
+            bits = 0
+            for x, y in game.piece_lists[side]:
+                bit = BIT[y * 8 + x]
+                pieces[board[y][x] + 6] |= bit
+                bits |= bit
+            new.sides[side] = bits
+        new.occupied = new.sides[1] | new.sides[-1]
+        return new
+
+    def get(self, piece_id: int) -> int:
+        """Return the bitboard of a piece."""
+        return self.pieces[piece_id + 6]
+
+    def toggle(self, piece_id: int, sq: int):
+        """Put a piece on a cell, or take it off the cell if it is there."""
+        bit = BIT[sq]
+        self.pieces[piece_id + 6] ^= bit
+        self.sides[1 if piece_id > 0 else -1] ^= bit
+        self.occupied ^= bit
+
+    def apply(self, record: MoveRecord, placed: int):
+        """
+        Make a move on the bitboards, or take it back.
+
+        Every change is a toggle, so applying a move a second time takes it
+        back.
+
+        Args:
+                record: the record of the move, as `Chess.make_move` returns
+                        it
+                placed: the piece on the destination cell after the move,
+                        which differs from the moved one on a promotion
+        """
+        (fx, fy), (tx, ty) = record.from_loc, record.to_loc
+        part = record.piece
+        self.toggle(part, fy * 8 + fx)
+        self.toggle(placed, ty * 8 + tx)
+        if record.captured:
+            if abs(part) == 1 and record.to_loc == record.en_passant:
+                self.toggle(record.captured, fy * 8 + tx)
+            else:
+                self.toggle(record.captured, ty * 8 + tx)
+        elif abs(part) == 6 and tx - fx in (2, -2):
+            rook = 4 if part > 0 else -4
+            if tx > fx:
+                self.toggle(rook, ty * 8 + 7)
+                self.toggle(rook, ty * 8 + 5)
+            else:
+                self.toggle(rook, ty * 8)
+                self.toggle(rook, ty * 8 + 3)
+
+
+def get_all_moves(
+    game: "Game", bbs: Optional[Bitboards] = None
+) -> "dict[CoordT, list[CoordT]]":
+    """
+    Generate the moves of the active player using bitboards.
+
+    This mirrors `Piece.moves` for every piece on the board and returns
+    the same mapping as `Chess.get_all_moves`.
+
+    Args:
+            game: an instance of the chess game
+            bbs: the bitboards of the position, built from the game if
+                    omitted
+    Return:
+            a dictionary mapping the coordinates of each piece of the
+            active player to the coordinates it can move to
+    """
+    board = game.board
+    player: "PlayerT" = game.player
+    if bbs is None:
+        bbs = Bitboards.from_game(game)
+    own = bbs.sides[player]
+    occupied = bbs.occupied
+    enemy = occupied ^ own
+    empty = FULL ^ occupied
+    targets = FULL ^ own
+    pawn_attacks = PAWN_ATTACKS[player]
+    forward = -8 * player
+    pawn_home = 6 if player == 1 else 1
+    king_home = 60 if player == 1 else 4
+    castling = game.castling
+    right = 0 if player == 1 else 2
+    if game.en_passant is not None:
+        en_passant = BIT[to_square(game.en_passant)]
+    else:
+        en_passant = 0
+
+    moves: "dict[CoordT, list[CoordT]]" = {}
+    pieces = own
+    while pieces:
+        low = pieces & -pieces
+        pieces ^= low
+        sq = low.bit_length() - 1
+        kind = board[sq >> 3][sq & 7] * player
+        if kind == 1:
+            reach = pawn_attacks[sq] & (enemy | en_passant)
+            step = sq + forward
+            if 0 <= step < 64 and empty & BIT[step]:
+                reach |= BIT[step]
+                if sq >> 3 == pawn_home and empty & BIT[step + forward]:
+                    reach |= BIT[step + forward]
+        elif kind == 2:
+            reach = KNIGHT_ATTACKS[sq] & targets
+        elif kind == 3:
+            reach = _slide(sq, occupied, _BISHOP_RAYS) & targets
+        elif kind == 4:
+            reach = _slide(sq, occupied, _ROOK_RAYS) & targets
+        elif kind == 5:
+            reach = _slide(sq, occupied, _QUEEN_RAYS) & targets
+        else:
+            reach = KING_ATTACKS[sq] & targets
+            if sq == king_home:
+                if castling[right] and not occupied & (
+                    BIT[sq + 1] | BIT[sq + 2]
+                ):
+                    reach |= BIT[sq + 2]
+                if castling[right + 1] and not occupied & (
+                    BIT[sq - 1] | BIT[sq - 2]
+                ):
+                    reach |= BIT[sq - 2]
+        reached = []
+        while reach:
+            low = reach & -reach
+            reached.append(COORDS[low.bit_length() - 1])
+            reach ^= low
+        moves[COORDS[sq]] = reached
+    return moves
+
+
+def attackers(bbs: Bitboards, sq: int, by: "PlayerT", occupied: int) -> int:
+    """
+    Get the pieces of a player that attack a cell.
+
+    The cell is probed outward: a knight of `by` attacks it if it stands a
+    knight's jump away, a rook or queen if it stands at the end of a
+    rook's ray from the cell, and so on.
+
+    Args:
+            bbs: the bitboards of the position
+            sq: the cell number of the attacked cell
+            by: the attacking player
+            occupied: the occupied cells that block sliding pieces
+    Return:
+            a bitboard of the attacking pieces
+    """
+    pieces = bbs.pieces
+    queens = pieces[6 + 5 * by]
+    return (
+        PAWN_ATTACKS[-by][sq] & pieces[6 + by]
+        | KNIGHT_ATTACKS[sq] & pieces[6 + 2 * by]
+        | KING_ATTACKS[sq] & pieces[6 + 6 * by]
+        | _slide(sq, occupied, _ROOK_RAYS) & (pieces[6 + 4 * by] | queens)
+        | _slide(sq, occupied, _BISHOP_RAYS) & (pieces[6 + 3 * by] | queens)
+    )
+
+
+def attacked_cells(bbs: Bitboards, by: "PlayerT", occupied: int) -> int:
+    """
+    Get every cell attacked by a player.
+
+    Args:
+            bbs: the bitboards of the position
+            by: the attacking player
+            occupied: the occupied cells that block sliding pieces
+    Return:
+            a bitboard of the attacked cells
+    """
+    pieces = bbs.pieces
+    queens = pieces[6 + 5 * by]
+    attacks = 0
+    for table, bb in (
+        (PAWN_ATTACKS[by], pieces[6 + by]),
+        (KNIGHT_ATTACKS, pieces[6 + 2 * by]),
+        (KING_ATTACKS, pieces[6 + 6 * by]),
+    ):
+        while bb:
+            low = bb & -bb
+            attacks |= table[low.bit_length() - 1]
+            bb ^= low
+    for rays, bb in (
+        (_BISHOP_RAYS, pieces[6 + 3 * by] | queens),
+        (_ROOK_RAYS, pieces[6 + 4 * by] | queens),
+    ):
+        while bb:
+            low = bb & -bb
+            attacks |= _slide(low.bit_length() - 1, occupied, rays)
+            bb ^= low
+    return attacks
+
+
+def pinned_pieces(bbs: Bitboards, player: "PlayerT", king: int) -> "dict[int, int]":
+    """
+    Get the pieces of a player that are pinned to their king.
+
+    Args:
+            bbs: the bitboards of the position
+            player: the player that owns the king
+            king: the cell number of the king
+    Return:
+            a dictionary mapping the cell number of every pinned piece to
+            the cells it can still move to (the pin line up to and
+            including the pinning piece)
+    """
+    pieces = bbs.pieces
+    enemy = bbs.sides[-player]
+    queens = pieces[6 - 5 * player]
+    # enemy sliders that would attack the king if our pieces were removed
+    snipers = _slide(king, enemy, _ROOK_RAYS) & (
+        pieces[6 - 4 * player] | queens
+    ) | _slide(king, enemy, _BISHOP_RAYS) & (pieces[6 - 3 * player] | queens)
+    pins: "dict[int, int]" = {}
+    while snipers:
+        low = snipers & -snipers
+        snipers ^= low
+        line = BETWEEN[king][low.bit_length() - 1]
+        blockers = line & bbs.occupied
+        if blockers and not blockers & (blockers - 1):
+            pins[blockers.bit_length() - 1] = line | low
+    return pins
+
+
+def legal_moves(
+    game: "Game",
+    moves: "dict[CoordT, list[CoordT]]",
+    bbs: "Optional[Bitboards]" = None,
+) -> "tuple[bool, dict[CoordT, list[CoordT]]]":
+    """
+    Remove the moves that would leave the active player's king in check.
+
+    The checkers, the pinned pieces and the cells attacked by the
+    opponent are computed once for the position, then every move is
+    tested against them without being played out.
+
+    Args:
+            game: an instance of the chess game
+            moves: the moves of the active player as returned by
+                    `Chess.get_all_moves`
+            bbs: the bitboards of the position, built from the game if
+                    omitted
+    Return:
+            whether the king is in check, and a dictionary mapping the
+            coordinates of every piece that has a legal move to its
+            legal moves
+    """
+    if bbs is None:
+        bbs = Bitboards.from_game(game)
+    player: "PlayerT" = game.player
+    pieces = bbs.pieces
+    king_bb = pieces[6 + 6 * player]
+    if not king_bb:
+        return False, {coord: m for coord, m in moves.items() if m}
+    king = king_bb.bit_length() - 1
+    occupied = bbs.occupied
+    checkers = attackers(bbs, king, -player, occupied)
+    # the king does not shield the cells behind it from sliding pieces
+    danger = attacked_cells(bbs, -player, occupied ^ king_bb)
+    if not checkers:
+        evasions = FULL
+    elif checkers & (checkers - 1):
+        evasions = 0  # double check, only the king can move
+    else:
+        evasions = BETWEEN[king][checkers.bit_length() - 1] | checkers
+    pins = pinned_pieces(bbs, player, king)
+    pawns = pieces[6 + player]
+    rooks = pieces[6 + 4 * player]
+    if game.en_passant is not None:
+        en_passant = to_square(game.en_passant)
+    else:
+        en_passant = -1
+
+    result: "dict[CoordT, list[CoordT]]" = {}
+    for coord, targets in moves.items():
+        sq = coord[1] * 8 + coord[0]
+        legal = []
+        if sq == king:
+            for target in targets:
+                to = target[1] * 8 + target[0]
+                if danger & BIT[to]:
+                    continue
+                if to - sq == 2 or to - sq == -2:  # castling
+                    step = (to - sq) // 2
+                    corner = sq + 3 if step > 0 else sq - 4
+                    if (
+                        checkers
+                        or danger & BIT[sq + step]
+                        or not rooks & BIT[corner]
+                        or step < 0 and occupied & BIT[sq - 3]
+                    ):
+                        continue
+                legal.append(target)
+        else:
+            allowed = evasions & pins.get(sq, FULL)
+            for target in targets:
+                to = target[1] * 8 + target[0]
+                if to == en_passant and pawns & BIT[sq]:
+                    # the captured pawn leaves the board too, which can
+                    # uncover an attack along the rank
+                    captured = BIT[to + 8 * player]
+                    after = occupied ^ BIT[sq] ^ captured | BIT[to]
+                    if attackers(bbs, king, -player, after) & ~captured:
+                        continue
+                elif not allowed & BIT[to]:
+                    continue
+                legal.append(target)
+        if legal:
+            result[coord] = legal
+    return bool(checkers), result
@@ -0,0 +1,287 @@
+"""
+Opening book.
+
+A book is a binary file of fixed-size entries, each holding the zobrist key
+of a position, a move played from it and the weight of that move:
+
+    key (8 bytes) | move (2 bytes) | weight (2 bytes)
+
+Moves are packed like the plies of a `History` (from cell, to cell and
+promotion). Entries are sorted by key, and by falling weight within a key,
+so a reader finds the moves of a position with a binary search over the
+file. The file is read through `mmap`, so a probe only pages in the few
+entries it looks at and costs microseconds however big the book is.
+
+Books are built from PGN files, every move of the first plies of every
+game scoring 2 for the side that won, 1 for a draw and 0 for a loss.
+
+Run it from the `chess` directory with...
+
+`python -m src.book build games.pgn [more.pgn...] [--plies 24]`
+
+`python -m src.book probe "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -"`
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import random
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional, Union
+
+from rich import print as rprint
+from rich.table import Table
+
+from .chess import EPD, Chess
+from .epd import EPDString, load_EPD
+from .game import DIR
+from .notation import parse_san, san
+from .pgn import SourceT, read_games
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+    from .epd import CoordT
+
+FILE = DIR.joinpath("book.bin")
+"Default book file"
+
+ENTRY = struct.Struct("<QHH")
+"zobrist key, packed move, weight"
+
+KEY = struct.Struct("<Q")
+
+BOOK_PLIES = 24
+"Plies of every game added to a book"
+
+MAX_WEIGHT = 0xFFFF
+
+SCORES = {"1-0": (2, 0), "0-1": (0, 2)}
+"Weight a move gets for white and black by game result, 1 otherwise"
+
+
+def pack_move(move: MoveT) -> int:
+    """Pack a move into 16 bits, like the moves of a `History`."""
+    (fx, fy), (tx, ty), promotion = move
+    return (fy * 8 + fx) | (ty * 8 + tx) << 6 | promotion << 12
+
+
+def unpack_move(packed: int) -> MoveT:
+    """Unpack a move, inverse of `pack_move`."""
+    return (
+        (packed & 7, packed >> 3 & 7),
+        (packed >> 6 & 7, packed >> 9 & 7),
+        packed >> 12,
+    )
+
+
+def _is_legal(
+    game: Chess, legal_moves: "dict[CoordT, list[CoordT]]", move: MoveT
+) -> bool:
+    """Whether a move is legal in a game, its promotion piece included."""
+    (fx, fy), (tx, ty), promotion = move
+    if (tx, ty) not in legal_moves.get((fx, fy), ()):
+        return False
+    if abs(game.board[fy][fx]) == 1 and ty in (0, 7):
+        return promotion in (2, 3, 4, 5)
+    return promotion == 0
+
+
+def build(
+    sources: "Iterable[SourceT]",
+    path: Union[str, Path] = FILE,
+    plies: int = BOOK_PLIES,
+    min_weight: int = 1,
+) -> int:
+    """
+    Build a book from PGN files.
+
+    Games holding an illegal move are added up to that move.
+
+    Args:
+            sources: paths to PGN files or open text files
+            path: the book file, replaced if it exists
+            plies: the number of plies of every game to add
+            min_weight: the lowest weight of a move kept in the book
+    Return:
+            the number of entries written
+    """
+    weights: "defaultdict[int, defaultdict[int, int]]" = defaultdict(
+        lambda: defaultdict(int)
+    )
+    for source in sources:
+        for pgn_game in read_games(source):
+            game = Chess()
+            if not load_EPD(game, EPDString(pgn_game.headers.get("FEN", EPD))):
+                continue
+            scores = SCORES.get(pgn_game.result, (1, 1))
+            for text in pgn_game.moves[:plies]:
+                try:
+                    move = parse_san(game, text)
+                except ValueError:
+                    break
+                score = scores[0 if game.player == 1 else 1]
+                weights[game.zobrist_key][pack_move(move)] += score
+                game.make_move(*move)
+
+    entries = []
+    for key in sorted(weights):
+        moves = weights[key]
+        # weights are scaled down together, to keep their ratios
+        scale = min(MAX_WEIGHT / max(max(moves.values()), 1), 1)
+        for packed, weight in sorted(
+            moves.items(), key=lambda item: (-item[1], item[0])
+        ):
+            if weight >= min_weight:
+                entries.append(
+                    ENTRY.pack(key, packed, max(int(weight * scale), 1))
+                )
+    Path(path).write_bytes(b"".join(entries))
+    return len(entries)
+
+
+class Book:
+    """An opening book file, read through `mmap`."""
+
+    def __init__(self, path: Union[str, Path] = FILE):
+        """
+        Args:
+                path: the book file
+        Raises:
+                ValueError: if the file isn't made of whole entries
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        size = self.path.stat().st_size
+        if size % ENTRY.size:
+            self._file.close()
+            raise ValueError(f"Invalid book file {str(path)!r}.")
+        if size:
+            self._map = mmap.mmap(
+                self._file.fileno(), size, access=mmap.ACCESS_READ
+            )
+        self.size = size // ENTRY.size
+        "number of entries"
+
+    def __enter__(self) -> Book:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self):
+        """Close the book's file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def entries(self, key: int) -> "list[tuple[MoveT, int]]":
+        """
+        Find the moves of a position.
+
+        Args:
+                key: the zobrist key of the position
+        Return:
+                the moves and their weights, heaviest first
+        """
+        data = self._map
+        if data is None:
+            return []
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        for index in range(low, self.size):
+            entry_key, packed, weight = ENTRY.unpack_from(
+                data, index * ENTRY.size
+            )
+            if entry_key != key:
+                break
+            found.append((unpack_move(packed), weight))
+        return found
+
+    def moves(self, game: Chess) -> "list[tuple[MoveT, int]]":
+        """
+        Find the legal book moves of a game.
+
+        Args:
+                game: the game
+        Return:
+                the moves and their weights, heaviest first. Moves that
+                aren't legal, should two positions share a key, are left
+                out.
+        """
+        found = self.entries(game.zobrist_key)
+        if not found:
+            return []
+        legal_moves = game.get_state().legal_moves
+        return [
+            (move, weight)
+            for move, weight in found
+            if _is_legal(game, legal_moves, move)
+        ]
+
+    def choose(
+        self, game: Chess, rng: Optional[random.Random] = None
+    ) -> Optional[MoveT]:
+        """
+        Pick a book move at random, in proportion to the weights.
+
+        Args:
+                game: the game
+                rng: the random number generator, the `random` module's
+                        if None
+        Return:
+                the move, None if the position isn't in the book
+        """
+        found = self.moves(game)
+        if not found:
+            return None
+        moves, weights = zip(*found)
+        return (rng or random).choices(moves, weights)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    builder = commands.add_parser("build", help="build a book from PGN files")
+    builder.add_argument("pgn", nargs="+", help="PGN files")
+    builder.add_argument("-o", "--output", default=str(FILE))
+    builder.add_argument("-p", "--plies", type=int, default=BOOK_PLIES)
+    builder.add_argument("--min-weight", type=int, default=1)
+    prober = commands.add_parser("probe", help="list the moves of a position")
+    prober.add_argument("fen", nargs="?", default=EPD)
+    prober.add_argument("-b", "--book", default=str(FILE))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build(args.pgn, args.output, args.plies, args.min_weight)
+        rprint(f"{count} entries written to {args.output}")
+        return
+    game = Chess()
+    if not load_EPD(game, EPDString(args.fen)):
+        raise SystemExit(f"Invalid position {args.fen!r}")
+    with Book(args.book) as book:
+        found = book.moves(game)
+    total = sum(weight for _, weight in found)
+    table = Table(title=args.fen)
+    for column in ("move", "weight", "share"):
+        table.add_column(column, justify="right")
+    for move, weight in found:
+        table.add_row(san(game, move), str(weight), f"{weight / total:.1%}")
+    rprint(table)
+
+
+if __name__ == "__main__":
+    main()
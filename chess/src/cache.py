@@ -0,0 +1,118 @@
+"""
+Cache of position states.
+
+Working out the legal moves of a position and whether the active player is
+in check, checkmated or stalemated is the most expensive step after every
+move, undo and promotion. The results are kept in a least recently used
+cache keyed by the zobrist key of the position, so returning to a position
+(flipping back and forth with undo, for instance) costs a single lookup.
+
+`STATE_CACHE` is shared by every `Chess` game and by the UI.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from .epd import CoordT
+
+
+DEFAULT_SIZE = 4096
+"Default number of positions kept in the cache"
+
+
+class PositionState(NamedTuple):
+    """The computed state of a position, for its active player."""
+
+    check: bool
+    "the king is in check"
+
+    checkmate: bool
+    "the king is in check and no legal move is left"
+
+    stalemate: bool
+    "the king is not in check and no legal move is left"
+
+    legal_moves: "dict[CoordT, list[CoordT]]"
+    "legal moves of every piece that can move, shared and not to be modified"
+
+
+class PositionCache:
+    """A least recently used cache of position states."""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE):
+        """
+        Args:
+                maxsize: the number of positions to keep, 0 to disable
+                        the cache
+        """
+        self._entries: "OrderedDict[int, PositionState]" = OrderedDict()
+        self._maxsize = 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        """Return the number of positions the cache keeps."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int):
+        """Resize the cache, dropping the least recently used entries."""
+        if value < 0:
+            raise ValueError("Invalid cache size.")
+        self._maxsize = value
+        while len(self._entries) > value:
+            self._entries.popitem(last=False)
+
+    def get(self, key: int) -> Optional[PositionState]:
+        """
+        Look up a position.
+
+        Args:
+                key: the zobrist key of the position
+        Return:
+                the state of the position or None if it isn't cached
+        """
+        state = self._entries.get(key)
+        if state is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return state
+
+    def put(self, key: int, state: PositionState) -> PositionState:
+        """
+        Store the state of a position.
+
+        Args:
+                key: the zobrist key of the position
+                state: the computed state of the position
+        Return:
+                the stored state
+        """
+        if self._maxsize:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return state
+
+    def clear(self):
+        """Remove every position."""
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
+
+
+STATE_CACHE = PositionCache()
+"The cache shared by every game and the UI"
@@ -1,18 +1,42 @@
 from itertools import cycle
-from typing import cast
+from typing import Literal, Optional, cast
 
 from rich import box
 from rich import print as rprint
 from rich.panel import Panel
 from rich.table import Table
 
-from .epd import (CoordT, EPDString, get_coords, get_EPD, get_loc, get_piece,
+from typing_extensions import Self
+
+from . import bitboard, mailbox, zobrist
+from .cache import STATE_CACHE, PositionCache, PositionState
+from .epd import (CoordT, EPDString, get_coords, get_loc, get_piece,
                   load_EPD, set_piece)
-from .game import Game
-from .piece import notations
+from .game import Game, MoveRecord
+from .mailbox import Mailbox
+from .notation import san
+from .piece import PlayerT, notations
 
 EPD = EPDString("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -")
 
+BackendT = Literal["board", "bitboard", "mailbox"]
+"Move generation backend"
+
+BACKENDS: "tuple[BackendT, ...]" = ("board", "bitboard", "mailbox")
+
+MoveT = tuple[CoordT, CoordT, int]
+"A move as (from, to, promotion), promotion being 0 unless a pawn promotes"
+
+CASTLING_RIGHTS: "dict[CoordT, tuple[int, ...]]" = {
+    (4, 7): (0, 1),
+    (7, 7): (0,),
+    (0, 7): (1,),
+    (4, 0): (2, 3),
+    (7, 0): (2,),
+    (0, 0): (3,),
+}
+"Castling rights lost when a piece leaves or lands on a cell"
+
 
 class Chess(Game):
     """
@@ -22,80 +46,172 @@ class Chess(Game):
     x = "abcdefgh"
     y = "87654321"
 
-    def __init__(self, epd: EPDString = EPD):
+    _backend: BackendT = "board"
+
+    state_cache: PositionCache = STATE_CACHE
+    "Computed states of positions, shared by every game and the UI"
+
+    def __init__(
+        self, epd: EPDString = EPD, backend: Optional[BackendT] = None
+    ):
         super().__init__(epd)
         self.c_escape: "dict[CoordT, list[CoordT]]" = {}
+        self._bitboards: Optional[bitboard.Bitboards] = None
+        self._bitboards_key: Optional[int] = None
+        self._attack_maps: "dict[int, int]" = {}
+        if backend is not None:
+            self.backend = backend
         load_EPD(self, epd)
 
+    @property
+    def backend(self) -> BackendT:
+        """
+        Move generation backend.
+
+        * "board": every piece walks the 8x8 board through `Piece.moves`
+        * "bitboard": moves are generated from bitboards (see `bitboard`)
+        * "mailbox": the board is stored as a 10x12 mailbox and moves are
+            generated on it (see `mailbox`), the fastest of the three
+        """
+        return self._backend
+
+    @backend.setter
+    def backend(self, value: BackendT):
+        """Set the move generation backend, converting the board if needed."""
+        if value not in BACKENDS:
+            raise ValueError("Invalid move generation backend.")
+        if value == "mailbox" and type(self.board) is not Mailbox:
+            self.board = Mailbox.from_board(self.board)  # type: ignore
+        elif value != "mailbox" and type(self.board) is Mailbox:
+            self.board = self.board.to_board()
+        self._backend = value
+
+    def copy(self) -> Self:
+        """Return a copy of the game."""
+        new = super().copy()
+        new.backend = self.backend
+        return new
+
     def _on_check(self) -> "tuple[bool, dict[CoordT, list[CoordT]]]":
         """
         Check if the king is in check.
 
-        Args:
-            king: The king's coordinates and possible moves
-            p_moves: The possible moves of the other pieces
         Returns:
             bool: True if the king is in check, False otherwise
             dict: The possible moves of the pieces that can escape check
         """
-        check = False
-        c_escape: "dict[CoordT, list[CoordT]]" = {}
-        possible_moves = self.get_all_moves()
-        king = notations.get_id("k") * (self.player)
-        k_pos = tuple()  # King position
-        p_moves: "set[tuple[CoordT, CoordT]]" = set()  # Possible blocks
-        # Sort all possible moves
-        for piece, moves in possible_moves.items():
-            if not moves:
-                continue
-            if get_piece(self, piece) == king:
-                k_pos = (piece, moves)
-            else:
-                for move in moves:
-                    p_moves.add((piece, move))
-        # Check if checkmate is in posible moves
-        if not k_pos:
-            for y, row in enumerate(self.board):
-                if king in row:
-                    k_pos = ((row.index(king), y), [])
-                    break
-        # Check if king is in check
-        for move in p_moves:
-            x_game = self.copy()
-            x_game.switch_player()
-            i_moves = x_game.get_all_moves()  # Imaginary moves
-            if any(k_pos[0] in moves for moves in i_moves.values()):
-                check = True
-
-        for move in p_moves:
-            x_game = self.copy()
-            x_game.move(get_loc(move[0]), get_loc(move[1]), dummy=True)  # Move piece
-            x_game.switch_player()
-            i_moves = x_game.get_all_moves()  # Imaginary moves
-            if not any(k_pos[0] in moves for moves in i_moves.values()):
-                c_escape.setdefault(move[0], list()).append(move[1])
-            else:
-                pass
-                # print(f"Bad Piece move detected!: {get_loc(move[0])} -> {get_loc(move[1])}")
-        for move in k_pos[1]:
-            x_game = self.copy()
-            x_game.move(get_loc(k_pos[0]), get_loc(move), dummy=True)  # Move king
-            x_game.switch_player()
-            i_moves = x_game.get_all_moves()  # Imaginary moves
-            if not any(
-                move in m for m in i_moves.values()
-            ):  # Check if moved king still in check
-                c_escape.setdefault(k_pos[0], list()).append(move)
-            else:
-                pass
-                # print(f"Bad King move detected!: {get_loc(k_pos[0])} -> {get_loc(move)}")
-        if check:
+        state = self.get_state()
+        check, c_escape = state.check, state.legal_moves
+        if check and self.log:
             if len(c_escape) == 0:
                 self.log[-1] += "#"
             else:
                 self.log[-1] += "+"
         return check, c_escape
 
+    def get_state(self) -> PositionState:
+        """
+        Return the state of the current position for the active player.
+
+        States are looked up in `state_cache` by zobrist key, so a position
+        that was reached before is not worked out again.
+
+        Returns:
+            PositionState: Whether the king is in check, checkmated or
+                stalemated, and the legal moves of the pieces that can move.
+        """
+        key = self.zobrist_key
+        state = self.state_cache.get(key)
+        if state is None:
+            check = self.is_check()
+            legal = bitboard.legal_moves(
+                self, self.get_all_moves(), self._get_bitboards()
+            )[1]
+            state = self.state_cache.put(
+                key,
+                PositionState(
+                    check, check and not legal, not check and not legal, legal
+                ),
+            )
+        return state
+
+    def _get_bitboards(self) -> bitboard.Bitboards:
+        """
+        Return the bitboards of the current board.
+
+        They are cached, along with the attack maps built from them, until
+        the pieces on the board change. `make_move` and `unmake_move`
+        update them in place, other changes have them built again.
+        """
+        if self._bitboards is None or self._bitboards_key != self.board_key:
+            self._bitboards = bitboard.Bitboards.from_game(self)
+            self._bitboards_key = self.board_key
+            self._attack_maps = {}
+        return self._bitboards
+
+    def attack_map(self, player: PlayerT) -> int:
+        """
+        Return the cells attacked by a player.
+
+        Args:
+            player (int): The attacking player.
+
+        Returns:
+            int: A bitboard of the attacked cells, cached until the pieces
+                on the board change.
+        """
+        bbs = self._get_bitboards()
+        attacks = self._attack_maps.get(player)
+        if attacks is None:
+            attacks = bitboard.attacked_cells(bbs, player, bbs.occupied)
+            self._attack_maps[player] = attacks
+        return attacks
+
+    def is_square_attacked(self, square: CoordT, by_player: PlayerT) -> bool:
+        """
+        Check if a cell is attacked by a player.
+
+        The cell is probed outward along the knight jumps, the pawn
+        diagonals and the rays of the sliding pieces, unless the attack
+        map of the player is already cached.
+
+        Args:
+            square (tuple): The coordinates of the cell.
+            by_player (int): The attacking player.
+
+        Returns:
+            bool: True if a piece of `by_player` attacks the cell.
+        """
+        sq = square[1] * 8 + square[0]
+        bbs = self._get_bitboards()
+        attacks = self._attack_maps.get(by_player)
+        if attacks is not None:
+            return bool(attacks & bitboard.BIT[sq])
+        return bool(bitboard.attackers(bbs, sq, by_player, bbs.occupied))
+
+    def is_check(self) -> bool:
+        """
+        Check if the king of the active player is in check.
+        """
+        king = self.kings[self.player]
+        return king is not None and self.is_square_attacked(
+            king, -self.player  # type: ignore
+        )
+
+    def get_legal_moves(self) -> "dict[CoordT, list[CoordT]]":
+        """
+        Return a dictionary of the legal moves of the active player.
+
+        Unlike `get_all_moves`, moves that would leave the player's king in
+        check are left out, and so are pieces that cannot move at all.
+
+        Returns:
+            dict: A dictionary mapping the position of each piece to its legal moves.
+        """
+        return bitboard.legal_moves(
+            self, self.get_all_moves(), self._get_bitboards()
+        )[1]
+
     def promote_pawn(self, to: int) -> bool:
         """
         Promotes a pawn to another piece.
@@ -116,6 +232,8 @@ class Chess(Game):
         )
         if pos != None:
             set_piece(self, pos, part)
+            self.history.set_promotion(to)
+            self.key_stack[-1] = self.zobrist_key ^ zobrist.SIDE
             self.log[-1] += f"={notations.get_char(to).upper()}"
             return True
         else:
@@ -144,47 +262,25 @@ class Chess(Game):
         """
         Check if the 50 move rule has been reached.
         """
-        if len(self.log) > 100:
-            for m in self.log[-100:]:
-                if "x" in m or m[0].islower():
-                    return False
-            return True
-        else:
-            return False
+        return self.halfmove >= 100
 
     def _is_seventy_five_move_rule(self) -> bool:
         """
         Check if the 75 move rule has been reached.
         """
-        if len(self.log) > 150:
-            for m in self.log[-150:]:
-                if "x" in m or m[0].islower():
-                    return False
-            return True
-        else:
-            return False
+        return self.halfmove >= 150
 
     def _is_threefold_repetition(self) -> bool:
         """
         Check if the threefold repetition rule has been reached.
         """
-        hash = get_EPD(self)
-        if hash not in self.epd_hash:
-            return False
-        if self.epd_hash[hash] >= 3:
-            return True
-        return False
+        return self.repetitions() >= 3
 
     def _is_fivefold_repetition(self) -> bool:
         """
         Check if the fivefold repetition rule has been reached.
         """
-        hash = get_EPD(self)
-        if hash not in self.epd_hash:
-            return False
-        if self.epd_hash[hash] >= 5:
-            return True
-        return False
+        return self.repetitions() >= 5
 
     def _is_dead_position(self):
         """
@@ -202,13 +298,10 @@ class Chess(Game):
             bool: True if the current position is a dead position,
                 False otherwise.
         """
-        a_pieces = []
-        for y in self.board:
-            for x in y:
-                if x != 0:
-                    a_pieces.append(x)
-                if len(a_pieces) > 4:
-                    return False
+        cells = self.piece_lists[1] + self.piece_lists[-1]
+        if len(cells) > 4:
+            return False
+        a_pieces = [get_piece(self, cell) for cell in cells]
         if len(a_pieces) == 2 and -6 in a_pieces and 6 in a_pieces:
             return True
         elif len(a_pieces) == 3 and (
@@ -252,6 +345,30 @@ class Chess(Game):
         board.add_row(*h_indicators)
         rprint(Panel.fit(board))
 
+    def log_move(
+        self, part, cur_cord, next_cord, cur_pos, next_pos, n_part=None
+    ):
+        """
+        Logs the move made by the player into the game's move log.
+
+        The move is written in Standard Algebraic Notation, before it is
+        made. The check suffix is added later by `_on_check`.
+
+        Args:
+            part (int): The integer value of the piece that is being moved.
+            cur_cord (str): The current coordinates of the piece in
+                algebraic notation (e.g. "a1", "h8").
+            next_cord (str): The coordinates of the square that the piece is
+                moving to in algebraic notation.
+            cur_pos (tuple): The current position of the piece on the board.
+            next_pos (tuple): The position of the square that the piece is
+                moving to on the board.
+            n_part (int): The integer value of the promoted piece, if any.
+        """
+        self.log.append(
+            san(self, (cur_pos, next_pos, abs(n_part or 0)), suffix=False)
+        )
+
     def move(self, curr_loc: str, next_loc: str, dummy=False):
         """
         Move a piece on the board.
@@ -275,7 +392,10 @@ class Chess(Game):
             occupant = get_piece(self, coords)
             set_piece(self, coords, 0)
         self.log_move(part, curr_loc, next_loc, cp, np)
-        if (part == 1 and np[1] == 4) or (part == -1 and np[1] == 3):
+        self.en_passant = None
+        if (part == 1 and cp[1] == 6 and np[1] == 4) or (
+            part == -1 and cp[1] == 1 and np[1] == 3
+        ):
             self.en_passant = (
                 (np[0], np[1] + 1) if part == 1 else (np[0], np[1] - 1)
             )
@@ -291,8 +411,6 @@ class Chess(Game):
             set_piece(self, (np[0] - 2, np[1]), 0)
             # self.board[np[1]][np[0] + 1] = 4 * self.player
             # self.board[np[1]][np[0] - 2] = 0
-        else:
-            self.en_passant = None
         if part == 6 * self.player:
             if self.player == 1:
                 self.castling[0] = 0
@@ -313,16 +431,239 @@ class Chess(Game):
                     self.castling[2] = 0
         if not occupant:
             occupant = get_piece(self, np)
+        if occupant or part == self.player:  # capture or pawn move
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if self.player == -1:
+            self.fullmove += 1
         if occupant != 0 and not dummy:
             print("Captured: " + notations.get_name(occupant))
             self.captured[self.player].append(occupant)
         set_piece(self, cp, 0)
         set_piece(self, np, part)
-        hash = get_EPD(self)
-        self.epd_hash.setdefault(hash, 0)
-        self.epd_hash[hash] += 1
+        # the key of the position once the player is switched
+        self.key_stack.append(self.zobrist_key ^ zobrist.SIDE)
         return True
 
+    def make_move(
+        self, curr_pos: CoordT, next_pos: CoordT, promotion: int = 5
+    ) -> MoveRecord:
+        """
+        Make a move and switch the active player.
+
+        This is the lightweight counterpart of `move`: nothing is logged
+        or printed, and only the changes needed to take the move back are
+        pushed onto `undo_stack`. The move is not validated.
+
+        Args:
+            curr_pos (tuple): The current coordinates of the piece.
+            next_pos (tuple): The coordinates the piece moves to.
+            promotion (int): The piece a pawn is promoted to when it
+                reaches the last rank. Defaults to a queen.
+
+        Returns:
+            MoveRecord: The record that `unmake_move` uses to take back the move.
+        """
+        board = self.board
+        fx, fy = curr_pos
+        tx, ty = next_pos
+        part = board[fy][fx]
+        player = self.player
+        captured = board[ty][tx]
+        bbs = self._bitboards
+        if self._bitboards_key != self.board_key:
+            bbs = None  # built again when needed
+        en_passant = self.en_passant
+        table = zobrist.PIECES
+        key = self.board_key ^ table[part + 6][fy * 8 + fx]
+        if part == player and next_pos == en_passant:
+            captured = board[fy][tx]
+            board[fy][tx] = 0
+            key ^= table[captured + 6][fy * 8 + tx]
+            self.piece_lists[-player].remove((tx, fy))
+        else:
+            key ^= table[captured + 6][ty * 8 + tx]
+            if captured:
+                self.piece_lists[-player].remove(next_pos)
+        own = self.piece_lists[player]
+        own[own.index(curr_pos)] = next_pos
+        record = MoveRecord(
+            curr_pos,
+            next_pos,
+            part,
+            captured,
+            tuple(self.castling),  # type: ignore
+            en_passant,
+            self.halfmove,
+            self.board_key,
+        )
+        board[fy][fx] = 0
+        self.en_passant = None
+        if part == player:  # pawn
+            if ty - fy == 2 or ty - fy == -2:
+                self.en_passant = (fx, (fy + ty) // 2)
+            if ty == 0 or ty == 7:
+                part = promotion * player
+            self.halfmove = 0
+        else:
+            rook = 4 * player
+            if part == 6 * player:
+                self.kings[player] = next_pos
+            if part == 6 * player and tx - fx == 2:
+                board[ty][5] = board[ty][7]
+                board[ty][7] = 0
+                key ^= table[rook + 6][ty * 8 + 7] ^ table[rook + 6][ty * 8 + 5]
+                own[own.index((7, ty))] = (5, ty)
+            elif part == 6 * player and tx - fx == -2:
+                board[ty][3] = board[ty][0]
+                board[ty][0] = 0
+                key ^= table[rook + 6][ty * 8] ^ table[rook + 6][ty * 8 + 3]
+                own[own.index((0, ty))] = (3, ty)
+            self.halfmove = 0 if captured else self.halfmove + 1
+        board[ty][tx] = part
+        self.board_key = key ^ table[part + 6][ty * 8 + tx]
+        for pos in (curr_pos, next_pos):
+            for right in CASTLING_RIGHTS.get(pos, ()):
+                self.castling[right] = 0
+        if player == -1:
+            self.fullmove += 1
+        if bbs is not None:
+            bbs.apply(record, part)
+            self._bitboards_key = self.board_key
+            self._attack_maps.clear()
+        self.undo_stack.append(record)
+        self.switch_player()
+        self.key_stack.append(self.zobrist_key)
+        return record
+
+    def unmake_move(self) -> Optional[MoveRecord]:
+        """
+        Take back the last move made with `make_move`.
+
+        Returns:
+            MoveRecord: The record of the move taken back, None if there is none.
+        """
+        if not self.undo_stack:
+            return None
+        record = self.undo_stack.pop()
+        self.switch_player()
+        board = self.board
+        fx, fy = record.from_loc
+        tx, ty = record.to_loc
+        bbs = self._bitboards
+        if bbs is not None and self._bitboards_key == self.board_key:
+            bbs.apply(record, board[ty][tx])
+            self._bitboards_key = record.board_key
+            self._attack_maps.clear()
+        part = record.piece
+        player = self.player
+        own = self.piece_lists[player]
+        board[fy][fx] = part
+        own[own.index(record.to_loc)] = record.from_loc
+        if part == player and record.to_loc == record.en_passant:
+            board[fy][tx] = record.captured
+            board[ty][tx] = 0
+            self.piece_lists[-player].append((tx, fy))
+        else:
+            board[ty][tx] = record.captured
+            if record.captured:
+                self.piece_lists[-player].append(record.to_loc)
+            if part == 6 * player:
+                self.kings[player] = record.from_loc
+            if part == 6 * player and tx - fx == 2:
+                board[ty][7] = board[ty][5]
+                board[ty][5] = 0
+                own[own.index((5, ty))] = (7, ty)
+            elif part == 6 * player and tx - fx == -2:
+                board[ty][0] = board[ty][3]
+                board[ty][3] = 0
+                own[own.index((3, ty))] = (0, ty)
+        self.castling[:] = record.castling
+        self.en_passant = record.en_passant
+        self.halfmove = record.halfmove
+        if player == -1:
+            self.fullmove -= 1
+        self.board_key = record.board_key
+        self.key_stack.pop()
+        return record
+
+    def get_move_list(
+        self, legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None
+    ) -> "list[MoveT]":
+        """
+        Return the legal moves of the active player as a flat list.
+
+        Every move is a (from, to, promotion) tuple that can be passed to
+        `make_move`. A pawn reaching the last rank gives one move for each
+        piece it can be promoted to; promotion is 0 for other moves.
+
+        Args:
+            legal_moves (dict): The legal moves as returned by
+                `get_legal_moves`. They are generated if omitted.
+
+        Returns:
+            list: The legal moves of the active player.
+        """
+        if legal_moves is None:
+            legal_moves = self.get_legal_moves()
+        board = self.board
+        pawn = self.player
+        result = []
+        for curr, moves in legal_moves.items():
+            if board[curr[1]][curr[0]] == pawn:
+                for nxt in moves:
+                    if nxt[1] == 0 or nxt[1] == 7:
+                        for promotion in (5, 4, 3, 2):
+                            result.append((curr, nxt, promotion))
+                    else:
+                        result.append((curr, nxt, 0))
+            else:
+                for nxt in moves:
+                    result.append((curr, nxt, 0))
+        return result
+
+    def perft(self, depth: int) -> int:
+        """
+        Count the positions reachable in an exact number of moves.
+
+        Args:
+            depth (int): The number of halfmoves to play out.
+
+        Returns:
+            int: The number of leaf positions of the legal move tree.
+        """
+        if depth <= 0:
+            return 1
+        moves = self.get_move_list()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.make_move(*move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+    def divide(self, depth: int) -> "dict[str, int]":
+        """
+        Split the perft count of a position by its first move.
+
+        Args:
+            depth (int): The number of halfmoves to play out.
+
+        Returns:
+            dict: The perft count below every legal move, keyed by the move
+                in long algebraic notation (e.g. "e2e4", "a7a8q").
+        """
+        result: "dict[str, int]" = {}
+        for curr, nxt, promotion in self.get_move_list():
+            name = get_loc(curr) + get_loc(nxt) + notations.get_char(promotion)
+            self.make_move(curr, nxt, promotion)
+            result[name] = self.perft(depth - 1)
+            self.unmake_move()
+        return result
+
     def get_all_moves(self) -> "dict[CoordT, list[CoordT]]":
         """
         Return a dictionary of all possible moves on the current board for each piece,
@@ -332,18 +673,27 @@ class Chess(Game):
         Returns:
             dict: A dictionary of all possible moves on the current board for each piece.
         """
+        if self._backend == "bitboard":
+            return bitboard.get_all_moves(self, self._get_bitboards())
+        if self._backend == "mailbox":
+            return mailbox.get_all_moves(self)
         moves: "dict[CoordT, list[CoordT]]" = {}
-        for r, row in enumerate(self.board):
-            for c, piece in enumerate(row):
-                if piece * self.player <= 0:
-                    continue
-                p_cls = notations.get_class(piece)
-                valid_moves = p_cls.moves(self, self.player, (c, r))
-                moves[(c, r)] = valid_moves
+        for c, r in self.piece_lists[self.player]:
+            p_cls = notations.get_class(self.board[r][c])
+            moves[(c, r)] = p_cls.moves(self, self.player, (c, r))
         return moves
 
     def get_game_state(self):
-        """ """
+        """
+        Return the state of the game for the active player.
+
+        Check is found by probing the cell of the king for attackers, and
+        checkmate and stalemate by whether any legal move is left.
+
+        Returns:
+            tuple: Whether the king is in check, checkmated or stalemated,
+                and the legal moves of the pieces that can move.
+        """
         is_check, c_escape = self._on_check()
         if not len(c_escape) and is_check:
             is_checkmate = True
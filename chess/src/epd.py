@@ -49,13 +49,35 @@ It is composed of four parts, separated by spaces:
 6. Fullmove number: The number of the full move. It starts at 1, and is
    incremented after black's move.
 
+The last two fields are those of a full FEN. They are optional in an EPD,
+which can give them with the "hmvc" and "fmvn" operations instead.
+
 Example:
 	rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1
+
+
+EPD Operations
+--------------
+The four fields of an EPD can be followed by operations, each made of an
+opcode and its operands and ended by a semicolon. These are understood:
+
+* bm: best moves, in SAN
+* am: moves to avoid, in SAN
+* id: a quoted name for the position
+* acd: the depth the position was analysed to
+* ce: the evaluation of the position in centipawns
+* hmvc: the halfmove clock
+* fmvn: the fullmove number
+
+Example:
+	r1b1k2r/pp3ppp/2n1pn2/q7/1bBP4/2N2N2/PP1B1PPP/R2QK2R w KQkq - bm O-O; id "test.001";
 """
 
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Literal, NewType, Optional
 
+from . import zobrist
+from .mailbox import Mailbox
 from .piece import notations
 
 if TYPE_CHECKING:
@@ -88,7 +110,10 @@ def get_piece(game: "Game", coord: CoordT) -> int:
     Return:
             the ID of the chess piece
     """
-    return game.board[coord[1]][coord[0]]
+    board = game.board
+    if type(board) is Mailbox:
+        return board.cells[21 + coord[1] * 10 + coord[0]]
+    return board[coord[1]][coord[0]]
 
 
 def set_piece(game: "Game", coord: CoordT, piece_id: int) -> None:
@@ -100,7 +125,49 @@ def set_piece(game: "Game", coord: CoordT, piece_id: int) -> None:
             coord: the coordinates of the cell where the piece is
             piece_id: the ID of the chess piece
     """
-    game.board[coord[1]][coord[0]] = piece_id
+    sq = coord[1] * 8 + coord[0]
+    board = game.board
+    if type(board) is Mailbox:
+        index = 21 + coord[1] * 10 + coord[0]
+        old = board.cells[index]
+        board.cells[index] = piece_id
+    else:
+        old = board[coord[1]][coord[0]]
+        board[coord[1]][coord[0]] = piece_id
+    game.board_key ^= (
+        zobrist.PIECES[old + 6][sq] ^ zobrist.PIECES[piece_id + 6][sq]
+    )
+    cell = (coord[0], coord[1])
+    if old:
+        side = 1 if old > 0 else -1
+        game.piece_lists[side].remove(cell)
+        if old == 6 * side and game.kings[side] == cell:
+            game.kings[side] = None
+    if piece_id:
+        side = 1 if piece_id > 0 else -1
+        game.piece_lists[side].append(cell)
+        if piece_id == 6 * side:
+            game.kings[side] = cell
+
+
+def index_pieces(game: "Game") -> None:
+    """
+    Rebuild the piece lists and king cells of a game from its board.
+
+    Args:
+            game: an instance of the chess game
+    """
+    piece_lists: "dict[int, list[CoordT]]" = {1: [], -1: []}
+    kings: "dict[int, Optional[CoordT]]" = {1: None, -1: None}
+    for r, row in enumerate(game.board):
+        for c, piece in enumerate(row):
+            if piece:
+                side = 1 if piece > 0 else -1
+                piece_lists[side].append((c, r))
+                if piece == 6 * side:
+                    kings[side] = (c, r)
+    game.piece_lists = piece_lists
+    game.kings = kings
 
 
 def find_piece(game: "Game", piece_id: int) -> CoordT:
@@ -113,10 +180,14 @@ def find_piece(game: "Game", piece_id: int) -> CoordT:
     Return:
             the coordinates of the cell where the piece is
     """
-    for row in range(8):
-        for col in range(8):
-            if game.board[row][col] == piece_id:
-                return col, row
+    if piece_id == 6 or piece_id == -6:
+        king = game.kings[1 if piece_id > 0 else -1]
+        if king is not None:
+            return king
+    elif piece_id:
+        for cell in game.piece_lists[1 if piece_id > 0 else -1]:
+            if get_piece(game, cell) == piece_id:
+                return cell
     raise ValueError(f"Piece {piece_id} not found")
 
 
@@ -158,11 +229,80 @@ def get_loc(coords: CoordT) -> str:
     return X[coords[0]] + Y[coords[1]]
 
 
+OPCODES = ("bm", "am", "id", "acd", "ce", "hmvc", "fmvn")
+"EPD opcodes with a known meaning, other opcodes are kept as they are read"
+
+
+def parse_operations(text: str) -> "dict[str, str]":
+    """
+    Parse the operations that follow the four fields of an EPD.
+
+    Args:
+            text: the operations, e.g. `bm Nf3 Ng5; id "test.001";`
+    Return:
+            a dictionary mapping every opcode to its operands, with the
+            quotes of string operands removed
+    Raises:
+            ValueError: if an operation is malformed
+    """
+    operations: "dict[str, str]" = {}
+    operation = ""
+    quoted = False
+    for char in text + ";":
+        if char == '"':
+            quoted = not quoted
+        if char != ";" or quoted:
+            operation += char
+            continue
+        opcode, _, operands = operation.strip().partition(" ")
+        operation = ""
+        if not opcode:
+            continue
+        if not opcode[0].isalpha() or not opcode.isalnum():
+            raise ValueError(f"Invalid EPD opcode {opcode!r}")
+        operands = operands.strip()
+        if operands.startswith('"') and operands.endswith('"'):
+            operands = operands[1:-1]
+        if opcode in ("acd", "ce", "hmvc", "fmvn"):
+            int(operands)
+        operations[opcode] = operands
+    if quoted:
+        raise ValueError("Unterminated EPD string operand")
+    return operations
+
+
+def format_operations(operations: "dict[str, str]") -> str:
+    """
+    Write EPD operations, inverse of `parse_operations`.
+
+    Args:
+            operations: a dictionary mapping opcodes to their operands
+    Return:
+            the operations, each ended by a semicolon
+    """
+    parts = []
+    for opcode, operands in operations.items():
+        operands = str(operands)
+        # names, comments (c0 to c9) and anything holding a semicolon are
+        # string operands
+        if opcode == "id" or opcode[1:].isdigit() or ";" in operands:
+            operands = f'"{operands}"'
+        parts.append(f"{opcode} {operands};" if operands else f"{opcode};")
+    return " ".join(parts)
+
+
 def load_EPD(game: Game, epd_string: EPDString) -> bool:
     """
     Load a chess position in Extended Position Description (EPD) format.
 
     This method takes an EPD string and creates the chess board accordingly.
+    A full FEN is read too, its halfmove clock and fullmove number setting
+    those of the game; they are reset to 0 and 1 if the EPD gives neither
+    them nor the "hmvc" and "fmvn" operations.
+
+    The string is checked before the game is touched: the board needs 8
+    ranks of 8 cells and one king per side, the active player "w" or "b",
+    and the castling and en passant fields their usual forms.
 
     Args:
             game (state): The game's state
@@ -171,31 +311,84 @@ def load_EPD(game: Game, epd_string: EPDString) -> bool:
     Returns:
             (bool): True if epd_string was parsed else false
     """
-    data = epd_string.split(" ")
-    if len(data) != 4:
+    data = epd_string.strip().split(None, 4)
+    if len(data) < 4:
         return False
-    for r, row in enumerate(data[0].split("/")):
-        c = 0
-        for piece in row:
-            if piece.isdigit():
-                for i in range(int(piece)):
-                    game.board[r][c] = 0
-                    c += 1
+    placement, side, castling, en_passant = data[:4]
+    rest = data[4] if len(data) > 4 else ""
+    clocks: "list[int]" = []
+    while len(clocks) < 2:
+        fields = rest.split(None, 1)
+        if not fields or not fields[0].isdigit():
+            break
+        clocks.append(int(fields[0]))
+        rest = fields[1] if len(fields) > 1 else ""
+    try:
+        operations = parse_operations(rest)
+    except ValueError:
+        return False
+    for opcode in ("hmvc", "fmvn"):
+        if not operations.get(opcode, "0").isdigit():
+            return False
+
+    cells: "list[int]" = []
+    ranks = placement.split("/")
+    if len(ranks) != 8:
+        return False
+    for rank in ranks:
+        size = len(cells)
+        for char in rank:
+            if char in "12345678":
+                cells.extend([0] * int(char))
+            elif char in "pnbrqkPNBRQK":
+                cells.append(notations.get_id(char, True))
             else:
-                game.board[r][c] = notations.get_id(piece, True)
-                c += 1
-    game.player = 1 if data[1] == "w" else -1
-    # castling
-    for i, row in enumerate("KQkq"):
-        game.castling[i] = int(row in data[2])
-    game.en_passant = None if data[3] == "-" else get_coords(data[3])
+                return False
+        if len(cells) - size != 8:
+            return False
+    if cells.count(6) != 1 or cells.count(-6) != 1:
+        return False
+    if side not in ("w", "b"):
+        return False
+    if castling != "-" and (
+        not castling or any(c not in "KQkq" for c in castling)
+    ):
+        return False
+    if en_passant != "-" and (
+        len(en_passant) != 2
+        or en_passant[0] not in X
+        or en_passant[1] not in "36"
+    ):
+        return False
+
+    game.epd_operations = operations
+    game.halfmove = clocks[0] if clocks else int(operations.get("hmvc", 0))
+    game.fullmove = (
+        clocks[1] if len(clocks) > 1 else int(operations.get("fmvn", 1))
+    )
+    for r in range(8):
+        for c in range(8):
+            game.board[r][c] = cells[r * 8 + c]
+    game.player = 1 if side == "w" else -1
+    for i, right in enumerate("KQkq"):
+        game.castling[i] = int(right in castling)
+    game.en_passant = None if en_passant == "-" else get_coords(en_passant)
+    game.board_key = zobrist.board_key(game.board)
+    game.key_stack = [game.zobrist_key]
+    index_pieces(game)
     return True
 
 
-def get_EPD(game: Game) -> EPDString:
+def get_EPD(
+    game: Game, operations: "Optional[dict[str, str]]" = None
+) -> EPDString:
     """
     Converts the current chess board state into Extended Position Description (EPD) format.
 
+    Args:
+            operations: EPD operations to write after the four fields,
+                    e.g. `game.epd_operations`
+
     Returns:
             str: The EPD hash string representing the current state of the chess board.
     """
@@ -231,4 +424,18 @@ def get_EPD(game: Game) -> EPDString:
     epd_string += (
         f" {'-' if game.en_passant == None else get_loc(game.en_passant)}"
     )
+    if operations:
+        epd_string += " " + format_operations(operations)
     return EPDString(epd_string)
+
+
+def get_FEN(game: Game) -> EPDString:
+    """
+    Converts the current chess board state into a full Forsyth-Edwards
+    Notation (FEN) string: the four fields of an EPD followed by the
+    halfmove clock and the fullmove number.
+
+    Returns:
+            str: The FEN string of the current state of the chess board.
+    """
+    return EPDString(f"{get_EPD(game)} {game.halfmove} {game.fullmove}")
@@ -0,0 +1,121 @@
+"""
+Static evaluation of chess positions.
+
+A position is scored in centipawns as the material of each player (from
+`notations.get_points`) plus a bonus or penalty for the cell every piece
+stands on, taken from piece-square tables.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .piece import notations
+
+if TYPE_CHECKING:
+    from .game import Game
+
+
+PIECE_VALUES: "list[int]" = [
+    notations.get_points(piece_id) * 100 for piece_id in range(7)
+]
+"Material value of every piece in centipawns, indexed by piece ID"
+
+# Piece-square tables from white's point of view, in board order (the
+# first row is rank 8). Black pieces read them upside down.
+PIECE_SQUARE_TABLES: "dict[int, list[int]]" = {
+    1: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    2: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    3: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    4: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    5: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    6: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+"Bonus of every piece on every cell for white, indexed by piece ID then cell"
+
+
+def _square_values() -> "list[list[int]]":
+    """Combine material and piece-square tables into signed cell values."""
+    table = [[0] * 64 for _ in range(13)]
+    for piece_id, pst in PIECE_SQUARE_TABLES.items():
+        for sq in range(64):
+            mirrored = (7 - (sq >> 3)) * 8 + (sq & 7)
+            table[piece_id + 6][sq] = PIECE_VALUES[piece_id] + pst[sq]
+            table[6 - piece_id][sq] = -(PIECE_VALUES[piece_id] + pst[mirrored])
+    return table
+
+
+SQUARE_VALUES = _square_values()
+"Score of every piece on every cell for white, indexed by `piece_id + 6`"
+
+
+def evaluate(game: "Game") -> int:
+    """
+    Evaluate a position.
+
+    Args:
+            game: an instance of the chess game
+    Return:
+            the score of the position in centipawns, positive when the
+            active player is ahead
+    """
+    board = game.board
+    score = 0
+    for cells in game.piece_lists.values():
+        for x, y in cells:
+            score += SQUARE_VALUES[board[y][x] + 6][y * 8 + x]
+    return score * game.player
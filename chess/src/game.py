@@ -7,16 +7,19 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from array import array
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional
 
 from typing_extensions import Self
 
-from .epd import X, Y, get_EPD, load_EPD
+from . import zobrist
+from .epd import X, Y, get_FEN, load_EPD, set_piece
 from .piece import notations
 
 if TYPE_CHECKING:
     from .epd import BoardT, CoordT, EPDString
     from .piece import PlayerT
+    from .store import GameStore
 
 DIR = Path(__file__).parent.joinpath("data")
 DIR.mkdir(exist_ok=True)
@@ -29,9 +32,8 @@ def create_board() -> BoardT:
     return [[0 for _ in range(8)] for _ in range(8)]
 
 
-@dataclass
-class Move:
-    """A linked list that holds the game's move history."""
+class Ply(NamedTuple):
+    """A move of the move history and the state needed to take it back."""
 
     player: int
     "player who made the move"
@@ -45,55 +47,237 @@ class Move:
     piece: int
     "piece that was moved"
 
-    log: 'list[str]'
-    "chess game logs at the time of the move"
-
-    epd: "EPDString"
-    "EPD hash of the game's state before the move"
+    promotion: int
+    "piece the pawn was promoted to, 0 if none"
+
+    captured: int
+    "piece that was captured, 0 if none"
+
+    en_passant_capture: bool
+    "the captured pawn was taken en passant"
+
+    castling: "tuple[int, int, int, int]"
+    "castling control before the move"
+
+    en_passant: Optional["CoordT"]
+    "en passant control before the move"
+
+    halfmove: int
+    "halfmove clock before the move"
+
+    log_size: int
+    "number of entries in the game logs before the move"
+
+    captured_size: int
+    "number of pieces the player had captured before the move"
+
+
+class History:
+    """
+    A flat move history.
+
+    Every ply is stored as a packed 16-bit move (origin, destination and
+    promotion) plus a few small integers, in parallel arrays, so the
+    history and its serialized form grow linearly with the game.
+    """
+
+    FIELDS = {
+        "moves": "H",
+        "pieces": "b",
+        "captures": "b",
+        "states": "H",
+        "halfmoves": "H",
+        "log_sizes": "L",
+        "captured_sizes": "H",
+    }
+    "typecode of the array holding every field"
+
+    def __init__(self):
+        self.moves = array("H")
+        "from cell | to cell << 6 | promotion << 12"
+
+        self.pieces = array("b")
+        "piece that was moved"
+
+        self.captures = array("b")
+        "piece that was captured"
+
+        self.states = array("H")
+        """castling rights (bits 0-3), en passant cell + 1 (bits 4-10),
+        black to move (bit 11) and en passant capture (bit 12)"""
+
+        self.halfmoves = array("H")
+        self.log_sizes = array("L")
+        self.captured_sizes = array("H")
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __getitem__(self, index: int) -> Ply:
+        move = self.moves[index]
+        state = self.states[index]
+        en_passant = (state >> 4 & 127) - 1
+        return Ply(
+            -1 if state & 1 << 11 else 1,
+            (move & 7, move >> 3 & 7),
+            (move >> 6 & 7, move >> 9 & 7),
+            self.pieces[index],
+            move >> 12 & 7,
+            self.captures[index],
+            bool(state & 1 << 12),
+            (state & 1, state >> 1 & 1, state >> 2 & 1, state >> 3 & 1),
+            None if en_passant < 0 else (en_passant & 7, en_passant >> 3),
+            self.halfmoves[index],
+            self.log_sizes[index],
+            self.captured_sizes[index],
+        )
 
-    captured: 'dict[int, list[int]]'
+    def __iter__(self) -> Iterator[Ply]:
+        return (self[i] for i in range(len(self)))
 
-    next: Optional[Move] = None
-    "next(previous) move"
+    def push(self, ply: Ply):
+        """Add a ply at the end of the history."""
+        (fx, fy), (tx, ty) = ply.from_loc, ply.to_loc
+        self.moves.append(
+            (fy * 8 + fx) | (ty * 8 + tx) << 6 | ply.promotion << 12
+        )
+        self.pieces.append(ply.piece)
+        self.captures.append(ply.captured)
+        state = sum(bool(right) << i for i, right in enumerate(ply.castling))
+        if ply.en_passant is not None:
+            state |= (ply.en_passant[1] * 8 + ply.en_passant[0] + 1) << 4
+        if ply.player == -1:
+            state |= 1 << 11
+        if ply.en_passant_capture:
+            state |= 1 << 12
+        self.states.append(state)
+        self.halfmoves.append(min(ply.halfmove, 0xFFFF))
+        self.log_sizes.append(ply.log_size)
+        self.captured_sizes.append(ply.captured_size)
+
+    def pop(self) -> Ply:
+        """Remove the last ply of the history and return it."""
+        ply = self[-1]
+        for name in self.FIELDS:
+            getattr(self, name).pop()
+        return ply
+
+    def set_promotion(self, promotion: int):
+        """Record what the pawn of the last ply was promoted to."""
+        self.moves[-1] = self.moves[-1] & 0xFFF | promotion << 12
 
     def serialize(self) -> dict:
         """
-        Serialize the move into a dictionary.
+        Serialize the history into a dictionary of flat lists.
 
         Returns:
-                dict: The serialized move.
+                dict: The serialized history.
         """
-        return {
-            "player": self.player,
-            "from_loc": self.from_loc,
-            "to_loc": self.to_loc,
-            "piece": self.piece,
-            "log": self.log[:],
-            "epd": self.epd,
-            "captured": [self.captured[1][:], self.captured[-1][:]],
-            "next": self.next.serialize() if self.next else None,
-        }
+        return {name: getattr(self, name).tolist() for name in self.FIELDS}
 
     @classmethod
-    def deserialize(cls, data: dict) -> Move:
+    def deserialize(cls, data: dict) -> History:
         """
-        Deserialize a move from a dictionary.
+        Deserialize a history from a dictionary.
 
         Args:
-                data (dict): The serialized move.
+                data (dict): The serialized history.
         Returns:
-                Move: The deserialized move.
+                History: The deserialized history.
         """
-        return cls(
-            player=data["player"],
-            from_loc=data["from_loc"],
-            to_loc=data["to_loc"],
-            piece=data["piece"],
-            log=data["log"],
-            epd=data["epd"],
-            captured={1: data["captured"][0], -1: data["captured"][1]},
-            next=cls.deserialize(data["next"]) if data["next"] else None,
-        )
+        new = cls()
+        for name, typecode in cls.FIELDS.items():
+            setattr(new, name, array(typecode, data[name]))
+        return new
+
+    @classmethod
+    def from_nested(cls, data: Optional[dict], game: Game) -> History:
+        """
+        Build a history from the nested move list of older saves.
+
+        Older saves stored every move with a snapshot of the position,
+        logs and captured pieces before it, and a link to the move before.
+
+        Args:
+                data (dict): The serialized last move of the old format.
+                game (Game): The game the history belongs to, as loaded.
+        Returns:
+                History: The equivalent history.
+        """
+        nodes = []
+        while data is not None:
+            nodes.append(data)
+            data = data["next"]
+        nodes.reverse()
+        new = cls()
+        positions = []
+        for node in nodes:
+            position = Game(node["epd"])
+            load_EPD(position, node["epd"])
+            positions.append(position)
+        # the position after every move, the last one being the game's
+        for i, node in enumerate(nodes):
+            before = positions[i]
+            after = positions[i + 1] if i + 1 < len(nodes) else game
+            player = node["player"]
+            fx, fy = node["from_loc"]
+            tx, ty = node["to_loc"]
+            piece = node["piece"]
+            en_passant_capture = (tx, ty) == before.en_passant and abs(
+                piece
+            ) == 1
+            if en_passant_capture:
+                captured = before.board[ty + player][tx]
+            else:
+                captured = before.board[ty][tx]
+            promotion = 0
+            if abs(piece) == 1 and abs(after.board[ty][tx]) != 1:
+                promotion = abs(after.board[ty][tx])
+            new.push(
+                Ply(
+                    player,
+                    (fx, fy),
+                    (tx, ty),
+                    piece,
+                    promotion,
+                    captured,
+                    en_passant_capture,
+                    tuple(before.castling),  # type: ignore
+                    before.en_passant,
+                    0,
+                    len(node["log"]),
+                    len(node["captured"][0 if player == 1 else 1]),
+                )
+            )
+        return new
+
+
+class MoveRecord(NamedTuple):
+    """The changes needed to take back a move made with `Chess.make_move`."""
+
+    from_loc: "CoordT"
+    "move origin"
+
+    to_loc: "CoordT"
+    "move destination"
+
+    piece: int
+    "piece that was moved, before any promotion"
+
+    captured: int
+    "piece that was captured, 0 if none"
+
+    castling: "tuple[int, int, int, int]"
+    "castling control before the move"
+
+    en_passant: Optional["CoordT"]
+    "en passant control before the move"
+
+    halfmove: int
+    "halfmove clock before the move"
+
+    board_key: int
+    "zobrist key of the board before the move"
 
 
 @dataclass
@@ -114,18 +298,39 @@ class Game:
     en_passant: Optional[CoordT] = None
     "En passant control"
 
-    epd_hash: 'dict["EPDString", int]' = field(default_factory=dict)
-    "A table that keeps track of all EPD hashes of the game"
+    key_stack: 'list[int]' = field(default_factory=list)
+    "zobrist keys of the positions reached, the current one last, pushed and popped with every move"
 
     log: 'list[str]' = field(default_factory=list)
     "chess game logs"
 
-    last_move: Optional[Move] = None
-    "last move made"
+    history: History = field(default_factory=History)
+    "moves made with `Chess.move`, for `undo_move`"
 
     captured: 'dict[int, list[int]]' = field(default_factory=lambda: {1: [], -1: []})
     "captured pieces"
 
+    halfmove: int = 0
+    "number of halfmoves since the last capture or pawn move"
+
+    fullmove: int = 1
+    "number of the full move, starting at 1 and incremented after black's move"
+
+    undo_stack: 'list[MoveRecord]' = field(default_factory=list)
+    "records of the moves made with `Chess.make_move`"
+
+    board_key: int = 0
+    "zobrist key of the pieces on the board, kept up to date on every change"
+
+    piece_lists: 'dict[int, list[CoordT]]' = field(default_factory=lambda: {1: [], -1: []})
+    "coordinates of the pieces of each player, kept up to date on every change"
+
+    kings: 'dict[int, Optional[CoordT]]' = field(default_factory=lambda: {1: None, -1: None})
+    "coordinates of the king of each player"
+
+    epd_operations: 'dict[str, str]' = field(default_factory=dict)
+    "operations of the last EPD loaded (bm, am, id, acd, ce...), by opcode"
+
     x = X
     "X-axis"
 
@@ -148,29 +353,101 @@ class Game:
             raise ValueError("Invalid player color.")
         self._p_move = value
 
+    @property
+    def zobrist_key(self) -> int:
+        """Return the zobrist key of the current position."""
+        key = (
+            self.board_key
+            ^ zobrist.CASTLING[zobrist.castling_index(self.castling)]
+        )
+        if self.en_passant is not None:
+            key ^= zobrist.EN_PASSANT[self.en_passant[0]]
+        if self.player == -1:
+            key ^= zobrist.SIDE
+        return key
+
+    def repetitions(self) -> int:
+        """
+        Count how many times the current position was reached.
+
+        Only positions since the last capture or pawn move can repeat the
+        current one, so the key stack is scanned back by the halfmove clock
+        and no further, every other ply.
+
+        Returns:
+                int: The number of times the position was reached, the
+                current time included.
+        """
+        keys = self.key_stack
+        last = len(keys) - 1
+        key = keys[last]
+        count = 1
+        for i in range(last - 2, max(last - self.halfmove, 0) - 1, -2):
+            if keys[i] == key:
+                count += 1
+        return count
+
+    @property
+    def last_move(self) -> Optional[Ply]:
+        """Return the last move of the move history, None if there is none."""
+        return self.history[-1] if len(self.history) else None
+
     def add_move_history(
         self, curr_pos: "CoordT", new_pos: "CoordT", piece: int
     ):
-        """Add a move to the move history."""
-        self.last_move = Move(
-            self.player,
-            curr_pos,
-            new_pos,
-            piece,
-            self.log[:],
-            get_EPD(self),
-            {1: self.captured[1][:], -1: self.captured[-1][:]},
-            self.last_move,
+        """Add a move to the move history, before it is made."""
+        en_passant_capture = new_pos == self.en_passant and abs(piece) == 1
+        if en_passant_capture:
+            captured = self.board[new_pos[1] + self.player][new_pos[0]]
+        else:
+            captured = self.board[new_pos[1]][new_pos[0]]
+        self.history.push(
+            Ply(
+                self.player,
+                curr_pos,
+                new_pos,
+                piece,
+                0,
+                captured,
+                en_passant_capture,
+                tuple(self.castling),  # type: ignore
+                self.en_passant,
+                self.halfmove,
+                len(self.log),
+                len(self.captured[self.player]),
+            )
         )
 
     def undo_move(self):
         """Undo the last move."""
-        if self.last_move is None:
+        if not len(self.history):
             return False
-        load_EPD(self, self.last_move.epd)
-        self.captured = self.last_move.captured
-        self.log = self.last_move.log
-        self.last_move = self.last_move.next
+        ply = self.history.pop()
+        (fx, fy), (tx, ty) = ply.from_loc, ply.to_loc
+        set_piece(self, (fx, fy), ply.piece)
+        if ply.en_passant_capture:
+            set_piece(self, (tx, ty), 0)
+            set_piece(self, (tx, ty + ply.player), ply.captured)
+        else:
+            set_piece(self, (tx, ty), ply.captured)
+        if abs(ply.piece) == 6 and tx - fx == 2:
+            set_piece(self, (tx - 1, ty), 0)
+            set_piece(self, (tx + 1, ty), 4 * ply.player)
+        elif abs(ply.piece) == 6 and tx - fx == -2:
+            set_piece(self, (tx + 1, ty), 0)
+            set_piece(self, (tx - 2, ty), 4 * ply.player)
+        self.player = ply.player  # type: ignore
+        self.castling[:] = ply.castling
+        self.en_passant = ply.en_passant
+        self.halfmove = ply.halfmove
+        if ply.player == -1:
+            self.fullmove -= 1
+        self.key_stack.pop()
+        if not self.key_stack:
+            # older saves don't hold the keys of the positions before
+            self.key_stack.append(self.zobrist_key)
+        del self.log[ply.log_size :]
+        del self.captured[ply.player][ply.captured_size :]
         return True
 
     def log_move(
@@ -217,12 +494,10 @@ class Game:
             "initial_pos": self.initial_pos,
             "players": self.players[:],
             "captured": [self.captured[1][:], self.captured[-1][:]],
-            "epd_hash": self.epd_hash.copy(),
-            "epd": get_EPD(self),
+            "key_stack": self.key_stack[:],
+            "epd": get_FEN(self),
             "log": self.log[:],
-            "last_move": self.last_move.serialize()
-            if self.last_move
-            else None,
+            "history": self.history.serialize(),
         }
 
     @classmethod
@@ -237,16 +512,22 @@ class Game:
         """
         new = cls(data["epd"])
         new.players = data["players"]
-        new.epd_hash = data["epd_hash"]
+        if "key_stack" in data:
+            new.key_stack = data["key_stack"]
         new.captured = {
             1: data["captured"][0],
             -1: data["captured"][1]
         }
         new.initial_pos = data["initial_pos"]
         new.log = data["log"]
-        new.last_move = (
-            Move.deserialize(data["last_move"]) if data["last_move"] else None
-        )
+        if "history" in data:
+            new.history = History.deserialize(data["history"])
+        else:
+            # older saves hold a nested list of moves
+            new.history = History.from_nested(data.get("last_move"), new)
+        if len(data["epd"].split()) < 6:
+            # older saves don't hold the move counters
+            new.fullmove += sum(1 for ply in new.history if ply.player == -1)
         return new
 
     def save(self):
@@ -260,6 +541,41 @@ class Game:
         with open(file, "r") as f:
             return cls.deserialize(json.load(f))
 
+    def save_by_id(self, game_id: int, store: "Optional[GameStore]" = None):
+        """
+        Save the game to a binary game store.
+
+        Args:
+                game_id (int): The ID to save the game under.
+                store (GameStore): The store, defaults to the one in the
+                        data directory.
+        """
+        from .store import default_store
+
+        if store is None:
+            store = default_store()
+        store.save(game_id, self)
+
+    @classmethod
+    def load_by_id(
+        cls, game_id: int, store: "Optional[GameStore]" = None
+    ) -> Self:
+        """
+        Load a game from a binary game store.
+
+        Args:
+                game_id (int): The ID the game was saved under.
+                store (GameStore): The store, defaults to the one in the
+                        data directory.
+        Returns:
+                Game: The saved game.
+        """
+        from .store import default_store
+
+        if store is None:
+            store = default_store()
+        return store.load(game_id, cls)
+
     def copy(self) -> Self:
         """Return a copy of the game."""
         return self.deserialize(self.serialize())
@@ -0,0 +1,224 @@
+"""
+10x12 mailbox board.
+
+The 64 cells of the board are stored in a single flat array of 120 cells
+with two rows of sentinel cells above and below the board and one column
+on each side of it:
+
+    OFF OFF OFF OFF OFF OFF OFF OFF OFF OFF
+    OFF OFF OFF OFF OFF OFF OFF OFF OFF OFF
+    OFF a8  b8  c8  d8  e8  f8  g8  h8  OFF
+    ...
+    OFF a1  b1  c1  d1  e1  f1  g1  h1  OFF
+    OFF OFF OFF OFF OFF OFF OFF OFF OFF OFF
+    OFF OFF OFF OFF OFF OFF OFF OFF OFF OFF
+
+A move is a fixed offset in the array (one row up is -10, a knight's jump
+is one of ±8, ±12, ±19, ±21) and any step off the board lands on a
+sentinel, so move generation needs a single test instead of bounds checks
+on both axes. Copying the board is a single buffer copy.
+
+`Mailbox` still supports `board[y][x]` through row views, so code written
+for the 8x8 list board keeps working with it.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from .epd import BoardT, CoordT
+    from .game import Game
+    from .piece import PlayerT
+
+
+OFF = 7
+"Value of the sentinel cells around the board"
+
+INDEXES = [21 + y * 10 + x for y in range(8) for x in range(8)]
+"Mailbox index of every cell, in board order"
+
+COORDS: "list[Optional[CoordT]]" = [None] * 120
+"Coordinates of every mailbox index, None for sentinel cells"
+for _i, _index in enumerate(INDEXES):
+    COORDS[_index] = (_i & 7, _i >> 3)
+
+KNIGHT_STEPS = (-21, -19, -12, -8, 8, 12, 19, 21)
+KING_STEPS = (-11, -10, -9, -1, 1, 9, 10, 11)
+BISHOP_STEPS = (-11, -9, 9, 11)
+ROOK_STEPS = (-10, -1, 1, 10)
+QUEEN_STEPS = BISHOP_STEPS + ROOK_STEPS
+
+
+def to_index(coord: "CoordT") -> int:
+    """Convert board coordinates to a mailbox index."""
+    return 21 + coord[1] * 10 + coord[0]
+
+
+class _Row:
+    """A view of a row of a mailbox, so that `board[y][x]` keeps working."""
+
+    __slots__ = ("cells", "start")
+
+    def __init__(self, cells: array, start: int):
+        self.cells = cells
+        self.start = start
+
+    def __getitem__(self, x: int) -> int:
+        if not -8 <= x <= 7:
+            raise IndexError("row index out of range")
+        return self.cells[self.start + x % 8]
+
+    def __setitem__(self, x: int, piece_id: int):
+        if not -8 <= x <= 7:
+            raise IndexError("row index out of range")
+        self.cells[self.start + x % 8] = piece_id
+
+    def __len__(self) -> int:
+        return 8
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cells[self.start : self.start + 8])
+
+    def __contains__(self, piece_id: int) -> bool:
+        return piece_id in self.cells[self.start : self.start + 8]
+
+    def index(self, piece_id: int) -> int:
+        return self.cells[self.start : self.start + 8].index(piece_id)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class Mailbox:
+    """A chess board stored as a flat 10x12 array."""
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: Optional[array] = None):
+        if cells is None:
+            cells = array("b", [OFF] * 120)
+            for index in INDEXES:
+                cells[index] = 0
+        self.cells = cells
+        "the 120 cells of the mailbox"
+
+    @classmethod
+    def from_board(cls, board: "BoardT | Mailbox") -> Mailbox:
+        """
+        Build a mailbox from an 8x8 board.
+
+        Args:
+                board: an 8x8 chess board
+        Return:
+                a mailbox holding the same pieces
+        """
+        new = cls()
+        for y, row in enumerate(board):
+            new.cells[21 + y * 10 : 29 + y * 10] = array("b", row)
+        return new
+
+    def to_board(self) -> "BoardT":
+        """Return the pieces of the mailbox as an 8x8 board."""
+        return [list(row) for row in self]
+
+    def copy(self) -> Mailbox:
+        """Return a copy of the board."""
+        return Mailbox(self.cells[:])
+
+    def __getitem__(self, y: int) -> _Row:
+        if not -8 <= y <= 7:
+            raise IndexError("board index out of range")
+        return _Row(self.cells, 21 + y % 8 * 10)
+
+    def __len__(self) -> int:
+        return 8
+
+    def __iter__(self) -> "Iterator[_Row]":
+        cells = self.cells
+        return (_Row(cells, 21 + y * 10) for y in range(8))
+
+    def __eq__(self, other) -> bool:
+        return [list(row) for row in self] == [list(row) for row in other]
+
+    def __repr__(self) -> str:
+        return f"Mailbox({self.to_board()!r})"
+
+
+def get_all_moves(game: "Game") -> "dict[CoordT, list[CoordT]]":
+    """
+    Generate the moves of the active player on a mailbox board.
+
+    This mirrors `Piece.moves` for every piece in the active player's
+    piece list and returns the same mapping as `Chess.get_all_moves`.
+
+    Args:
+            game: an instance of the chess game whose board is a `Mailbox`
+    Return:
+            a dictionary mapping the coordinates of each piece of the
+            active player to the coordinates it can move to
+    """
+    cells: array = game.board.cells  # type: ignore
+    player: "PlayerT" = game.player
+    forward = -10 * player
+    pawn_home = 6 if player == 1 else 1
+    king_home = 95 if player == 1 else 25
+    castling = game.castling
+    right = 0 if player == 1 else 2
+    if game.en_passant is not None:
+        en_passant = to_index(game.en_passant)
+    else:
+        en_passant = -1
+
+    moves: "dict[CoordT, list[CoordT]]" = {}
+    for x, y in game.piece_lists[player]:
+        index = 21 + y * 10 + x
+        kind = cells[index] * player
+        result = []
+        if kind == 1:
+            to = index + forward
+            if cells[to] == 0:
+                result.append(COORDS[to])
+                home = (index - 21) // 10 == pawn_home
+                if home and not cells[to + forward]:
+                    result.append(COORDS[to + forward])
+            for to in (index + forward - 1, index + forward + 1):
+                target = cells[to]
+                if target != OFF and target * player < 0 or to == en_passant:
+                    result.append(COORDS[to])
+        elif kind == 2 or kind == 6:
+            for step in KNIGHT_STEPS if kind == 2 else KING_STEPS:
+                target = cells[index + step]
+                if target != OFF and target * player <= 0:
+                    result.append(COORDS[index + step])
+            if kind == 6 and index == king_home:
+                if castling[right] and not (
+                    cells[index + 1] or cells[index + 2]
+                ):
+                    result.append(COORDS[index + 2])
+                if castling[right + 1] and not (
+                    cells[index - 1] or cells[index - 2]
+                ):
+                    result.append(COORDS[index - 2])
+        else:
+            if kind == 3:
+                steps = BISHOP_STEPS
+            elif kind == 4:
+                steps = ROOK_STEPS
+            else:
+                steps = QUEEN_STEPS
+            for step in steps:
+                to = index + step
+                target = cells[to]
+                while target == 0:
+                    result.append(COORDS[to])
+                    to += step
+                    target = cells[to]
+                if target != OFF and target * player < 0:
+                    result.append(COORDS[to])
+        moves[COORDS[index]] = result  # type: ignore
+    return moves
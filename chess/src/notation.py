@@ -0,0 +1,298 @@
+"""
+Move notation.
+
+Moves are read and written in two notations:
+
+- Standard Algebraic Notation (SAN), used by PGN files and the game log,
+  e.g. "Nbd7", "exd6", "e8=Q+", "O-O-O".
+- UCI long algebraic notation, used by engines, e.g. "g1f3", "e7e8q".
+
+Every function works against the legal moves of the position, which are
+taken from `Chess.get_state` and so are only generated once per position
+no matter how many moves are read or written from it.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Optional
+
+from .epd import X, Y
+from .piece import notations
+
+if TYPE_CHECKING:
+    from .chess import Chess, MoveT
+    from .epd import CoordT
+
+SQUARES: "dict[str, CoordT]" = {
+    x + y: (X.index(x), Y.index(y)) for x in X for y in Y
+}
+"Coordinates of every square by name"
+
+NAMES: "dict[CoordT, str]" = {coords: name for name, coords in SQUARES.items()}
+"Name of every square by coordinates"
+
+LETTERS: "dict[int, str]" = {
+    kind: notations.get_char(kind, True) for kind in range(2, 7)
+}
+"SAN letter of every piece but the pawn"
+
+PROMOTIONS: "dict[str, int]" = {
+    **{notations.get_char(kind): kind for kind in range(2, 6)},
+    **{notations.get_char(kind, True): kind for kind in range(2, 6)},
+}
+"Piece a pawn is promoted to by letter, in either case"
+
+CASTLING = {"O-O": 2, "0-0": 2, "O-O-O": -2, "0-0-0": -2}
+"Castling moves by the file step of the king"
+
+_SAN = re.compile(
+    r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQnbrq]))?$"
+)
+
+
+def _reaches(kind: int, start: CoordT, end: CoordT) -> bool:
+    """
+    Check whether a piece could move between two squares on an empty board.
+
+    Used to rule out most other pieces before looking at the legal moves.
+    """
+    dx, dy = abs(end[0] - start[0]), abs(end[1] - start[1])
+    if kind == 2:
+        return dx * dy == 2
+    if kind == 3:
+        return dx == dy
+    if kind == 4:
+        return dx == 0 or dy == 0
+    if kind == 5:
+        return dx == dy or dx == 0 or dy == 0
+    return True
+
+
+def disambiguation(
+    game: Chess,
+    start: CoordT,
+    end: CoordT,
+    legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None,
+) -> str:
+    """
+    Return what a SAN move needs after the piece letter to tell it apart
+    from moves of the same kind of piece to the same square.
+
+    Args:
+            game: the position the move is played from
+            start: the origin of the move
+            end: the destination of the move
+            legal_moves: the legal moves of the position, looked up if None
+    Return:
+            the file, rank or square of the origin, or an empty string if
+            no other piece of the same kind can move to the destination
+    """
+    board = game.board
+    piece = board[start[1]][start[0]]
+    kind = abs(piece)
+    if kind in (1, 6):
+        return ""
+    side = 1 if piece > 0 else -1
+    rivals = [
+        cell
+        for cell in game.piece_lists[side]
+        if cell != start
+        and board[cell[1]][cell[0]] == piece
+        and _reaches(kind, cell, end)
+    ]
+    if not rivals:
+        return ""
+    if legal_moves is None:
+        legal_moves = game.get_state().legal_moves
+    rivals = [cell for cell in rivals if end in legal_moves.get(cell, ())]
+    if not rivals:
+        return ""
+    if all(cell[0] != start[0] for cell in rivals):
+        return X[start[0]]
+    if all(cell[1] != start[1] for cell in rivals):
+        return Y[start[1]]
+    return NAMES[start]
+
+
+def san(
+    game: Chess,
+    move: MoveT,
+    legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None,
+    suffix: bool = True,
+) -> str:
+    """
+    Write a legal move in Standard Algebraic Notation.
+
+    Args:
+            game: the position the move is played from
+            move: the move as a (from, to, promotion) tuple
+            legal_moves: the legal moves of the position, looked up if None
+            suffix: add "+" or "#" if the move gives check or checkmate,
+                    which means making the move
+    Return:
+            the move in SAN
+    """
+    (fx, fy), (tx, ty), promotion = move
+    piece = game.board[fy][fx]
+    kind = abs(piece)
+    if kind == 6 and tx - fx in (2, -2):
+        text = "O-O" if tx > fx else "O-O-O"
+    else:
+        capture = bool(game.board[ty][tx]) or (
+            kind == 1 and (tx, ty) == game.en_passant
+        )
+        if kind == 1:
+            text = X[fx] if capture else ""
+        else:
+            text = LETTERS[kind] + disambiguation(
+                game, (fx, fy), (tx, ty), legal_moves
+            )
+        if capture:
+            text += "x"
+        text += NAMES[(tx, ty)]
+        if promotion:
+            text += "=" + LETTERS[promotion]
+    if suffix:
+        game.make_move(*move)
+        state = game.get_state()
+        game.unmake_move()
+        if state.checkmate:
+            text += "#"
+        elif state.check:
+            text += "+"
+    return text
+
+
+def parse_san(
+    game: Chess,
+    text: str,
+    legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None,
+) -> MoveT:
+    """
+    Read a move written in Standard Algebraic Notation.
+
+    Args:
+            game: the position the move is played from
+            text: the move in SAN
+            legal_moves: the legal moves of the position, looked up if None
+    Return:
+            the move as a (from, to, promotion) tuple
+    Raises:
+            ValueError: if the move is illegal, ambiguous or malformed
+    """
+    if legal_moves is None:
+        legal_moves = game.get_state().legal_moves
+    board = game.board
+    plain = text.rstrip("+#!?")
+    step = CASTLING.get(plain)
+    if step is not None:
+        king = game.kings[game.player]
+        if king is not None:
+            end = (king[0] + step, king[1])
+            if end in legal_moves.get(king, ()):
+                return king, end, 0
+        raise ValueError(f"Illegal move {text!r}.")
+    match = _SAN.match(plain)
+    if match is None:
+        raise ValueError(f"Invalid move {text!r}.")
+    letter, file, rank, _, target, promotion = match.groups()
+    piece = (notations.get_id(letter) if letter else 1) * game.player
+    end = SQUARES[target]
+    fx = X.index(file) if file else None
+    fy = Y.index(rank) if rank else None
+    found = [
+        start
+        for start, ends in legal_moves.items()
+        if end in ends
+        and board[start[1]][start[0]] == piece
+        and (fx is None or start[0] == fx)
+        and (fy is None or start[1] == fy)
+    ]
+    if not found:
+        raise ValueError(f"Illegal move {text!r}.")
+    if len(found) > 1:
+        raise ValueError(f"Ambiguous move {text!r}.")
+    promoted = PROMOTIONS[promotion] if promotion else 0
+    if (abs(piece) == 1 and end[1] in (0, 7)) != bool(promoted):
+        raise ValueError(f"Illegal move {text!r}.")
+    return found[0], end, promoted
+
+
+def uci(move: MoveT) -> str:
+    """
+    Write a move in UCI long algebraic notation.
+
+    Args:
+            move: the move as a (from, to, promotion) tuple
+    Return:
+            the origin and destination squares, followed by the lowercase
+            letter of the promotion piece if any, e.g. "e7e8q"
+    """
+    start, end, promotion = move
+    text = NAMES[start] + NAMES[end]
+    if promotion:
+        text += notations.get_char(promotion)
+    return text
+
+
+def parse_uci(
+    game: Chess,
+    text: str,
+    legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None,
+) -> MoveT:
+    """
+    Read a move written in UCI long algebraic notation.
+
+    Args:
+            game: the position the move is played from
+            text: the move in UCI notation, e.g. "g1f3" or "e7e8q"
+            legal_moves: the legal moves of the position, looked up if None
+    Return:
+            the move as a (from, to, promotion) tuple
+    Raises:
+            ValueError: if the move is illegal or malformed
+    """
+    start = SQUARES.get(text[:2])
+    end = SQUARES.get(text[2:4])
+    promotion = text[4:]
+    if (
+        start is None
+        or end is None
+        or len(promotion) > 1
+        or (promotion and promotion not in PROMOTIONS)
+    ):
+        raise ValueError(f"Invalid move {text!r}.")
+    if legal_moves is None:
+        legal_moves = game.get_state().legal_moves
+    promoted = PROMOTIONS[promotion] if promotion else 0
+    last_rank = (
+        abs(game.board[start[1]][start[0]]) == 1 and end[1] in (0, 7)
+    )
+    if end not in legal_moves.get(start, ()) or last_rank != bool(promoted):
+        raise ValueError(f"Illegal move {text!r}.")
+    return start, end, promoted
+
+
+def parse_move(
+    game: Chess,
+    text: str,
+    legal_moves: "Optional[dict[CoordT, list[CoordT]]]" = None,
+) -> MoveT:
+    """
+    Read a move written in either UCI notation or SAN.
+
+    Args:
+            game: the position the move is played from
+            text: the move
+            legal_moves: the legal moves of the position, looked up if None
+    Return:
+            the move as a (from, to, promotion) tuple
+    Raises:
+            ValueError: if the move is illegal, ambiguous or malformed
+    """
+    if legal_moves is None:
+        legal_moves = game.get_state().legal_moves
+    if 4 <= len(text) <= 5 and text[:2] in SQUARES and text[2:4] in SQUARES:
+        return parse_uci(game, text, legal_moves)
+    return parse_san(game, text, legal_moves)
@@ -0,0 +1,116 @@
+"""
+Move generation benchmark.
+
+Runs perft on a set of well known positions, checks the node counts
+against their published totals and reports how fast moves are generated.
+
+Run it from the `chess` directory with...
+
+`python -m src.perft [--depth N] [--backend mailbox|bitboard|board]`
+"""
+
+import argparse
+import time
+
+from rich import print as rprint
+from rich.table import Table
+
+from .chess import BACKENDS, Chess
+from .epd import EPDString, load_EPD
+
+POSITIONS: "list[tuple[str, EPDString, tuple[int, ...]]]" = [
+    (
+        "start position",
+        EPDString("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -"),
+        (20, 400, 8902, 197281, 4865609),
+    ),
+    (
+        "kiwipete",
+        EPDString(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -"
+        ),
+        (48, 2039, 97862, 4085603),
+    ),
+    (
+        "en passant endgame",
+        EPDString("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -"),
+        (14, 191, 2812, 43238, 674624),
+    ),
+    (
+        "promotions",
+        EPDString(
+            "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq -"
+        ),
+        (6, 264, 9467, 422333),
+    ),
+    (
+        "promotion by capture",
+        EPDString("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ -"),
+        (44, 1486, 62379, 2103487),
+    ),
+]
+"(name, EPD, perft counts from depth 1) of the benchmark positions"
+
+
+def run(depth: int, backend: str = "board") -> bool:
+    """
+    Run perft on every benchmark position and print a report.
+
+    Args:
+            depth: the perft depth, capped at the deepest known count
+            backend: the move generation backend to benchmark
+    Return:
+            True if every node count matched its published total
+    """
+    game = Chess(backend=backend)  # type: ignore
+    table = Table(title=f"perft ({backend})")
+    for column in ("position", "depth", "nodes", "expected", "time", "nps"):
+        table.add_column(column, justify="right")
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, epd, counts in POSITIONS:
+        load_EPD(game, epd)
+        d = min(depth, len(counts))
+        start = time.perf_counter()
+        nodes = game.perft(d)
+        elapsed = time.perf_counter() - start
+        total_nodes += nodes
+        total_time += elapsed
+        ok = nodes == counts[d - 1]
+        passed = passed and ok
+        table.add_row(
+            name,
+            str(d),
+            f"[{'green' if ok else 'red'}]{nodes}",
+            str(counts[d - 1]),
+            f"{elapsed:.2f}s",
+            f"{nodes / elapsed:,.0f}" if elapsed else "-",
+        )
+    table.add_row(
+        "total",
+        "",
+        str(total_nodes),
+        "",
+        f"{total_time:.2f}s",
+        f"{total_nodes / total_time:,.0f}" if total_time else "-",
+    )
+    rprint(table)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chess move generation benchmark"
+    )
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument(
+        "-b", "--backend", choices=BACKENDS, default="mailbox"
+    )
+    args = parser.parse_args()
+    if not run(args.depth, args.backend):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
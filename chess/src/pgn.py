@@ -0,0 +1,322 @@
+"""
+Portable Game Notation
+
+PGN is the standard text format for recording chess games. A PGN file
+holds any number of games, each made of a tag section followed by the
+moves in Standard Algebraic Notation (SAN):
+
+    [Event "Casual game"]
+    [White "Alice"]
+    [Black "Bob"]
+    [Result "1-0"]
+
+    1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+Files are read line by line and games are yielded one at a time, so only
+the game being parsed is held in memory no matter how big the file is.
+Comments, variations and numeric annotation glyphs are skipped.
+"""
+
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (TYPE_CHECKING, Iterable, Iterator, Optional, TextIO,
+                    Union)
+
+from .chess import EPD, Chess
+from .epd import EPDString, get_FEN, load_EPD
+from .notation import parse_san, san
+
+if TYPE_CHECKING:
+    from .chess import BackendT, MoveT
+
+SourceT = Union[str, Path, TextIO]
+"A path to a PGN file or an open text file"
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+"Game termination markers"
+
+SEVEN_TAG_ROSTER = (
+    "Event", "Site", "Date", "Round", "White", "Black", "Result"
+)
+"Tags written first, in this order, by `write_game`"
+
+_TAG = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]\s*$')
+_TOKEN = re.compile(r"\{|;|\(|\)|\$\d+|[^\s{}();]+")
+_MOVE_NUMBER = re.compile(r"^\d+\.*")
+
+
+@dataclass
+class PGNGame:
+    """A game read from a PGN file."""
+
+    headers: "dict[str, str]" = field(default_factory=dict)
+    "tag pairs, in the order they were read"
+
+    moves: "list[str]" = field(default_factory=list)
+    "moves in Standard Algebraic Notation"
+
+    result: str = "*"
+    "game termination marker"
+
+    @property
+    def start(self) -> EPDString:
+        """Return the starting position of the game."""
+        fen = self.headers.get("FEN")
+        if fen is None:
+            return EPD
+        return EPDString(" ".join(fen.split()[:4]))
+
+    def replay(self, backend: "Optional[BackendT]" = None) -> Chess:
+        """
+        Play the moves of the game on a new board, validating every one.
+
+        Args:
+                backend: the move generation backend of the new game
+        Return:
+                the game after the last move
+        Raises:
+                ValueError: if the starting position or a move is invalid
+        """
+        game = Chess(backend=backend)
+        if not load_EPD(game, EPDString(self.headers.get("FEN", EPD))):
+            raise ValueError(f"Invalid starting position {self.start!r}.")
+        game.initial_pos = self.start
+        game.players = [
+            self.headers.get("White", "White"),
+            self.headers.get("Black", "Black"),
+        ]
+        for ply, text in enumerate(self.moves):
+            try:
+                game.make_move(*parse_san(game, text))
+            except ValueError as error:
+                raise ValueError(f"Ply {ply + 1}: {error}") from None
+        return game
+
+
+@contextmanager
+def _open(source: SourceT, mode: str):
+    """Open a path, or pass an already open file through untouched."""
+    if isinstance(source, (str, Path)):
+        with open(source, mode, encoding="utf-8", errors="replace") as file:
+            yield file
+    else:
+        yield source
+
+
+def read_games(source: SourceT) -> Iterator[PGNGame]:
+    """
+    Read the games of a PGN file, one at a time.
+
+    Args:
+            source: a path to a PGN file or an open text file
+    Return:
+            an iterator over the games of the file, in order
+    """
+    with _open(source, "r") as file:
+        game = PGNGame()
+        started = False
+        comment = False
+        depth = 0
+        for line in file:
+            if comment:
+                end = line.find("}")
+                if end < 0:
+                    continue
+                comment = False
+                line = line[end + 1 :]
+            elif line.startswith("%"):
+                continue
+            if depth == 0:
+                tag = _TAG.match(line.strip())
+                if tag is not None:
+                    if game.moves:  # a game without a result ended
+                        yield game
+                        game = PGNGame()
+                    game.headers[tag[1]] = tag[2].replace('\\"', '"')
+                    started = True
+                    continue
+            pos = 0
+            while True:
+                token = _TOKEN.search(line, pos)
+                if token is None:
+                    break
+                pos = token.end()
+                text = token[0]
+                if text == "{":
+                    end = line.find("}", pos)
+                    if end < 0:
+                        comment = True
+                        break
+                    pos = end + 1
+                elif text == ";":
+                    break
+                elif text == "(":
+                    depth += 1
+                elif text == ")":
+                    depth = max(depth - 1, 0)
+                elif depth or text.startswith("$"):
+                    continue
+                elif text in RESULTS:
+                    game.result = text
+                    yield game
+                    game = PGNGame()
+                    started = False
+                else:
+                    text = _MOVE_NUMBER.sub("", text)
+                    if text:
+                        game.moves.append(text)
+                        started = True
+        if started:
+            yield game
+
+
+def load_games(
+    source: SourceT, backend: "Optional[BackendT]" = None
+) -> Iterator[Chess]:
+    """
+    Read the games of a PGN file and replay each one on a board.
+
+    Args:
+            source: a path to a PGN file or an open text file
+            backend: the move generation backend of the games
+    Return:
+            an iterator over the games of the file, after their last move
+    Raises:
+            ValueError: if a game holds an illegal move
+    """
+    for game in read_games(source):
+        yield game.replay(backend)
+
+
+def get_moves(game: Chess) -> "tuple[EPDString, list[MoveT]]":
+    """
+    Get the moves played in a game.
+
+    Moves made with `Chess.move` are read from the game's move history,
+    and moves made with `Chess.make_move` from its undo stack. The game
+    is left as it was.
+
+    Args:
+            game: an instance of the chess game
+    Return:
+            the starting position of the moves, as a FEN, and the moves,
+            in order
+    """
+    # the moves on the undo stack are taken back to find what each pawn
+    # was promoted to, then made again
+    stacked: "list[MoveT]" = []
+    while game.undo_stack:
+        record = game.undo_stack[-1]
+        (tx, ty) = record.to_loc
+        promotion = 0
+        if abs(record.piece) == 1 and ty in (0, 7):
+            promotion = abs(game.board[ty][tx])
+        stacked.append((record.from_loc, record.to_loc, promotion))
+        game.unmake_move()
+    stacked.reverse()
+    start = get_FEN(game)
+    if len(game.history):
+        first = game.copy()
+        while first.undo_move():
+            pass
+        start = get_FEN(first)
+    for move in stacked:
+        game.make_move(*move)
+
+    moves: "list[MoveT]" = [
+        (ply.from_loc, ply.to_loc, ply.promotion) for ply in game.history
+    ]
+    return start, moves + stacked
+
+
+def _game_result(game: Chess) -> str:
+    """Return the PGN result of a game, "*" if it isn't over."""
+    state = game.get_state()
+    if state.checkmate:
+        return "0-1" if game.player == 1 else "1-0"
+    if state.stalemate or game._is_dead_position():
+        return "1/2-1/2"
+    return "*"
+
+
+def write_game(
+    target: SourceT,
+    game: Chess,
+    headers: "Optional[dict[str, str]]" = None,
+    width: int = 79,
+):
+    """
+    Write a game in PGN.
+
+    Args:
+            target: a path or an open text file the game is appended to
+            game: the game to write
+            headers: extra tag pairs, overriding the generated ones
+            width: the longest line of movetext
+    Raises:
+            ValueError: if the game's history holds an illegal move
+    """
+    start, moves = get_moves(game)
+    board = Chess(start)
+    tags = {
+        "Event": "?",
+        "Site": "?",
+        "Date": "????.??.??",
+        "Round": "?",
+        "White": game.players[0],
+        "Black": game.players[1],
+        "Result": _game_result(game),
+    }
+    if start != f"{EPD} 0 1":
+        tags["SetUp"] = "1"
+        tags["FEN"] = start
+    tags.update(headers or {})
+    result = tags["Result"]
+
+    tokens = []
+    for ply, move in enumerate(moves):
+        legal_moves = board.get_state().legal_moves
+        if move[1] not in legal_moves.get(move[0], ()):
+            raise ValueError(f"Ply {ply + 1}: illegal move {move!r}.")
+        if board.player == 1:
+            tokens.append(f"{board.fullmove}.")
+        elif not tokens:
+            tokens.append(f"{board.fullmove}...")
+        tokens.append(san(board, move, legal_moves))
+        board.make_move(*move)
+    tokens.append(result)
+
+    lines = []
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+
+    with _open(target, "a") as file:
+        ordered = [key for key in SEVEN_TAG_ROSTER if key in tags]
+        ordered += [key for key in tags if key not in SEVEN_TAG_ROSTER]
+        for key in ordered:
+            value = str(tags[key]).replace('"', '\\"')
+            file.write(f'[{key} "{value}"]\n')
+        file.write("\n" + "\n".join(lines) + "\n\n")
+
+
+def write_games(target: SourceT, games: Iterable[Chess]):
+    """
+    Write games in PGN, one after the other.
+
+    Args:
+            target: a path or an open text file the games are appended to
+            games: the games to write
+    """
+    with _open(target, "a") as file:
+        for game in games:
+            write_game(file, game)
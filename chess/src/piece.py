@@ -82,6 +82,41 @@ class notations:
         PieceNotation(6, "king", "k", (KING, KING, "♚"), 0),
     )
 
+    # Lookup tables keyed by signed piece ID (or by name/character), built
+    # once by `_build_tables` when the module is imported.
+    _names: "dict[int, str]" = {}
+    _chars: "dict[int, str]" = {}
+    _epd_chars: "dict[int, str]" = {}
+    _symbols: "dict[int, dict[int, str]]" = {}
+    _points: "dict[int, int]" = {}
+    _classes: "dict[int, Type[Piece]]" = {}
+    _char_ids: "dict[str, int]" = {}
+    _name_ids: "dict[str, int]" = {}
+
+    @classmethod
+    def _build_tables(cls):
+        """Index every piece notation by signed ID, name and character."""
+        classes = {
+            subclass.__name__.lower(): subclass
+            for subclass in Piece.__subclasses__()
+        }
+        for piece in cls.pieces:
+            for id in (piece.id, -piece.id):
+                cls._names[id] = piece.name
+                cls._chars[id] = piece.char
+                cls._epd_chars[id] = (
+                    piece.char if id < 0 else piece.char.upper()
+                )
+                cls._points[id] = piece.points
+                for v in (1, 2):
+                    symbols = cls._symbols.setdefault(v, {})
+                    symbols[id] = piece.symbol[v].strip()
+                if piece.name in classes:
+                    cls._classes[id] = classes[piece.name]
+            cls._char_ids[piece.char] = -piece.id
+            cls._char_ids[piece.char.upper()] = piece.id
+            cls._name_ids[piece.name] = piece.id
+
     @classmethod
     def get_symbol(cls, id: int, variant: SymbolVariant = "filled") -> str:
         """
@@ -96,10 +131,7 @@ class notations:
                 ID isn't associated with a chess piece.
         """
         v = 2 if variant == "small" else 1
-        for piece in cls.pieces:
-            if piece.id == abs(id):
-                return piece.symbol[v].strip()
-        return ""
+        return cls._symbols[v].get(id, "")
 
     @classmethod
     def get_name(cls, id: int) -> str:
@@ -112,10 +144,7 @@ class notations:
                 A chess piece's name or an empty string if
                 ID isn't associated with a chess piece.
         """
-        for piece in cls.pieces:
-            if piece.id == abs(id):
-                return piece.name
-        return ""
+        return cls._names.get(id, "")
 
     @classmethod
     def get_char(cls, id: int, epd_mode: bool = False) -> str:
@@ -130,12 +159,9 @@ class notations:
                 A chess piece's EPD character or an empty string if
                 ID isn't associated with a chess piece.
         """
-        for piece in cls.pieces:
-            if piece.id == abs(id):
-                if epd_mode and id > 0:
-                    return piece.char.upper()
-                return piece.char
-        return ""
+        if epd_mode:
+            return cls._epd_chars.get(id, "")
+        return cls._chars.get(id, "")
 
     @classmethod
     def get_class(cls, id: int) -> Type[Piece]:
@@ -148,13 +174,7 @@ class notations:
                 A Piece subclass or None if ID isn't associated with
                 a chess piece.
         """
-        name = cls.get_name(id)
-        if not name:
-            return None  # type: ignore
-        for subclass in Piece.__subclasses__():
-            if subclass.__name__.lower() == name.lower():
-                return subclass
-        return None  # type: ignore
+        return cls._classes.get(id)  # type: ignore
 
     @classmethod
     def get_id(cls, name_or_char: str, epd_mode: bool = False) -> int:
@@ -168,20 +188,16 @@ class notations:
         Return:
                 the ID of a chess pice or 0 if the piece doesn't exist
         """
+        id = cls._char_ids.get(name_or_char)
+        if id is not None:
+            return id if epd_mode else abs(id)
         name_or_char = name_or_char.strip()
-        if not name_or_char:
-            return 0
         if len(name_or_char) == 1:
-            for piece in cls.pieces:
-                if piece.char == name_or_char.lower():
-                    if epd_mode and name_or_char.islower():
-                        return piece.id * -1
-                    return piece.id
-        else:
-            for piece in cls.pieces:
-                if piece.name == name_or_char.lower():
-                    return piece.id
-        return 0
+            id = cls._char_ids.get(name_or_char.lower(), 0)
+            if epd_mode and name_or_char.islower():
+                return id
+            return abs(id)
+        return cls._name_ids.get(name_or_char.lower(), 0)
 
     @classmethod
     def get_points(cls, id: int) -> int:
@@ -193,10 +209,7 @@ class notations:
         Return:
                 the points of a chess piece or 0 if the piece doesn't exist
         """
-        for piece in cls.pieces:
-            if piece.id == abs(id):
-                return piece.points
-        return 0
+        return cls._points.get(id, 0)
 
 
 class King(Piece):
@@ -793,3 +806,6 @@ class Pawn(Piece):
         ):
             result.append((pos[0] - 1, pos[1] - player))
         return result
+
+
+notations._build_tables()
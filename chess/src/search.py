@@ -0,0 +1,451 @@
+"""
+Computer opponent.
+
+Finds the best move of a `Chess` position with an iterative deepening
+alpha-beta search. The search goes one ply deeper on every iteration until
+its wall-clock or node budget runs out, and returns the best move of the
+last completed iteration.
+
+Moves are tried in this order, which is what makes alpha-beta cut off early:
+
+1. captures and promotions, most valuable victim first and least valuable
+   attacker first (MVV-LVA)
+2. killer moves, the quiet moves that caused a cutoff at the same ply
+3. every other quiet move, ranked by the history heuristic
+
+The best move stored in the transposition table for a position is tried
+before all of them, and a stored score that is deep enough ends the search
+of that position right away.
+
+With endgame tablebases, positions of few enough pieces are scored from the
+tables instead of being searched, and a root position found in them is
+answered with the tablebase move straight away.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+from . import bitboard
+from .evaluation import PIECE_VALUES, evaluate
+from .tablebase import MAX_PIECES
+from .transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+if TYPE_CHECKING:
+    from .chess import Chess, MoveT
+    from .tablebase import Probe, Tablebases
+
+MATE = 100000
+"Score of a checkmate, less the number of plies it takes"
+
+INFINITY = 1000000
+
+MAX_PLY = 100
+"Deepest ply the search can reach, quiescence search included"
+
+TB_WIN = MATE - 2 * MAX_PLY
+"Score of a tablebase win, less the number of plies to mate"
+CHECK_EVERY = 1023
+"The budget is checked whenever `nodes & CHECK_EVERY` is 0"
+
+
+@dataclass
+class Limits:
+    """The budget of a search."""
+
+    time: Optional[float] = 1.0
+    "wall-clock budget in seconds, None for no limit"
+
+    depth: int = MAX_PLY
+    "deepest iteration"
+
+    nodes: Optional[int] = None
+    "node budget, None for no limit"
+
+
+@dataclass
+class SearchResult:
+    """The outcome of a search."""
+
+    move: Optional[MoveT] = None
+    "best move, None if the position has no legal move"
+
+    score: int = 0
+    "score of the best move in centipawns for the active player"
+
+    depth: int = 0
+    "depth of the last completed iteration"
+
+    nodes: int = 0
+    "number of positions visited"
+
+    time: float = 0.0
+    "time spent in seconds"
+
+    @property
+    def nps(self) -> int:
+        """Nodes searched per second."""
+        return int(self.nodes / self.time) if self.time else 0
+
+
+class Searcher:
+    """
+    Alpha-beta searcher.
+
+    A searcher keeps its move ordering and transposition tables between
+    searches, so one instance should be used per game.
+    """
+
+    def __init__(
+        self, hash_mb: float = 16, tablebases: "Optional[Tablebases]" = None
+    ):
+        """
+        Args:
+                hash_mb: memory cap of the transposition table in megabytes
+                tablebases: endgame tablebases to probe, if any
+        """
+        self.tt = TranspositionTable(hash_mb)
+        "transposition table"
+
+        self.tablebases = tablebases
+
+        self.killers: "list[list[Optional[MoveT]]]" = [
+            [None, None] for _ in range(MAX_PLY + 1)
+        ]
+        "two killer moves per ply"
+
+        self.history: "list[list[int]]" = [[0] * 64 for _ in range(64)]
+        "history heuristic, indexed by origin then destination cell"
+
+        self.nodes = 0
+        self.stopped = False
+        self._limits = Limits()
+        self._deadline: Optional[float] = None
+
+    def stop(self):
+        """Ask a running search to return as soon as possible."""
+        self.stopped = True
+
+    def search(
+        self,
+        game: "Chess",
+        limits: Optional[Limits] = None,
+        on_iteration: Optional[Callable[[SearchResult], None]] = None,
+    ) -> SearchResult:
+        """
+        Search a position for its best move.
+
+        The position is left untouched once the search returns.
+
+        Args:
+                game: the position to search
+                limits: the budget of the search
+                on_iteration: called with the result of every completed
+                        iteration
+        Return:
+                the result of the last completed iteration
+        """
+        self._limits = limits = limits or Limits()
+        start = time.perf_counter()
+        self._deadline = None if limits.time is None else start + limits.time
+        self.nodes = 0
+        self.stopped = False
+        self.tt.new_search()
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+        for row in self.history:
+            for i in range(64):
+                row[i] >>= 3
+
+        result = SearchResult()
+        moves = game.get_move_list()
+        if not moves:
+            return result
+        if self.tablebases is not None and _tb_pieces(game):
+            found = self.tablebases.best_move(game)
+            if found is not None:
+                result.move = found[0]
+                result.score = tb_score(found[1])
+                result.depth = 1
+                result.time = time.perf_counter() - start
+                if on_iteration is not None:
+                    on_iteration(result)
+                return result
+        entry = self.tt.probe(game.zobrist_key)
+        if entry is not None and entry.move in moves:
+            result.move = entry.move
+        else:
+            result.move = moves[0]
+        for depth in range(1, limits.depth + 1):
+            move, score = self._search_root(game, moves, depth, result.move)
+            if self.stopped and depth > 1:
+                break
+            result.move, result.score, result.depth = move, score, depth
+            result.nodes = self.nodes
+            result.time = time.perf_counter() - start
+            if on_iteration is not None:
+                on_iteration(result)
+            if self.stopped or abs(score) >= MATE - MAX_PLY:
+                break
+        result.nodes = self.nodes
+        result.time = time.perf_counter() - start
+        return result
+
+    def _check_limits(self):
+        """Stop the search once its budget is spent."""
+        limits = self._limits
+        if limits.nodes is not None and self.nodes >= limits.nodes:
+            self.stopped = True
+        elif (
+            self._deadline is not None
+            and time.perf_counter() >= self._deadline
+        ):
+            self.stopped = True
+
+    def _search_root(
+        self, game: "Chess", moves: "list[MoveT]", depth: int, best: MoveT
+    ) -> "tuple[MoveT, int]":
+        """Search every root move, trying the previous best one first."""
+        alpha = -INFINITY
+        ordered = self._order(game, moves, 0, best)
+        best_score = -INFINITY
+        for move in ordered:
+            game.make_move(*move)
+            score = -self._negamax(game, depth - 1, -INFINITY, -alpha, 1)
+            game.unmake_move()
+            if self.stopped:
+                break
+            if score > best_score:
+                best, best_score = move, score
+                alpha = max(alpha, score)
+        if not self.stopped:
+            self.tt.store(game.zobrist_key, depth, best_score, EXACT, best)
+        return best, best_score
+
+    def _negamax(
+        self, game: "Chess", depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        """Score a position for the active player."""
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(game, alpha, beta, ply)
+        self.nodes += 1
+        if not self.nodes & CHECK_EVERY:
+            self._check_limits()
+        if self.stopped:
+            return 0
+        if game.halfmove >= 100:
+            return 0
+        if game.halfmove >= 4 and game.repetitions() > 1:
+            return 0
+        if self.tablebases is not None and _tb_pieces(game):
+            probe = self.tablebases.probe(game)
+            if probe is not None:
+                return tb_score(probe)
+
+        key = game.zobrist_key
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth:
+                score = _score_from_tt(entry.score, ply)
+                if (
+                    entry.bound == EXACT
+                    or entry.bound == LOWER and score >= beta
+                    or entry.bound == UPPER and score <= alpha
+                ):
+                    return score
+
+        check, legal = bitboard.legal_moves(
+            game, game.get_all_moves(), game._get_bitboards()
+        )
+        moves = game.get_move_list(legal)
+        if not moves:
+            return -MATE + ply if check else 0
+        if check:
+            depth += 1
+
+        alpha_orig = alpha
+        best = -INFINITY
+        best_move = None
+        for move in self._order(game, moves, ply, tt_move):
+            is_quiet = self._is_quiet(game, move)
+            game.make_move(*move)
+            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if is_quiet:
+                            self._store_cutoff(move, depth, ply)
+                        break
+        if best >= beta:
+            bound = LOWER
+        elif best <= alpha_orig:
+            bound = UPPER
+        else:
+            bound = EXACT
+        score = _score_to_tt(best, ply)
+        self.tt.store(key, depth, score, bound, best_move)
+        return best
+
+    def _quiesce(self, game: "Chess", alpha: int, beta: int, ply: int) -> int:
+        """
+        Search captures and promotions until the position is quiet.
+
+        A side in check can't stand pat on its evaluation, since it may
+        have no move that keeps it, so every evasion is searched instead.
+        """
+        self.nodes += 1
+        if not self.nodes & CHECK_EVERY:
+            self._check_limits()
+        if self.stopped:
+            return 0
+        check, legal = bitboard.legal_moves(
+            game, game.get_all_moves(), game._get_bitboards()
+        )
+        moves = game.get_move_list(legal)
+        if check:
+            if not moves:
+                return -MATE + ply
+            if ply >= MAX_PLY:
+                return evaluate(game)
+        else:
+            stand_pat = evaluate(game)
+            if stand_pat >= beta or ply >= MAX_PLY:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = [move for move in moves if not self._is_quiet(game, move)]
+        for move in self._order(game, moves, ply):
+            game.make_move(*move)
+            score = -self._quiesce(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self.stopped:
+                return 0
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    @staticmethod
+    def _is_quiet(game: "Chess", move: MoveT) -> bool:
+        """Check if a move neither captures nor promotes."""
+        (fx, fy), (tx, ty), promotion = move
+        if promotion or game.board[ty][tx]:
+            return False
+        return not (
+            (tx, ty) == game.en_passant and game.board[fy][fx] == game.player
+        )
+
+    def _order(
+        self,
+        game: "Chess",
+        moves: "list[MoveT]",
+        ply: int,
+        first: Optional[MoveT] = None,
+    ) -> "list[MoveT]":
+        """Sort moves from the most to the least promising."""
+        board = game.board
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+        for move in moves:
+            (fx, fy), (tx, ty), promotion = move
+            if move == first:
+                score = 1 << 30
+            elif not self._is_quiet(game, move):
+                victim = abs(board[ty][tx]) or (0 if promotion else 1)
+                attacker = abs(board[fy][fx])
+                score = (
+                    (1 << 24)
+                    + (PIECE_VALUES[victim] + PIECE_VALUES[promotion]) * 8
+                    - attacker
+                )
+            elif move == killers[0]:
+                score = 1 << 23
+            elif move == killers[1]:
+                score = (1 << 23) - 1
+            else:
+                score = history[fy * 8 + fx][ty * 8 + tx]
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _store_cutoff(self, move: MoveT, depth: int, ply: int):
+        """Remember a quiet move that caused a beta cutoff."""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        (fx, fy), (tx, ty), _ = move
+        history = self.history[fy * 8 + fx]
+        history[ty * 8 + tx] += depth * depth
+        if history[ty * 8 + tx] >= 1 << 22:
+            for row in self.history:
+                for i in range(64):
+                    row[i] >>= 1
+
+
+def _tb_pieces(game: "Chess") -> bool:
+    """Tell whether a position has few enough pieces to probe."""
+    return len(game.piece_lists[1]) + len(game.piece_lists[-1]) <= MAX_PIECES
+
+
+def tb_score(probe: "Probe") -> int:
+    """Turn the outcome of a tablebase position into a search score."""
+    if probe.wdl > 0:
+        return TB_WIN - probe.distance
+    if probe.wdl < 0:
+        return -TB_WIN + probe.distance
+    return 0
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    """Make a mate score relative to the position instead of the root."""
+    if score >= MATE - MAX_PLY:
+        return score + ply
+    if score <= -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    """Make a stored mate score relative to the root again."""
+    if score >= MATE - MAX_PLY:
+        return score - ply
+    if score <= -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def best_move(
+    game: "Chess",
+    time_limit: Optional[float] = 1.0,
+    depth: int = MAX_PLY,
+    nodes: Optional[int] = None,
+    hash_mb: float = 16,
+) -> Optional[MoveT]:
+    """
+    Find the best move of a position.
+
+    Args:
+            game: the position to search
+            time_limit: wall-clock budget in seconds, None for no limit
+            depth: deepest iteration
+            nodes: node budget, None for no limit
+            hash_mb: memory cap of the transposition table in megabytes
+    Return:
+            the best move as a (from, to, promotion) tuple, or None if the
+            position has no legal move
+    """
+    searcher = Searcher(hash_mb)
+    return searcher.search(game, Limits(time_limit, depth, nodes)).move
@@ -0,0 +1,471 @@
+"""
+Binary game store.
+
+Keeps any number of games in two files, so a single game can be saved or
+loaded without touching the others:
+
+* the record file holds one record per game: a fixed-size header (game ID,
+  players, initial and current positions, clocks) followed by room for the
+  packed plies of its move history. It is read through `mmap`, so loading
+  a game only pages in its own record.
+* the index file maps every game ID to the offset of its record. Entries
+  are only ever appended, the last entry of an ID wins.
+
+Saving a game that is already stored writes the plies that changed and
+patches the header in place. A record is moved to the end of the record
+file only when the game outgrows the room reserved for it; `compact`
+reclaims the space left behind.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Type, TypeVar, Union
+
+from .epd import EPDString, get_loc, load_EPD, set_piece
+from .game import DIR, History, Ply
+from .piece import notations
+
+if TYPE_CHECKING:
+    from .game import Game
+
+GameT = TypeVar("GameT", bound="Game")
+
+FILE = DIR.joinpath("games.bin")
+"Default record file, its index is stored next to it"
+
+HEADER = struct.Struct("<QII34s34sHH32s32s")
+"""
+id, capacity, plies, initial position, current position, halfmove clock,
+fullmove number, players
+"""
+
+PLY = struct.Struct("<HbbHH")
+"packed move, piece, captured piece, packed state, halfmove"
+
+INDEX = struct.Struct("<QQ")
+"id, record offset"
+
+DELETED = 2**64 - 1
+"Offset of the index entry of a deleted game"
+
+MIN_CAPACITY = 64
+"Plies reserved for a new record"
+
+
+def pack_position(game: "Game") -> bytes:
+    """
+    Pack the position of a game into 34 bytes.
+
+    The 64 cells take a nibble each (`piece_id + 6`), followed by a byte
+    for the active player and castling rights and one for the en passant
+    cell (0 for none, else cell + 1).
+
+    Args:
+            game: an instance of the chess game
+    Return:
+            the packed position
+    """
+    cells = [piece + 6 for row in game.board for piece in row]
+    data = bytearray(
+        cells[i] | cells[i + 1] << 4 for i in range(0, 64, 2)
+    )
+    flags = int(game.player == -1)
+    for i, right in enumerate(game.castling):
+        flags |= bool(right) << (i + 1)
+    data.append(flags)
+    if game.en_passant is None:
+        data.append(0)
+    else:
+        data.append(game.en_passant[1] * 8 + game.en_passant[0] + 1)
+    return bytes(data)
+
+
+def unpack_position(data: bytes) -> EPDString:
+    """
+    Unpack a position packed with `pack_position`.
+
+    Args:
+            data: the packed position
+    Return:
+            the position in EPD
+    """
+    rows = []
+    for y in range(8):
+        row = ""
+        empty = 0
+        for x in range(8):
+            byte = data[y * 4 + x // 2]
+            piece = (byte >> 4 * (x & 1) & 15) - 6
+            if piece:
+                row += (str(empty) if empty else "") + notations.get_char(
+                    piece, True
+                )
+                empty = 0
+            else:
+                empty += 1
+        rows.append(row + (str(empty) if empty else ""))
+    flags = data[32]
+    castling = "".join(c for i, c in enumerate("KQkq") if flags >> i + 1 & 1)
+    en_passant = data[33] - 1
+    if en_passant < 0:
+        target = "-"
+    else:
+        target = get_loc((en_passant & 7, en_passant >> 3))
+    return EPDString(
+        f"{'/'.join(rows)} {'b' if flags & 1 else 'w'} {castling or '-'} "
+        f"{target}"
+    )
+
+
+def _pack_name(name: str) -> bytes:
+    """Encode a player's name into at most 32 bytes of UTF-8."""
+    return name.encode("utf-8")[:32].ljust(32, b"\0")
+
+
+def _unpack_name(data: bytes) -> str:
+    return data.rstrip(b"\0").decode("utf-8", errors="ignore")
+
+
+def _pack_plies(history: History) -> bytes:
+    """Pack the plies of a move history, `PLY.size` bytes each."""
+    return b"".join(
+        PLY.pack(*fields)
+        for fields in zip(
+            history.moves,
+            history.pieces,
+            history.captures,
+            history.states,
+            history.halfmoves,
+        )
+    )
+
+
+class GameStore:
+    """A store of games saved and loaded by ID."""
+
+    def __init__(self, path: Union[str, Path] = FILE):
+        """
+        Args:
+                path: the record file, created if it doesn't exist. The
+                        index is kept in the same place with an ".idx"
+                        suffix.
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self.path.touch()
+        self.index_path.touch()
+        self._records = open(self.path, "r+b")
+        self._index = open(self.index_path, "ab")
+        self._map: Optional[mmap.mmap] = None
+        self.offsets: "dict[int, int]" = {}
+        "offset of the record of every stored game"
+
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        for game_id, offset in INDEX.iter_unpack(
+            data[: len(data) - len(data) % INDEX.size]
+        ):
+            if offset == DELETED:
+                self.offsets.pop(game_id, None)
+            else:
+                self.offsets[game_id] = offset
+
+    def __enter__(self) -> GameStore:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def close(self):
+        """Close the store's files."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._records.close()
+        self._index.close()
+
+    def _view(self) -> "Union[mmap.mmap, bytes]":
+        """
+        Map the record file, again if it grew since it was last mapped.
+
+        An empty file can't be mapped, so no bytes are returned for it.
+        """
+        size = os.fstat(self._records.fileno()).st_size
+        if self._map is None or len(self._map) != size:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if not size:
+                return b""
+            self._map = mmap.mmap(
+                self._records.fileno(), size, access=mmap.ACCESS_READ
+            )
+        return self._map
+
+    def _write(self, offset: int, data: bytes):
+        self._records.seek(offset)
+        self._records.write(data)
+
+    def _set_offset(self, game_id: int, offset: int):
+        self._index.write(INDEX.pack(game_id, offset))
+        self._index.flush()
+        if offset == DELETED:
+            self.offsets.pop(game_id, None)
+        else:
+            self.offsets[game_id] = offset
+
+    def _header(self, game_id: int) -> tuple:
+        offset = self.offsets.get(game_id)
+        if offset is None:
+            raise KeyError(f"Game {game_id} not found")
+        return HEADER.unpack_from(self._view(), offset)
+
+    def save(self, game_id: int, game: "Game"):
+        """
+        Save a game, replacing the game stored under the same ID.
+
+        Only the plies that differ from the stored ones are written.
+
+        Args:
+                game_id: the ID of the game
+                game: the game to save
+        """
+        plies = _pack_plies(game.history)
+        count = len(game.history)
+        offset = self.offsets.get(game_id)
+        capacity = 0
+        stored = b""
+        if offset is not None:
+            _, capacity, stored_count, *_ = self._header(game_id)
+            start = offset + HEADER.size
+            stored = self._view()[start : start + stored_count * PLY.size]
+        if offset is None or capacity < count:
+            capacity = max(MIN_CAPACITY, 2 * count)
+            offset = os.fstat(self._records.fileno()).st_size
+            self._write(offset, bytes(HEADER.size + capacity * PLY.size))
+            self._set_offset(game_id, offset)
+            stored = b""
+        # write the plies from the first one that changed
+        same = 0
+        for same in range(0, min(len(stored), len(plies)), PLY.size):
+            if stored[same : same + PLY.size] != plies[same : same + PLY.size]:
+                break
+        else:
+            same = min(len(stored), len(plies))
+        if same < len(plies):
+            self._write(offset + HEADER.size + same, plies[same:])
+        self._write(
+            offset,
+            HEADER.pack(
+                game_id,
+                capacity,
+                count,
+                pack_position(self._initial(game)),
+                pack_position(game),
+                min(game.halfmove, 0xFFFF),
+                min(game.fullmove, 0xFFFF),
+                _pack_name(game.players[0]),
+                _pack_name(game.players[1]),
+            ),
+        )
+        self._records.flush()
+
+    @staticmethod
+    def _initial(game: "Game") -> "Game":
+        """Return the position before the first move of a game."""
+        if not len(game.history):
+            return game
+        first = type(game)(game.initial_pos)
+        load_EPD(first, game.initial_pos)
+        return first
+
+    def get_EPD(self, game_id: int) -> EPDString:
+        """
+        Return the current position of a stored game without loading it.
+
+        Args:
+                game_id: the ID of the game
+        Return:
+                the position in EPD
+        Raises:
+                KeyError: if no game is stored under the ID
+        """
+        return unpack_position(self._header(game_id)[4])
+
+    def get_FEN(self, game_id: int) -> EPDString:
+        """
+        Return the current position of a stored game, with its clocks,
+        without loading it.
+
+        Args:
+                game_id: the ID of the game
+        Return:
+                the position in FEN
+        Raises:
+                KeyError: if no game is stored under the ID
+        """
+        header = self._header(game_id)
+        return EPDString(
+            f"{unpack_position(header[4])} {header[5]} {header[6]}"
+        )
+
+    def load(self, game_id: int, cls: "Type[GameT]") -> GameT:
+        """
+        Load a game.
+
+        The moves are played again from the initial position to rebuild the
+        logs, the captured pieces and the position keys of the repetition
+        rules. Check marks of the logs are not restored. The clocks of the
+        initial position are those of the first move, the fullmove number
+        being counted back from the stored one.
+
+        Args:
+                game_id: the ID of the game
+                cls: the class of the game to create
+        Return:
+                the stored game
+        Raises:
+                KeyError: if no game is stored under the ID
+        """
+        (
+            _,
+            _,
+            count,
+            initial,
+            current,
+            halfmove,
+            fullmove,
+            white,
+            black,
+        ) = self._header(game_id)
+        start = self.offsets[game_id] + HEADER.size
+        data = self._view()[start : start + count * PLY.size]
+
+        history = History()
+        for move, piece, captured, state, clock in PLY.iter_unpack(data):
+            history.moves.append(move)
+            history.pieces.append(piece)
+            history.captures.append(captured)
+            history.states.append(state)
+            history.halfmoves.append(clock)
+            history.log_sizes.append(0)  # set again as the move is replayed
+            history.captured_sizes.append(0)
+
+        initial_pos = unpack_position(initial)
+        game = cls(initial_pos)
+        load_EPD(game, initial_pos)
+        game.initial_pos = initial_pos
+        game.players = [_unpack_name(white), _unpack_name(black)]
+        game.fullmove = fullmove - sum(
+            1 for i in range(count) if history[i].player == -1
+        )
+        final = cls(unpack_position(current))
+        load_EPD(final, unpack_position(current))
+        for i in range(count):
+            after = history[i + 1] if i + 1 < count else final
+            _replay(game, history[i], after)
+        game.halfmove = halfmove
+        game.fullmove = fullmove
+        return game
+
+    def delete(self, game_id: int):
+        """
+        Remove a game from the store.
+
+        Args:
+                game_id: the ID of the game
+        """
+        if game_id in self.offsets:
+            self._set_offset(game_id, DELETED)
+
+    def compact(self):
+        """Rewrite the store without the space of moved or deleted records."""
+        if not os.fstat(self._records.fileno()).st_size:
+            return
+        records = self.path.with_suffix(".tmp")
+        offsets = {}
+        view = self._view()
+        with open(records, "wb") as f:
+            for game_id, offset in self.offsets.items():
+                capacity = HEADER.unpack_from(view, offset)[1]
+                offsets[game_id] = f.tell()
+                end = offset + HEADER.size + capacity * PLY.size
+                f.write(view[offset:end])
+        with open(self.index_path.with_suffix(".tmp.idx"), "wb") as f:
+            for game_id, offset in offsets.items():
+                f.write(INDEX.pack(game_id, offset))
+        self.close()
+        os.replace(records, self.path)
+        os.replace(self.index_path.with_suffix(".tmp.idx"), self.index_path)
+        self._records = open(self.path, "r+b")
+        self._index = open(self.index_path, "ab")
+        self.offsets = offsets
+
+
+def _replay(game: "Game", ply: Ply, after: "Union[Ply, Game]"):
+    """
+    Make a stored move again, as `Chess.move` made it.
+
+    Args:
+            game: the game, in the position before the move
+            ply: the move
+            after: the next move or the final position, which holds the
+                    state of the game right after the move
+    """
+    (fx, fy), (tx, ty) = ply.from_loc, ply.to_loc
+    game.player = ply.player  # type: ignore
+    game.castling[:] = ply.castling
+    game.en_passant = ply.en_passant
+    game.halfmove = ply.halfmove
+    game.history.push(
+        ply._replace(
+            log_size=len(game.log),
+            captured_size=len(game.captured[ply.player]),
+        )
+    )
+    game.log_move(
+        ply.piece, get_loc((fx, fy)), get_loc((tx, ty)), (fx, fy), (tx, ty)
+    )
+    if ply.captured:
+        game.captured[ply.player].append(ply.captured)
+    set_piece(game, (fx, fy), 0)
+    if ply.en_passant_capture:
+        set_piece(game, (tx, ty + ply.player), 0)
+    if ply.promotion:
+        set_piece(game, (tx, ty), ply.promotion * ply.player)
+        game.log[-1] += f"={notations.get_char(ply.promotion).upper()}"
+    else:
+        set_piece(game, (tx, ty), ply.piece)
+    if abs(ply.piece) == 6 and tx - fx == 2:
+        set_piece(game, (tx + 1, ty), 0)
+        set_piece(game, (tx - 1, ty), 4 * ply.player)
+    elif abs(ply.piece) == 6 and tx - fx == -2:
+        set_piece(game, (tx - 2, ty), 0)
+        set_piece(game, (tx + 1, ty), 4 * ply.player)
+    game.player = after.player  # type: ignore
+    game.castling[:] = after.castling
+    game.en_passant = after.en_passant
+    if ply.player == -1:
+        game.fullmove += 1
+    game.key_stack.append(game.zobrist_key)
+
+
+_default: Optional[GameStore] = None
+
+
+def default_store() -> GameStore:
+    """Return the store kept in the game's data directory."""
+    global _default
+    if _default is None:
+        _default = GameStore()
+    return _default
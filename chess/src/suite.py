@@ -0,0 +1,244 @@
+"""
+EPD test suite runner.
+
+Searches every position of an EPD file for a fixed time and checks the
+move found against the position's "bm" (best moves) and "am" (moves to
+avoid) operations, reporting how many positions were solved, how fast the
+search was and how long it took to settle on the solution.
+
+Run it from the `chess` directory with...
+
+`python -m src.suite FILE [--time SECONDS] [--depth N] [--output FILE]`
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from rich import print as rprint
+from rich.table import Table
+
+from .chess import Chess
+from .epd import EPDString, get_EPD, load_EPD
+from .notation import parse_san, san
+from .search import MAX_PLY, Limits, Searcher, SearchResult
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+
+
+@dataclass
+class SuiteResult:
+    """The outcome of searching a position of a test suite."""
+
+    id: str
+    "name of the position"
+
+    epd: EPDString
+    "the position with its operations"
+
+    expected: str
+    "the best moves and moves to avoid, as written in the suite"
+
+    found: str = ""
+    "the move found, in SAN"
+
+    solved: bool = False
+    "the move found is a best move and not a move to avoid"
+
+    depth: int = 0
+    "depth of the last completed iteration"
+
+    score: int = 0
+    "score of the move found in centipawns"
+
+    nodes: int = 0
+    "positions visited"
+
+    time: float = 0.0
+    "time spent in seconds"
+
+    solution_time: Optional[float] = None
+    "time after which the search kept returning a solution, if solved"
+
+    error: Optional[str] = None
+    "why the position couldn't be searched, None if it was"
+
+    @property
+    def nps(self) -> int:
+        """Nodes searched per second."""
+        return int(self.nodes / self.time) if self.time else 0
+
+
+def _parse_moves(game: Chess, operands: str) -> "set[MoveT]":
+    """Read the SAN moves of a "bm" or "am" operation."""
+    return {parse_san(game, text) for text in operands.split()}
+
+
+def run_position(
+    epd: EPDString,
+    time_limit: float = 1.0,
+    depth: int = MAX_PLY,
+    hash_mb: float = 16,
+) -> SuiteResult:
+    """
+    Search a position of a test suite.
+
+    Args:
+            epd: the position, with its "bm" and/or "am" operations
+            time_limit: wall-clock budget of the search in seconds
+            depth: deepest iteration
+            hash_mb: memory cap of the transposition table in megabytes
+    Return:
+            the outcome of the search
+    """
+    game = Chess()
+    if not load_EPD(game, epd):
+        return SuiteResult("", epd, "", error="Invalid EPD")
+    operations = game.epd_operations
+    result = SuiteResult(
+        operations.get("id", ""),
+        epd,
+        "; ".join(
+            f"{opcode} {operations[opcode]}"
+            for opcode in ("bm", "am")
+            if opcode in operations
+        ),
+    )
+    try:
+        best = _parse_moves(game, operations.get("bm", ""))
+        avoid = _parse_moves(game, operations.get("am", ""))
+    except ValueError as error:
+        result.error = str(error)
+        return result
+    if not best and not avoid:
+        result.error = "No bm or am operation"
+        return result
+
+    def solves(move: Optional[MoveT]) -> bool:
+        return (not best or move in best) and move not in avoid
+
+    def on_iteration(iteration: SearchResult):
+        if not solves(iteration.move):
+            result.solution_time = None
+        elif result.solution_time is None:
+            result.solution_time = iteration.time
+
+    found = Searcher(hash_mb).search(
+        game, Limits(time_limit, depth), on_iteration
+    )
+    result.solved = solves(found.move)
+    if not result.solved:
+        result.solution_time = None
+    if found.move is not None:
+        result.found = san(game, found.move)
+    result.depth = found.depth
+    result.score = found.score
+    result.nodes = found.nodes
+    result.time = found.time
+    return result
+
+
+def run(
+    path: str,
+    time_limit: float = 1.0,
+    depth: int = MAX_PLY,
+    hash_mb: float = 16,
+    output: Optional[str] = None,
+) -> "list[SuiteResult]":
+    """
+    Run a test suite and print a report.
+
+    Args:
+            path: the EPD file, one position per line
+            time_limit: wall-clock budget of every search in seconds
+            depth: deepest iteration of every search
+            hash_mb: memory cap of the transposition table in megabytes
+            output: a file to write every position to, annotated with the
+                    depth ("acd") and score ("ce") of its search
+    Return:
+            the outcome of every position
+    """
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                results.append(
+                    run_position(EPDString(line), time_limit, depth, hash_mb)
+                )
+
+    table = Table(title=f"EPD suite ({path}, {time_limit}s per position)")
+    columns = ("id", "expected", "found", "depth", "nodes", "nps", "time")
+    for column in columns + ("solved at",):
+        table.add_column(column, justify="right")
+    for i, result in enumerate(results):
+        if result.error:
+            table.add_row(
+                result.id or str(i + 1), result.expected, f"[red]{result.error}"
+            )
+            continue
+        color = "green" if result.solved else "red"
+        table.add_row(
+            result.id or str(i + 1),
+            result.expected,
+            f"[{color}]{result.found}",
+            str(result.depth),
+            str(result.nodes),
+            f"{result.nps:,}",
+            f"{result.time:.2f}s",
+            "-" if result.solution_time is None
+            else f"{result.solution_time:.2f}s",
+        )
+    solved = [result for result in results if result.solved]
+    nodes = sum(result.nodes for result in results)
+    elapsed = sum(result.time for result in results)
+    table.add_row(
+        "total",
+        f"{len(solved)}/{len(results)} solved",
+        f"{len(solved) / len(results):.0%}" if results else "-",
+        "",
+        str(nodes),
+        f"{nodes / elapsed:,.0f}" if elapsed else "-",
+        f"{elapsed:.2f}s",
+        f"{sum(r.solution_time for r in solved) / len(solved):.2f}s avg"
+        if solved
+        else "-",
+    )
+    rprint(table)
+
+    if output is not None:
+        with open(output, "w", encoding="utf-8") as f:
+            for result in results:
+                game = Chess()
+                if result.error or not load_EPD(game, result.epd):
+                    f.write(f"{result.epd}\n")
+                    continue
+                operations = dict(game.epd_operations)
+                operations["acd"] = str(result.depth)
+                operations["ce"] = str(result.score)
+                f.write(f"{get_EPD(game, operations)}\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EPD test suite runner")
+    parser.add_argument("file", help="EPD file, one position per line")
+    parser.add_argument(
+        "-t", "--time", type=float, default=1.0, help="seconds per position"
+    )
+    parser.add_argument("-d", "--depth", type=int, default=MAX_PLY)
+    parser.add_argument(
+        "--hash", type=float, default=16, help="transposition table MB"
+    )
+    parser.add_argument(
+        "-o", "--output", help="write the positions annotated with acd/ce"
+    )
+    args = parser.parse_args()
+    run(args.file, args.time, args.depth, args.hash, args.output)
+
+
+if __name__ == "__main__":
+    main()
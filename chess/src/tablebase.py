@@ -0,0 +1,788 @@
+"""
+Endgame tablebases.
+
+A tablebase holds the outcome of every position of an ending with few
+pieces, e.g. king and rook against king and knight ("KRKN"), so those
+positions are read instead of searched. Tables are built for endings of up
+to `MAX_PIECES` pieces, kings included, by retrograde analysis: checkmates
+are found first, then the positions one move away from them, and so on
+backwards until nothing changes. Positions left undecided are draws.
+
+Every table is a file of one byte per position, holding the outcome for the
+side to move and the number of plies to mate:
+
+* 0: draw
+* 1 to 127: win, mating in that many plies
+* 128 to 254: loss, mated in that many plies plus 128
+* 255: not a legal position
+
+The byte of a position is found with a perfect hash of its piece placement:
+the board is turned (mirrored, flipped or transposed, only mirrored when
+there are pawns) so the pair of kings lands on one of a few canonical pairs
+(462 without pawns), and the other pieces count in base 64, or 48 for
+pawns, which never stand on the first or last rank. Files are read through
+`mmap`, so probing pages in a single byte.
+
+Castling rights and en passant captures are left out of the tables: such
+positions aren't probed. The fifty-move rule is ignored.
+
+Run it from the `chess` directory with...
+
+`python -m src.tablebase generate KQK KRK KPK KRKN`
+
+`python -m src.tablebase probe "8/8/8/4k3/8/8/8/4KR2 w - -"`
+
+Every table is generated with the smaller tables its captures and
+promotions lead to. Four-piece tables take a few minutes each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+from rich import print as rprint
+
+from . import bitboard
+from .bitboard import (BETWEEN, BIT, KING_ATTACKS, KNIGHT_ATTACKS,
+                       PAWN_ATTACKS)
+from .chess import Chess
+from .epd import EPDString, get_piece, load_EPD
+from .game import DIR
+from .notation import san
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+
+DIRECTORY = DIR.joinpath("tablebases")
+"Default directory of the table files"
+
+MAX_PIECES = 4
+"Most pieces, kings included, of a table"
+
+DRAW = 0
+LOSS = 128
+"Added to the plies to mate of a lost position"
+
+INVALID = 255
+"Byte of a position that can't occur"
+
+MAX_DISTANCE = 125
+"Longest distance to mate a table can hold"
+
+LETTERS = "PNBRQK"
+"Letter of every piece, indexed by `abs(piece_id) - 1`"
+
+KING = 6
+PAWN = 1
+PROMOTIONS = (5, 4, 3, 2)
+
+_UNKNOWN = 254
+
+
+class Probe(NamedTuple):
+    """The outcome of a tablebase position."""
+
+    wdl: int
+    "1 if the active player wins, 0 for a draw and -1 if they lose"
+
+    distance: int
+    "plies to mate, 0 for draws"
+
+
+def _decode(byte: int) -> Probe:
+    """Read the byte of a position."""
+    if byte == DRAW:
+        return Probe(0, 0)
+    if byte < LOSS:
+        return Probe(1, byte)
+    return Probe(-1, byte - LOSS)
+
+
+def _transforms() -> "list[list[int]]":
+    """
+    Build the eight symmetries of the board, as the cell every cell goes
+    to. The first two only mirror files and keep pawns moving the same way.
+    """
+    tables = []
+    for transpose in (False, True):
+        for flip_y in (False, True):
+            for flip_x in (False, True):
+                table = []
+                for sq in range(64):
+                    x, y = sq & 7, sq >> 3
+                    if flip_x:
+                        x = 7 - x
+                    if flip_y:
+                        y = 7 - y
+                    if transpose:
+                        x, y = y, x
+                    table.append(y * 8 + x)
+                tables.append(table)
+    return tables
+
+
+TRANSFORMS = _transforms()
+
+
+def _king_pairs(
+    count: int,
+) -> "tuple[list[tuple[int, int]], list[Optional[tuple[int, tuple[int, ...]]]]]":
+    """
+    Number the canonical placements of the two kings under the first
+    `count` symmetries.
+
+    Return:
+            the canonical (white king, black king) pairs, and for every
+            placement `wk * 64 + bk` the number of its canonical pair and
+            the symmetries turning it into that pair, None if the kings
+            touch
+    """
+    symmetries = TRANSFORMS[:count]
+    canonical = {}
+    placements: "list[Optional[tuple[tuple[int, int], tuple[int, ...]]]]" = []
+    for wk in range(64):
+        for bk in range(64):
+            if wk == bk or KING_ATTACKS[wk] & BIT[bk]:
+                placements.append(None)
+                continue
+            images = [(t[wk], t[bk]) for t in symmetries]
+            best = min(images)
+            canonical[best] = True
+            placements.append((
+                best,
+                tuple(i for i, image in enumerate(images) if image == best),
+            ))
+    pairs = sorted(canonical)
+    numbers = {pair: n for n, pair in enumerate(pairs)}
+    return pairs, [
+        None if p is None else (numbers[p[0]], p[1]) for p in placements
+    ]
+
+
+KING_PAIRS = {8: _king_pairs(8), 2: _king_pairs(2)}
+"Canonical king placements without pawns (8 symmetries) and with them (2)"
+
+_ROOK_LINES = [
+    bitboard.rook_attacks(sq, 0) for sq in range(64)
+]
+_BISHOP_LINES = [
+    bitboard.bishop_attacks(sq, 0) for sq in range(64)
+]
+
+
+def _attacks(piece: int, sq: int, occupied: int) -> int:
+    """Return the cells a piece attacks, pawns excluded."""
+    kind = abs(piece)
+    if kind == KING:
+        return KING_ATTACKS[sq]
+    if kind == 2:
+        return KNIGHT_ATTACKS[sq]
+    if kind == 3:
+        return bitboard.bishop_attacks(sq, occupied)
+    if kind == 4:
+        return bitboard.rook_attacks(sq, occupied)
+    return bitboard.queen_attacks(sq, occupied)
+
+
+def _attacked(
+    target: int,
+    pieces: "tuple[int, ...]",
+    squares: "list[int]",
+    side: int,
+    occupied: int,
+    skip: int = -1,
+) -> bool:
+    """
+    Tell whether a player attacks a cell.
+
+    Args:
+            target: the cell
+            pieces: the piece IDs of the position
+            squares: the cell of every piece
+            side: the attacking player
+            occupied: the occupied cells
+            skip: a piece left out, e.g. because it was just captured
+    """
+    bit = BIT[target]
+    for slot, piece in enumerate(pieces):
+        if slot == skip or (piece > 0) != (side > 0):
+            continue
+        sq = squares[slot]
+        kind = abs(piece)
+        if kind == KING:
+            hit = KING_ATTACKS[sq] & bit
+        elif kind == 2:
+            hit = KNIGHT_ATTACKS[sq] & bit
+        elif kind == PAWN:
+            hit = PAWN_ATTACKS[side][sq] & bit
+        else:
+            lines = 0
+            if kind != 3:
+                lines |= _ROOK_LINES[sq]
+            if kind != 4:
+                lines |= _BISHOP_LINES[sq]
+            hit = lines & bit and not BETWEEN[sq][target] & occupied
+        if hit:
+            return True
+    return False
+
+
+def signature(pieces: "list[int]") -> "tuple[str, bool]":
+    """
+    Name the table of a set of pieces.
+
+    The stronger player is named first, as white: tables of endings where
+    black is stronger are read with the colours swapped.
+
+    Args:
+            pieces: the piece IDs, kings included
+    Return:
+            the name of the table, e.g. "KRKN", and whether the colours
+            have to be swapped to read it
+    """
+    sides = []
+    for side in (1, -1):
+        sides.append(sorted(
+            (abs(p) for p in pieces if p * side > 0 and abs(p) != KING),
+            reverse=True,
+        ))
+    white, black = sides
+    flip = (len(black), black) > (len(white), white)
+    if flip:
+        white, black = black, white
+    name = "K" + "".join(LETTERS[p - 1] for p in white)
+    name += "K" + "".join(LETTERS[p - 1] for p in black)
+    return name, flip
+
+
+class Layout:
+    """How the positions of a table are numbered."""
+
+    def __init__(self, name: str):
+        """
+        Args:
+                name: the name of the table, e.g. "KRKN"
+        Raises:
+                ValueError: if the name isn't that of a table
+        """
+        upper = name.upper()
+        split = upper.find("K", 1)
+        if (
+            not upper.startswith("K")
+            or split < 0
+            or "K" in upper[split + 1 :]
+            or len(upper) > MAX_PIECES
+            or any(letter not in LETTERS for letter in upper)
+        ):
+            raise ValueError(f"Invalid tablebase {name!r}.")
+        pieces = [KING] + [LETTERS.index(c) + 1 for c in upper[1:split]]
+        pieces += [-KING] + [-LETTERS.index(c) - 1 for c in upper[split + 1 :]]
+        if signature(pieces) != (upper, False):
+            raise ValueError(f"Invalid tablebase {name!r}.")
+        self.name = upper
+        self.pieces = tuple(pieces)
+        "piece ID of every slot: the white king and pieces, then black's"
+
+        self.black_king = split
+        "slot of the black king"
+
+        self.others = [
+            slot for slot in range(len(pieces)) if abs(pieces[slot]) != KING
+        ]
+        "slots of the pieces other than kings"
+
+        self.pawns = [abs(pieces[slot]) == PAWN for slot in self.others]
+        self.twins = len(self.others) == 2 and (
+            pieces[self.others[0]] == pieces[self.others[1]]
+        )
+        "the two other pieces are alike, so they're numbered in order"
+
+        self.pairs, self.placements = KING_PAIRS[2 if any(self.pawns) else 8]
+        self.radices = [48 if pawn else 64 for pawn in self.pawns]
+        self.side_size = len(self.pairs)
+        for radix in self.radices:
+            self.side_size *= radix
+        self.size = 2 * self.side_size
+        "number of positions, both players to move"
+
+    def index(self, squares: "list[int]", side: int) -> int:
+        """
+        Number a position.
+
+        Args:
+                squares: the cell of every slot
+                side: the active player
+        Return:
+                the index of the position, -1 if it can't be numbered
+        """
+        placement = self.placements[
+            squares[0] * 64 + squares[self.black_king]
+        ]
+        if placement is None:
+            return -1
+        pair, symmetries = placement
+        best: "Optional[list[int]]" = None
+        for symmetry in symmetries:
+            table = TRANSFORMS[symmetry]
+            cells = [table[squares[slot]] for slot in self.others]
+            if self.twins and cells[0] > cells[1]:
+                cells.reverse()
+            if best is None or cells < best:
+                best = cells
+        index = (0 if side == 1 else 1) * len(self.pairs) + pair
+        for cell, pawn in zip(best or (), self.pawns):
+            if pawn:
+                if not 8 <= cell < 56:
+                    return -1
+                index = index * 48 + cell - 8
+            else:
+                index = index * 64 + cell
+        return index
+
+    def decode(self, index: int) -> "tuple[list[int], int]":
+        """
+        Place the pieces of a position, inverse of `index`.
+
+        Return:
+                the cell of every slot and the active player
+        """
+        cells = []
+        for radix, pawn in zip(reversed(self.radices), reversed(self.pawns)):
+            index, cell = divmod(index, radix)
+            cells.append(cell + 8 if pawn else cell)
+        side, pair = divmod(index, len(self.pairs))
+        squares = [0] * len(self.pieces)
+        squares[0], squares[self.black_king] = self.pairs[pair]
+        for slot, cell in zip(self.others, reversed(cells)):
+            squares[slot] = cell
+        return squares, 1 if side == 0 else -1
+
+
+class Table:
+    """A table file, read through `mmap`."""
+
+    def __init__(self, path: Union[str, Path], layout: Layout):
+        """
+        Raises:
+                ValueError: if the file doesn't have the size of the table
+        """
+        self.layout = layout
+        with open(path, "rb") as f:
+            if Path(path).stat().st_size != layout.size:
+                raise ValueError(f"Invalid tablebase file {str(path)!r}.")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, index: int) -> int:
+        return self._map[index]
+
+    def close(self):
+        self._map.close()
+
+
+class Tablebases:
+    """A directory of table files, opened as they are needed."""
+
+    def __init__(self, directory: Union[str, Path] = DIRECTORY):
+        """
+        Args:
+                directory: where the table files are, named after their
+                        table with a ".tb" suffix
+        """
+        self.directory = Path(directory)
+        self._tables: "dict[str, Optional[Table]]" = {}
+        self._slots: "dict[tuple[int, ...], tuple[str, bool, list[int]]]" = {}
+
+    def __enter__(self) -> Tablebases:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close every table file."""
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+    def table(self, name: str) -> Optional[Table]:
+        """Open a table, None if its file doesn't exist."""
+        if name not in self._tables:
+            path = self.directory.joinpath(f"{name}.tb")
+            self._tables[name] = (
+                Table(path, Layout(name)) if path.exists() else None
+            )
+        return self._tables[name]
+
+    def lookup(
+        self, pieces: "tuple[int, ...]", squares: "list[int]", side: int
+    ) -> Optional[int]:
+        """
+        Read the byte of a position from its table.
+
+        Args:
+                pieces: the piece IDs, in any order
+                squares: the cell of every piece
+                side: the active player
+        Return:
+                the byte of the position, None if its table is missing
+        """
+        if len(pieces) == 2:
+            return DRAW
+        found = self._slots.get(pieces)
+        if found is None:
+            name, flip = signature(list(pieces))
+            # the slots of the table are filled by the pieces in its order
+            # (white king, white pieces by value, then black's)
+            order = sorted(
+                range(len(pieces)),
+                key=lambda slot: (
+                    (pieces[slot] < 0) != flip,
+                    -abs(pieces[slot]) % KING,
+                ),
+            )
+            found = self._slots[pieces] = (name, flip, order)
+        name, flip, order = found
+        table = self.table(name)
+        if table is None:
+            return None
+        if flip:
+            cells = [squares[slot] ^ 56 for slot in order]
+            side = -side
+        else:
+            cells = [squares[slot] for slot in order]
+        index = table.layout.index(cells, side)
+        return INVALID if index < 0 else table[index]
+
+    def probe(self, game: Chess) -> Optional[Probe]:
+        """
+        Find the outcome of a position.
+
+        Args:
+                game: the position
+        Return:
+                the outcome for the active player, None if the position
+                has too many pieces, castling rights or an en passant
+                capture, or if its table is missing
+        """
+        cells = game.piece_lists[1] + game.piece_lists[-1]
+        if len(cells) > MAX_PIECES or any(game.castling):
+            return None
+        pieces = tuple(get_piece(game, cell) for cell in cells)
+        squares = [y * 8 + x for x, y in cells]
+        if game.en_passant is not None:
+            x, y = game.en_passant
+            for piece, sq in zip(pieces, squares):
+                if piece == game.player and (
+                    PAWN_ATTACKS[-game.player][y * 8 + x] & BIT[sq]
+                ):
+                    return None
+        byte = self.lookup(pieces, squares, game.player)
+        if byte is None or byte == INVALID:
+            return None
+        return _decode(byte)
+
+    def best_move(self, game: Chess) -> "Optional[tuple[MoveT, Probe]]":
+        """
+        Find the move keeping the best outcome of a position: the quickest
+        mate when winning, a drawing move when drawn and the longest
+        defence when losing.
+
+        Args:
+                game: the position, left untouched
+        Return:
+                the move and the outcome of the position, None if it has no
+                legal move or isn't in the tablebases
+        """
+        probe = self.probe(game)
+        if probe is None:
+            return None
+        best: "Optional[tuple[int, MoveT]]" = None
+        for move in game.get_move_list():
+            game.make_move(*move)
+            reply = self.probe(game)
+            game.unmake_move()
+            if reply is None:
+                return None
+            if reply.wdl != -probe.wdl:
+                continue
+            # quickest mate when winning, longest when losing
+            rank = reply.distance if probe.wdl > 0 else -reply.distance
+            if best is None or rank < best[0]:
+                best = (rank, move)
+        if best is None:
+            return None
+        return best[1], probe
+
+
+def _moves(
+    layout: Layout, squares: "list[int]", side: int
+) -> "list[tuple[int, int, int, int]]":
+    """
+    Generate the legal moves of a position of a table.
+
+    Return:
+            (slot, destination, captured slot or -1, promotion or 0) for
+            every move
+    """
+    pieces = layout.pieces
+    occupied = 0
+    own = 0
+    for slot, sq in enumerate(squares):
+        occupied |= BIT[sq]
+        if (pieces[slot] > 0) == (side > 0):
+            own |= BIT[sq]
+    king = 0 if side == 1 else layout.black_king
+    moves = []
+    for slot, piece in enumerate(pieces):
+        if (piece > 0) != (side > 0):
+            continue
+        sq = squares[slot]
+        if abs(piece) == PAWN:
+            step = -8 * side
+            targets = PAWN_ATTACKS[side][sq] & occupied & ~own
+            ahead = sq + step
+            if not occupied & BIT[ahead]:
+                targets |= BIT[ahead]
+                start = 6 if side == 1 else 1
+                if sq >> 3 == start and not occupied & BIT[ahead + step]:
+                    targets |= BIT[ahead + step]
+        else:
+            targets = _attacks(piece, sq, occupied) & ~own
+        while targets:
+            low = targets & -targets
+            targets ^= low
+            to = low.bit_length() - 1
+            captured = -1
+            if occupied & low:
+                captured = squares.index(to)
+            after = list(squares)
+            after[slot] = to
+            after_occupied = occupied ^ BIT[sq] | low
+            if _attacked(
+                after[king], pieces, after, -side, after_occupied, captured
+            ):
+                continue
+            if abs(piece) == PAWN and (to < 8 or to >= 56):
+                for promotion in PROMOTIONS:
+                    moves.append((slot, to, captured, promotion))
+            else:
+                moves.append((slot, to, captured, 0))
+    return moves
+
+
+def _unmoves(
+    layout: Layout, squares: "list[int]", side: int
+) -> "list[list[int]]":
+    """
+    Generate the placements a position of a table can be reached from by a
+    move of the other player that doesn't capture or promote.
+    """
+    pieces = layout.pieces
+    mover = -side
+    occupied = 0
+    for sq in squares:
+        occupied |= BIT[sq]
+    before = []
+    for slot, piece in enumerate(pieces):
+        if (piece > 0) != (mover > 0):
+            continue
+        sq = squares[slot]
+        if abs(piece) == PAWN:
+            origins = 0
+            back = sq + 8 * mover
+            rank = sq >> 3
+            if 8 <= back < 56 and not occupied & BIT[back]:
+                origins |= BIT[back]
+                if rank == (4 if mover == 1 else 3) and (
+                    not occupied & BIT[back + 8 * mover]
+                ):
+                    origins |= BIT[back + 8 * mover]
+        else:
+            origins = _attacks(piece, sq, occupied) & ~occupied
+        while origins:
+            low = origins & -origins
+            origins ^= low
+            placement = list(squares)
+            placement[slot] = low.bit_length() - 1
+            before.append(placement)
+    return before
+
+
+def generate(
+    name: str,
+    directory: Union[str, Path] = DIRECTORY,
+    verbose: bool = False,
+) -> Path:
+    """
+    Generate a table by retrograde analysis, and the smaller tables it
+    depends on if they are missing.
+
+    Args:
+            name: the name of the table, e.g. "KRKN"
+            directory: where the table files are written
+            verbose: print the progress
+    Return:
+            the path of the table file
+    Raises:
+            ValueError: if the name isn't that of a table
+    """
+    layout = Layout(name)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory.joinpath(f"{layout.name}.tb")
+    if path.exists():
+        return path
+    pieces = layout.pieces
+    for slot in layout.others:
+        rest = [p for s, p in enumerate(pieces) if s != slot]
+        if len(rest) > 2:
+            generate(signature(rest)[0], directory, verbose)
+        if abs(pieces[slot]) == PAWN:
+            for promotion in PROMOTIONS:
+                promoted = list(pieces)
+                promoted[slot] = promotion if pieces[slot] > 0 else -promotion
+                generate(signature(promoted)[0], directory, verbose)
+    if verbose:
+        rprint(f"generating {layout.name} ({layout.size:,} positions)")
+
+    values = bytearray([INVALID]) * layout.size
+    remaining = bytearray(layout.size)
+    "in-table moves not known to lose, of undecided positions"
+
+    longest = bytearray(layout.size)
+    "longest mate against a position, from its moves known to lose"
+
+    escapes = bytearray(layout.size)
+    "a move of the position leads to a draw"
+
+    winning = bytearray([_UNKNOWN]) * layout.size
+    "quickest mate from a capture or promotion"
+
+    buckets: "list[list[tuple[int, bool]]]" = [[] for _ in range(256)]
+    "positions whose mate distance is known, and whether they win"
+
+    with Tablebases(directory) as tablebases:
+        for index in range(layout.size):
+            squares, side = layout.decode(index)
+            if len(set(squares)) < len(squares):
+                continue
+            if layout.index(squares, side) != index:
+                continue  # another number of the same position
+            occupied = 0
+            for sq in squares:
+                occupied |= BIT[sq]
+            enemy_king = layout.black_king if side == 1 else 0
+            if _attacked(squares[enemy_king], pieces, squares, side, occupied):
+                continue
+            values[index] = _UNKNOWN
+            moves = _moves(layout, squares, side)
+            if not moves:
+                king = 0 if side == 1 else layout.black_king
+                if _attacked(squares[king], pieces, squares, -side, occupied):
+                    buckets[0].append((index, False))
+                else:
+                    values[index] = DRAW
+                continue
+            children = set()
+            for slot, to, captured, promotion in moves:
+                after = list(squares)
+                after[slot] = to
+                if captured < 0 and not promotion:
+                    children.add(layout.index(after, -side))
+                    continue
+                moved = list(pieces)
+                if promotion:
+                    moved[slot] = promotion * side
+                if captured >= 0:
+                    del moved[captured]
+                    del after[captured]
+                byte = tablebases.lookup(tuple(moved), after, -side)
+                if byte is None:
+                    raise ValueError(f"Missing tablebase for {moved}.")
+                if byte == DRAW:
+                    escapes[index] = 1
+                elif byte >= LOSS:
+                    winning[index] = min(winning[index], byte - LOSS + 1)
+                else:
+                    longest[index] = max(longest[index], byte + 1)
+            remaining[index] = len(children)
+            if winning[index] != _UNKNOWN:
+                buckets[winning[index]].append((index, True))
+            elif not children and not escapes[index]:
+                buckets[longest[index]].append((index, False))
+            elif not children:
+                values[index] = DRAW
+
+    for distance, bucket in enumerate(buckets):
+        if distance > MAX_DISTANCE and bucket:
+            raise ValueError(f"Mates of {layout.name} are too long.")
+        for index, wins in bucket:
+            if values[index] != _UNKNOWN:
+                continue
+            values[index] = distance if wins else LOSS + distance
+            squares, side = layout.decode(index)
+            parents = set()
+            for placement in _unmoves(layout, squares, side):
+                parents.add(layout.index(placement, -side))
+            for parent in parents:
+                if parent < 0 or values[parent] != _UNKNOWN:
+                    continue
+                if not wins:
+                    buckets[distance + 1].append((parent, True))
+                    continue
+                remaining[parent] -= 1
+                longest[parent] = max(longest[parent], distance + 1)
+                if (
+                    not remaining[parent]
+                    and not escapes[parent]
+                    and winning[parent] == _UNKNOWN
+                ):
+                    buckets[longest[parent]].append((parent, False))
+        bucket.clear()
+
+    for index in range(layout.size):
+        if values[index] == _UNKNOWN:
+            values[index] = DRAW
+    path.write_bytes(bytes(values))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endgame tablebases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generator = commands.add_parser("generate", help="generate tables")
+    generator.add_argument("names", nargs="+", help="tables, e.g. KRKN")
+    generator.add_argument("-d", "--directory", default=str(DIRECTORY))
+    prober = commands.add_parser("probe", help="probe a position")
+    prober.add_argument("fen")
+    prober.add_argument("-d", "--directory", default=str(DIRECTORY))
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for name in args.names:
+            rprint(f"{generate(name, args.directory, verbose=True)}")
+        return
+    game = Chess()
+    if not load_EPD(game, EPDString(args.fen)):
+        raise SystemExit(f"Invalid position {args.fen!r}")
+    with Tablebases(args.directory) as tablebases:
+        found = tablebases.best_move(game)
+        probe = tablebases.probe(game)
+    if probe is None:
+        rprint("not in the tablebases")
+        return
+    outcome = {1: "win", 0: "draw", -1: "loss"}[probe.wdl]
+    line = f"{outcome}"
+    if probe.wdl:
+        line += f", mate in {probe.distance} plies"
+    if found is not None:
+        line += f", best move {san(game, found[0])}"
+    rprint(line)
+
+
+if __name__ == "__main__":
+    main()
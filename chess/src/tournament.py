@@ -0,0 +1,485 @@
+"""
+Self-play tournaments.
+
+Plays games between two engine configurations to tell whether a change to
+the search made the engine stronger. Every opening is played twice, once
+with each engine as white, and games run in parallel worker processes.
+
+Games are adjudicated by the rules of the game itself: checkmate,
+stalemate, the fifty-move rule, threefold repetition and dead positions,
+plus a ply limit for games that drag on. Endings found in the endgame
+tablebases given with `--tablebases` are adjudicated as soon as they occur.
+
+Run it from the `chess` directory with...
+
+`python -m src.tournament --games 20 --engine time=0.1 --engine depth=3`
+
+An engine is written as comma separated settings: `name`, `time` (seconds
+per move), `depth`, `nodes`, `hash` (megabytes), `backend`, `book` (an
+opening book file, played from while it has moves) and `tablebases` (a
+directory of endgame tablebases probed by the search).
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from rich import print as rprint
+from rich.table import Table
+
+from .book import Book
+from .chess import BACKENDS, EPD, Chess
+from .epd import EPDString, load_EPD
+from .notation import san
+from .pgn import write_game
+from .search import MAX_PLY, Limits, Searcher
+from .tablebase import Tablebases
+
+if TYPE_CHECKING:
+    from .chess import BackendT, MoveT
+
+MAX_PLIES = 400
+"Games still going after this many plies are adjudicated a draw"
+
+
+@dataclass
+class Engine:
+    """An engine configuration taking part in a tournament."""
+
+    name: str = "engine"
+    limits: Limits = field(default_factory=lambda: Limits(time=0.1))
+    "budget of the search of every move"
+
+    hash_mb: float = 16
+    "memory cap of the transposition table in megabytes"
+
+    backend: "Optional[BackendT]" = None
+    "move generation backend, the default one if None"
+
+    book: Optional[str] = None
+    "opening book file played from before searching, if any"
+
+    tablebases: Optional[str] = None
+    "directory of the endgame tablebases probed by the search, if any"
+
+    @classmethod
+    def parse(cls, text: str, name: str = "engine") -> "Engine":
+        """
+        Read an engine from comma separated settings.
+
+        Args:
+                text: the settings, e.g. "name=new,time=0.5,hash=32"
+                name: the name of the engine if the settings don't give one
+        Return:
+                the engine
+        Raises:
+                ValueError: if a setting is unknown or has an invalid value
+        """
+        engine = cls(name, Limits(time=None, depth=MAX_PLY))
+        timed = False
+        for setting in filter(None, text.split(",")):
+            key, _, value = setting.partition("=")
+            key = key.strip()
+            value = value.strip()
+            try:
+                if key == "name":
+                    engine.name = value
+                elif key == "time":
+                    engine.limits.time = float(value)
+                    timed = True
+                elif key == "depth":
+                    engine.limits.depth = int(value)
+                elif key == "nodes":
+                    engine.limits.nodes = int(value)
+                elif key == "hash":
+                    engine.hash_mb = float(value)
+                elif key == "backend" and value in BACKENDS:
+                    engine.backend = value  # type: ignore
+                elif key == "book" and value:
+                    engine.book = value
+                elif key == "tablebases" and value:
+                    engine.tablebases = value
+                else:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Invalid engine setting {setting!r}.")
+        if not timed and engine.limits.depth == MAX_PLY and (
+            engine.limits.nodes is None
+        ):
+            engine.limits.time = 0.1
+        return engine
+
+
+@dataclass
+class GameResult:
+    """The outcome of a tournament game."""
+
+    index: int
+    "number of the game in the tournament"
+
+    opening: EPDString
+    "starting position"
+
+    white: int
+    "engine playing white, 0 or 1"
+
+    score: float = 0.5
+    "score of white, 1 for a win, 0.5 for a draw and 0 for a loss"
+
+    reason: str = ""
+    "how the game ended"
+
+    plies: "list[int]" = field(default_factory=lambda: [0, 0])
+    "moves played by each engine"
+
+    time: "list[float]" = field(default_factory=lambda: [0.0, 0.0])
+    "time spent searching by each engine, in seconds"
+
+    nodes: "list[int]" = field(default_factory=lambda: [0, 0])
+    "positions visited by each engine"
+
+    moves: "list[str]" = field(default_factory=list)
+    "moves of the game in SAN"
+
+    @property
+    def first_score(self) -> float:
+        """Score of the first engine."""
+        return self.score if self.white == 0 else 1 - self.score
+
+
+def adjudicate(
+    game: Chess, tablebases: Optional[Tablebases] = None
+) -> "Optional[tuple[float, str]]":
+    """
+    Tell whether a game is over.
+
+    Args:
+            game: the game, kept with `play`
+            tablebases: endgame tablebases deciding the endings they hold
+    Return:
+            the score of white and the reason the game ended, None if it
+            goes on
+    """
+    state = game.get_state()
+    if state.checkmate:
+        return (0.0 if game.player == 1 else 1.0), "checkmate"
+    if state.stalemate:
+        return 0.5, "stalemate"
+    if game._is_dead_position():
+        return 0.5, "dead position"
+    if game._is_threefold_repetition():
+        return 0.5, "threefold repetition"
+    if game._is_fifty_move_rule():
+        return 0.5, "fifty-move rule"
+    if tablebases is not None:
+        probe = tablebases.probe(game)
+        if probe is not None:
+            score = 0.5 + probe.wdl * game.player / 2
+            return score, "tablebase " + ("draw" if probe.wdl == 0 else "win")
+    return None
+
+
+def play(game: Chess, move: MoveT) -> str:
+    """
+    Make a move, keeping the game log.
+
+    Args:
+            game: the game
+            move: the move as a (from, to, promotion) tuple
+    Return:
+            the move in SAN
+    """
+    text = san(game, move)
+    game.log.append(text)
+    game.make_move(*move)
+    return text
+
+
+def play_game(
+    engines: "tuple[Engine, Engine]",
+    opening: EPDString,
+    white: int,
+    index: int = 0,
+    max_plies: int = MAX_PLIES,
+    keep: bool = False,
+    tablebases: Optional[str] = None,
+) -> "tuple[GameResult, Optional[Chess]]":
+    """
+    Play a game between two engines.
+
+    Args:
+            engines: the two engines
+            opening: the starting position
+            white: which engine plays white, 0 or 1
+            index: the number of the game, copied to the result
+            max_plies: the ply limit, after which the game is a draw
+            keep: also return the game itself, e.g. to write it in PGN
+            tablebases: directory of the endgame tablebases adjudicating
+                    the game
+    Return:
+            the outcome of the game and the game if kept
+    """
+    result = GameResult(index, opening, white)
+    game = Chess()
+    if not load_EPD(game, opening):
+        raise ValueError(f"Invalid opening {opening!r}.")
+    game.initial_pos = opening
+    game.players = [engines[white].name, engines[1 - white].name]
+    probes = {
+        path: Tablebases(path)
+        for path in {tablebases, *(engine.tablebases for engine in engines)}
+        if path
+    }
+    searchers = [
+        Searcher(engine.hash_mb, probes.get(engine.tablebases or ""))
+        for engine in engines
+    ]
+    judge = probes.get(tablebases or "")
+    books = [Book(engine.book) if engine.book else None for engine in engines]
+    in_book = [book is not None for book in books]
+    default = game.backend
+    try:
+        for _ in range(max_plies):
+            ended = adjudicate(game, judge)
+            if ended is not None:
+                result.score, result.reason = ended
+                break
+            side = white if game.player == 1 else 1 - white
+            engine = engines[side]
+            game.backend = engine.backend or default
+            book = books[side]
+            move = book.choose(game) if in_book[side] and book else None
+            if move is None:
+                # the engine leaves its book for good
+                in_book[side] = False
+                found = searchers[side].search(game, engine.limits)
+                if found.move is None:
+                    break
+                move = found.move
+                result.time[side] += found.time
+                result.nodes[side] += found.nodes
+            result.plies[side] += 1
+            result.moves.append(play(game, move))
+        else:
+            result.reason = "ply limit"
+    finally:
+        for book in books:
+            if book is not None:
+                book.close()
+        for probe in probes.values():
+            probe.close()
+    return result, game if keep else None
+
+
+def schedule(
+    openings: "list[EPDString]", games: int
+) -> "list[tuple[int, EPDString, int]]":
+    """
+    Pair up games and openings.
+
+    Every opening is played twice in a row with the colours reversed, and
+    the openings are cycled through until there are enough games.
+
+    Args:
+            openings: the starting positions
+            games: the number of games
+    Return:
+            the number, opening and white engine of every game
+    """
+    return [
+        (index, openings[(index // 2) % len(openings)], index % 2)
+        for index in range(games)
+    ]
+
+
+def run_games(
+    engines: "tuple[Engine, Engine]",
+    openings: "list[EPDString]",
+    games: int,
+    workers: Optional[int] = None,
+    max_plies: int = MAX_PLIES,
+    keep: bool = False,
+    tablebases: Optional[str] = None,
+) -> "Iterator[tuple[GameResult, Optional[Chess]]]":
+    """
+    Play the games of a tournament over a pool of worker processes.
+
+    Args:
+            engines: the two engines
+            openings: the starting positions
+            games: the number of games
+            workers: the number of worker processes, defaults to the number
+                    of CPUs. 0 plays the games in this process.
+            max_plies: the ply limit of every game
+            keep: also yield the games themselves
+            tablebases: directory of the endgame tablebases adjudicating
+                    the games
+    Return:
+            an iterator over the outcome of every game, as they finish
+    """
+    planned = schedule(openings, games)
+    if workers == 0:
+        for index, opening, white in planned:
+            yield play_game(
+                engines, opening, white, index, max_plies, keep, tablebases
+            )
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        # games are long, so they are sent to the workers one at a time
+        futures = [
+            pool.submit(
+                play_game,
+                engines,
+                opening,
+                white,
+                index,
+                max_plies,
+                keep,
+                tablebases,
+            )
+            for index, opening, white in planned
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def elo(score: float) -> float:
+    """Return the Elo difference matching an expected score."""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_error(results: Iterable[float]) -> "tuple[float, float]":
+    """
+    Work out the Elo difference of a match and its 95% confidence margin.
+
+    Args:
+            results: the score of the first engine in every game
+    Return:
+            the Elo difference and its error margin
+    """
+    scores = list(results)
+    if not scores:
+        return 0.0, math.inf
+    n = len(scores)
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((s - mean) ** 2 for s in scores) / n)
+    margin = 1.96 * deviation / math.sqrt(n)
+    low, high = elo(mean - margin), elo(mean + margin)
+    return elo(mean), (high - low) / 2
+
+
+def report(
+    engines: "tuple[Engine, Engine]", results: "list[GameResult]"
+) -> Table:
+    """Build the report table of a tournament."""
+    wins = sum(1 for r in results if r.first_score == 1)
+    losses = sum(1 for r in results if r.first_score == 0)
+    draws = len(results) - wins - losses
+    difference, margin = elo_error(r.first_score for r in results)
+    table = Table(
+        title=f"{engines[0].name} vs {engines[1].name}, "
+        f"{len(results)} games"
+    )
+    for column in (
+        "engine", "W", "D", "L", "score", "Elo", "time/move", "nps"
+    ):
+        table.add_column(column, justify="right")
+    for side, (won, lost) in enumerate(((wins, losses), (losses, wins))):
+        plies = sum(r.plies[side] for r in results)
+        spent = sum(r.time[side] for r in results)
+        nodes = sum(r.nodes[side] for r in results)
+        points = won + draws / 2
+        sign = 1 if side == 0 else -1
+        table.add_row(
+            engines[side].name,
+            str(won),
+            str(draws),
+            str(lost),
+            f"{points:g}/{len(results)}",
+            f"{sign * difference:+.0f} ± {margin:.0f}",
+            f"{spent / plies * 1000:.0f}ms" if plies else "-",
+            f"{nodes / spent:,.0f}" if spent else "-",
+        )
+    return table
+
+
+def read_openings(path: Optional[str]) -> "list[EPDString]":
+    """Read the starting positions of a tournament, one EPD or FEN per line."""
+    if path is None:
+        return [EPD]
+    openings = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                openings.append(EPDString(line))
+    if not openings:
+        raise ValueError(f"No openings in {path!r}.")
+    return openings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play tournament")
+    parser.add_argument("-g", "--games", type=int, default=10)
+    parser.add_argument(
+        "-e",
+        "--engine",
+        action="append",
+        default=[],
+        help="engine settings, e.g. name=new,time=0.5 (given twice)",
+    )
+    parser.add_argument("-o", "--openings", help="EPD file of openings")
+    parser.add_argument(
+        "-w", "--workers", type=int, help="worker processes, 0 for none"
+    )
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--pgn", help="PGN file the games are appended to")
+    parser.add_argument(
+        "--tablebases", help="endgame tablebase directory adjudicating games"
+    )
+    args = parser.parse_args()
+    specs = (args.engine + ["", ""])[:2]
+    engines = (
+        Engine.parse(specs[0], "engine1"),
+        Engine.parse(specs[1], "engine2"),
+    )
+    results = []
+    keep = args.pgn is not None
+    for result, game in run_games(
+        engines,
+        read_openings(args.openings),
+        args.games,
+        args.workers,
+        args.max_plies,
+        keep,
+        args.tablebases,
+    ):
+        results.append(result)
+        rprint(
+            f"game {result.index + 1}: "
+            f"{engines[result.white].name} - {engines[1 - result.white].name}"
+            f" {result.score:g}-{1 - result.score:g} ({result.reason})"
+        )
+        if game is not None:
+            write_game(args.pgn, game, {
+                "Event": "Self-play tournament",
+                "Round": str(result.index + 1),
+                "Result": {1.0: "1-0", 0.0: "0-1"}.get(
+                    result.score, "1/2-1/2"
+                ),
+            })
+    rprint(report(engines, results))
+
+
+if __name__ == "__main__":
+    main()
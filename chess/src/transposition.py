@@ -0,0 +1,162 @@
+"""
+Transposition table.
+
+A fixed-size hash table that remembers the result of searching a position,
+so that reaching it again through another move order costs one lookup.
+
+Entries live in two flat arrays of 64-bit integers (16 bytes per entry):
+one holds the zobrist key of the position, the other packs the rest.
+
+    bits  0-15  best move (from cell, to cell, promotion)
+    bits 16-23  depth
+    bits 24-25  bound type
+    bits 26-31  age of the search that stored the entry
+    bits 32-63  score
+
+When two positions share a slot, the stored entry is kept only if it comes
+from the current search and was searched deeper than the new one.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from .bitboard import COORDS
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+
+EXACT = 0
+"The score is exact"
+
+LOWER = 1
+"The score is a lower bound (the search failed high)"
+
+UPPER = 2
+"The score is an upper bound (the search failed low)"
+
+ENTRY_SIZE = 16
+"Bytes used by an entry"
+
+
+class Entry(NamedTuple):
+    """A transposition table entry."""
+
+    depth: int
+    score: int
+    bound: int
+    move: Optional[MoveT]
+
+
+def encode_move(move: Optional[MoveT]) -> int:
+    """Pack a move into 16 bits, 0 standing for no move."""
+    if move is None:
+        return 0
+    (fx, fy), (tx, ty), promotion = move
+    return (fy * 8 + fx) | (ty * 8 + tx) << 6 | promotion << 12 | 1 << 15
+
+
+def decode_move(data: int) -> Optional[MoveT]:
+    """Unpack a move packed with `encode_move`."""
+    if not data & 1 << 15:
+        return None
+    return COORDS[data & 63], COORDS[data >> 6 & 63], data >> 12 & 7
+
+
+class TranspositionTable:
+    """A fixed-size, array-backed transposition table."""
+
+    def __init__(self, size_mb: float = 16):
+        """
+        Args:
+                size_mb: memory cap of the table in megabytes. The number
+                        of entries is rounded down to a power of two.
+        """
+        entries = max(1, int(size_mb * (1 << 20)) // ENTRY_SIZE)
+        self.size = 1 << (entries.bit_length() - 1)
+        "number of entries"
+
+        self.mask = self.size - 1
+        self.keys = array("Q", bytes(8 * self.size))
+        self.data = array("Q", bytes(8 * self.size))
+        self.age = 0
+        "age of the current search"
+
+    def clear(self):
+        """Remove every entry."""
+        self.keys = array("Q", bytes(8 * self.size))
+        self.data = array("Q", bytes(8 * self.size))
+        self.age = 0
+
+    def new_search(self):
+        """Age the entries stored by previous searches."""
+        self.age = (self.age + 1) & 63
+
+    def probe(self, key: int) -> Optional[Entry]:
+        """
+        Look up a position.
+
+        Args:
+                key: the zobrist key of the position
+        Return:
+                the stored entry or None if the position isn't stored
+        """
+        index = key & self.mask
+        if self.keys[index] != key:
+            return None
+        data = self.data[index]
+        score = data >> 32
+        if score >= 1 << 31:
+            score -= 1 << 32
+        return Entry(
+            data >> 16 & 255, score, data >> 24 & 3, decode_move(data & 0xFFFF)
+        )
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: int,
+        bound: int,
+        move: Optional[MoveT],
+    ):
+        """
+        Store the result of searching a position.
+
+        Args:
+                key: the zobrist key of the position
+                depth: the depth the position was searched to
+                score: the score of the position
+                bound: whether the score is EXACT, a LOWER or an UPPER bound
+                move: the best move found, if any
+        """
+        index = key & self.mask
+        old = self.data[index]
+        if (
+            self.keys[index] == key
+            or old >> 26 & 63 != self.age
+            or depth >= old >> 16 & 255
+        ):
+            if move is None and self.keys[index] == key:
+                packed = old & 0xFFFF  # keep the known best move
+            else:
+                packed = encode_move(move)
+            self.keys[index] = key
+            self.data[index] = (
+                packed
+                | min(max(depth, 0), 255) << 16
+                | bound << 24
+                | self.age << 26
+                | (score & 0xFFFFFFFF) << 32
+            )
+
+    def hashfull(self) -> int:
+        """Return how full the table is, in permille of a sample of slots."""
+        sample = min(1000, self.size)
+        used = sum(
+            1
+            for i in range(sample)
+            if self.keys[i] and self.data[i] >> 26 & 63 == self.age
+        )
+        return used * 1000 // sample
@@ -0,0 +1,320 @@
+"""
+Universal Chess Interface.
+
+Speaks the UCI protocol on standard input and output, so the engine can be
+driven by chess GUIs and by match runners such as cutechess-cli. Searches
+run on a background thread, so "stop" and "isready" are answered while the
+engine is thinking.
+
+Run it from the `chess` directory with...
+
+`python -m src.uci`
+
+Supported commands: uci, isready, setoption (Hash, BookFile,
+TablebasePath), ucinewgame, position, go (wtime, btime, winc, binc,
+movestogo, movetime, depth, nodes, infinite), stop and quit. With a BookFile
+set, positions found in the opening book are answered with a book move
+straight away; with a TablebasePath, endings of few pieces are read from
+the endgame tablebases there.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from typing import TYPE_CHECKING, Optional, TextIO
+
+from .book import Book
+from .chess import Chess
+from .epd import EPDString, load_EPD
+from .notation import parse_uci, uci
+from .search import MATE, MAX_PLY, TB_WIN, Limits, Searcher, SearchResult
+from .tablebase import MAX_DISTANCE, Tablebases
+
+if TYPE_CHECKING:
+    from .chess import MoveT
+
+NAME = "codelawani chess"
+AUTHOR = "codelawani"
+
+DEFAULT_HASH = 16
+"Default size of the transposition table in megabytes"
+
+MAX_HASH = 1024
+
+MOVES_TO_GO = 30
+"Moves the remaining time is split over when the GUI doesn't say"
+
+OVERHEAD = 0.05
+"Seconds kept back from every move for communication"
+
+
+def _number(tokens: "list[str]", name: str) -> Optional[int]:
+    """Return the integer following a keyword of a command, if any."""
+    try:
+        return int(tokens[tokens.index(name) + 1])
+    except (ValueError, IndexError):
+        return None
+
+
+def time_budget(
+    remaining: Optional[int],
+    increment: int = 0,
+    moves_to_go: Optional[int] = None,
+) -> Optional[float]:
+    """
+    Work out how long to think about a move.
+
+    Args:
+            remaining: time left on the clock in milliseconds
+            increment: time added to the clock after every move in
+                    milliseconds
+            moves_to_go: moves left until the next time control
+    Return:
+            the time budget in seconds, None if there is no clock
+    """
+    if remaining is None:
+        return None
+    left = remaining / 1000
+    budget = left / (moves_to_go or MOVES_TO_GO) + increment / 1000 * 0.8
+    return max(min(budget, left / 2) - OVERHEAD, 0.01)
+
+
+def score_info(score: int) -> str:
+    """Write a score as the "score" field of an info line."""
+    if abs(score) >= MATE - MAX_PLY:
+        plies = MATE - abs(score)
+    elif abs(score) >= TB_WIN - MAX_DISTANCE:
+        plies = TB_WIN - abs(score)
+    else:
+        return f"cp {score}"
+    moves = (plies + 1) // 2
+    return f"mate {moves if score > 0 else -moves}"
+
+
+class UCI:
+    """A UCI session, reading commands and writing replies."""
+
+    def __init__(
+        self,
+        stdin: Optional[TextIO] = None,
+        stdout: Optional[TextIO] = None,
+    ):
+        """
+        Args:
+                stdin: where commands are read from, standard input if None
+                stdout: where replies are written to, standard output if
+                        None
+        """
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.hash_mb = DEFAULT_HASH
+        self.game = Chess()
+        "position the next search starts from"
+
+        self.tablebases: Optional[Tablebases] = None
+        "endgame tablebases probed by the search, if any"
+
+        self.searcher = Searcher(self.hash_mb)
+        self.book: Optional[Book] = None
+        "opening book consulted before searching, if any"
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def send(self, line: str):
+        """Write a reply, whole, even when the search thread is writing."""
+        with self._lock:
+            self.stdout.write(line + "\n")
+            self.stdout.flush()
+
+    def run(self):
+        """Answer commands until "quit" or the end of the input."""
+        for line in self.stdin:
+            if not self.handle(line):
+                break
+        self.stop()
+        if self.book is not None:
+            self.book.close()
+        if self.tablebases is not None:
+            self.tablebases.close()
+
+    def handle(self, line: str) -> bool:
+        """
+        Answer a command.
+
+        Args:
+                line: the command
+        Return:
+                False if the session is over, True otherwise
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {NAME}")
+            self.send(f"id author {AUTHOR}")
+            self.send(
+                "option name Hash type spin "
+                f"default {DEFAULT_HASH} min 1 max {MAX_HASH}"
+            )
+            self.send("option name BookFile type string default <empty>")
+            self.send(
+                "option name TablebasePath type string default <empty>"
+            )
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            self.searcher = Searcher(self.hash_mb, self.tablebases)
+            self.game = Chess()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            return False
+        return True
+
+    def set_option(self, args: "list[str]"):
+        """Handle "setoption name <id> value <x>"."""
+        if "value" not in args:
+            return
+        split = args.index("value")
+        name = " ".join(args[1:split]).lower()
+        value = " ".join(args[split + 1 :])
+        if name == "hash":
+            try:
+                size = min(max(int(value), 1), MAX_HASH)
+            except ValueError:
+                self.send(f"info string invalid Hash value {value}")
+                return
+            self.stop()
+            self.hash_mb = size
+            self.searcher = Searcher(size, self.tablebases)
+        elif name == "bookfile":
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+            if value and value != "<empty>":
+                try:
+                    self.book = Book(value)
+                except (OSError, ValueError) as error:
+                    self.send(f"info string invalid BookFile {error}")
+        elif name == "tablebasepath":
+            self.stop()
+            if self.tablebases is not None:
+                self.tablebases.close()
+                self.tablebases = None
+            if value and value != "<empty>":
+                self.tablebases = Tablebases(value)
+            self.searcher.tablebases = self.tablebases
+
+    def set_position(self, args: "list[str]"):
+        """Handle "position [startpos | fen <fen>] [moves <move>...]"."""
+        moves: "list[str]" = []
+        if "moves" in args:
+            split = args.index("moves")
+            args, moves = args[:split], args[split + 1 :]
+        game = Chess()
+        if args[:1] == ["fen"]:
+            fen = " ".join(args[1:])
+            if not load_EPD(game, EPDString(fen)):
+                self.send(f"info string invalid position {fen}")
+                return
+        elif args[:1] != ["startpos"]:
+            self.send("info string expected startpos or fen")
+            return
+        for text in moves:
+            try:
+                move = parse_uci(game, text)
+            except ValueError as error:
+                self.send(f"info string {error}")
+                break
+            game.make_move(*move)
+        self.game = game
+
+    def go(self, args: "list[str]"):
+        """Handle "go", starting a search on the background thread."""
+        if self.book is not None and "infinite" not in args:
+            move = self.book.choose(self.game)
+            if move is not None:
+                self.send(f"info string book move {uci(move)}")
+                self.send(f"bestmove {uci(move)}")
+                return
+        white = self.game.player == 1
+        budget = time_budget(
+            _number(args, "wtime" if white else "btime"),
+            _number(args, "winc" if white else "binc") or 0,
+            _number(args, "movestogo"),
+        )
+        movetime = _number(args, "movetime")
+        if movetime is not None:
+            budget = max(movetime / 1000 - OVERHEAD, 0.01)
+        if "infinite" in args:
+            budget = None
+        limits = Limits(
+            budget,
+            min(_number(args, "depth") or MAX_PLY, MAX_PLY),
+            _number(args, "nodes"),
+        )
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._search,
+            args=(self.game, limits, "infinite" in args),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the running search, if any, and wait for its best move."""
+        thread = self._thread
+        if thread is None:
+            return
+        # the searcher clears its stop flag when it starts, so the request
+        # is also checked after every iteration in case it came too early
+        self._stop.set()
+        self.searcher.stop()
+        thread.join()
+        self._thread = None
+
+    def _search(self, game: Chess, limits: Limits, infinite: bool = False):
+        """
+        Search a position and report the best move, on its own thread.
+
+        An infinite search can end early, on a mate or a tablebase hit, but
+        its best move is only sent once "stop" comes, as the protocol asks.
+        """
+
+        def on_iteration(result: SearchResult):
+            pv = f" pv {uci(result.move)}" if result.move else ""
+            self.send(
+                f"info depth {result.depth} score {score_info(result.score)}"
+                f" nodes {result.nodes} nps {result.nps}"
+                f" time {int(result.time * 1000)}{pv}"
+            )
+            if self._stop.is_set():
+                self.searcher.stop()
+
+        result = self.searcher.search(game.copy(), limits, on_iteration)
+        move: Optional[MoveT] = result.move
+        if infinite:
+            self._stop.wait()
+        self.send(f"bestmove {uci(move) if move else '0000'}")
+
+
+def main():
+    UCI().run()
+
+
+if __name__ == "__main__":
+    main()
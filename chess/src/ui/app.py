@@ -8,6 +8,7 @@ from textual.reactive import reactive
 from textual.widget import Widget
 from textual.widgets import Footer, Static, Header, DataTable, Label, TextLog
 
+from ..cache import DEFAULT_SIZE, STATE_CACHE, PositionCache
 from ..chess import EPD, Chess
 from ..epd import CoordT, find_piece, get_EPD, get_loc, get_piece
 from ..game import FILE
@@ -120,10 +121,9 @@ class GameEPD(Static):
 
     def render(self) -> RenderableType:
         epds = [self.epd]
-        move = self.app.game.last_move
-        while move is not None:
-            epds.append(move.epd)
-            move = move.next
+        game = self.app.game.copy()
+        while game.undo_move():
+            epds.append(get_EPD(game))
         return "\n".join(epds)
 
 class Stats(Widget):
@@ -176,6 +176,9 @@ class ChessApp(App):
         Binding("ctrl+r", "update_board", "Refresh Board"),
         Binding("ctrl+q", "request_quit", "Quit Game"),
     ]
+    CACHE_SIZE = DEFAULT_SIZE
+    "number of positions whose legal moves and state are kept"
+    state_cache: PositionCache = STATE_CACHE
     selected_piece: "CoordT | None" = None
     piece_variant: Literal["outline", "filled"] = "filled"
     on_check: bool
@@ -239,6 +242,10 @@ class ChessApp(App):
         self.log(f"is_checkmated: {self.is_checkmated}")
         self.log(f"is_stalemated: {self.is_stalemated}")
         self.log(f"valid_moves: {self.valid_moves}")
+        self.log(
+            f"state cache: {self.state_cache.hits} hits, "
+            f"{self.state_cache.misses} misses"
+        )
 
         self.query("Box.valid").remove_class("valid")
         self.query("Box.check").remove_class("check")
@@ -315,6 +322,7 @@ class ChessApp(App):
     def on_mount(self):
         """Handle mounting the app."""
         self.log("Chess App Started")
+        self.state_cache.maxsize = self.CACHE_SIZE
         if FILE.exists():
             try:
                 old = Chess.load(FILE)
@@ -0,0 +1,61 @@
+"""
+Zobrist hashing of chess positions.
+
+Every (piece, cell) pair, every combination of castling rights, every en
+passant file and the side to move is given a random 64-bit number. The key
+of a position is the XOR of the numbers of everything present in it, so a
+move only needs to XOR out what it removes and XOR in what it adds to keep
+the key up to date.
+
+The numbers come from a fixed seed, which keeps keys stable between runs
+and across saved games.
+"""
+
+from __future__ import annotations
+
+from random import Random
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .epd import BoardT
+
+_random = Random(0x5EED)
+
+PIECES: "list[list[int]]" = [
+    [0 if piece_id == 0 else _random.getrandbits(64) for _ in range(64)]
+    for piece_id in range(-6, 7)
+]
+"Numbers of every piece on every cell, indexed by `piece_id + 6` then by cell"
+
+CASTLING: "list[int]" = [0] + [_random.getrandbits(64) for _ in range(15)]
+"Numbers of the castling rights, indexed by the rights packed as KQkq bits"
+
+EN_PASSANT: "list[int]" = [_random.getrandbits(64) for _ in range(8)]
+"Numbers of the en passant target, indexed by file"
+
+SIDE = _random.getrandbits(64)
+"Number of the black player being on move"
+
+
+def board_key(board: "BoardT") -> int:
+    """
+    Compute the key of the pieces on a board from scratch.
+
+    Args:
+            board: an 8x8 chess board
+    Return:
+            the XOR of the numbers of every piece on its cell
+    """
+    key = 0
+    sq = 0
+    for row in board:
+        for piece in row:
+            if piece:
+                key ^= PIECES[piece + 6][sq]
+            sq += 1
+    return key
+
+
+def castling_index(castling: "list[int]") -> int:
+    """Pack castling control (KQkq) into an index of `CASTLING`."""
+    return castling[0] | castling[1] << 1 | castling[2] << 2 | castling[3] << 3
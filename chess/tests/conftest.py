@@ -0,0 +1,23 @@
+"""
+Shared set-up of the tests.
+
+Run them from the `chess` directory with...
+
+`python -m pytest tests`
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.cache import PositionCache  # noqa: E402
+from src.chess import Chess  # noqa: E402
+
+
+@pytest.fixture
+def no_state_cache(monkeypatch):
+    """Compute every position state, instead of sharing them between tests."""
+    monkeypatch.setattr(Chess, "state_cache", PositionCache(0))
@@ -0,0 +1,88 @@
+"""Positions analysed one at a time and in bulk."""
+
+import pytest
+
+from src.analysis import analyse, analyse_many
+from src.chess import EPD
+from src.search import Limits
+
+MALFORMED = [
+    "8/8/8 w - -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq -",
+    "8/8/8/8/8/8/8/8 w - -",
+    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQQBNR w KQkq -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKKBNR w KQkq -",
+    "rnbqkbnr/ppxppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KX -",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e5",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - hmvc x;",
+    "",
+]
+
+
+def test_start_position():
+    result = analyse(EPD, index=3)
+    assert result.index == 3 and result.error is None
+    assert len(result.moves) == 20
+    assert not (result.check or result.checkmate or result.stalemate)
+    assert not result.draw and result.best_move is None
+
+
+@pytest.mark.parametrize(
+    "epd,check,checkmate,stalemate,draw",
+    [
+        ("k6R/8/1K6/8/8/8/8/8 b - -", True, True, False, False),
+        ("k7/2Q5/1K6/8/8/8/8/8 b - -", False, False, True, False),
+        ("4k3/8/8/8/8/8/8/4KB2 w - -", False, False, False, True),
+        ("4k3/8/8/8/8/8/8/R3K3 w - - 100 80", False, False, False, True),
+        ("4k3/8/8/8/8/8/8/R3K3 w - - 99 80", False, False, False, False),
+    ],
+)
+def test_states(epd, check, checkmate, stalemate, draw):
+    result = analyse(epd)
+    assert result.error is None
+    assert (result.check, result.checkmate, result.stalemate) == (
+        check,
+        checkmate,
+        stalemate,
+    )
+    assert result.draw == draw
+
+
+def test_search():
+    result = analyse("k7/8/1K6/8/8/8/7Q/8 w - -", Limits(None, 3))
+    assert result.best_move in (((7, 6), (7, 0), 0), ((7, 6), (1, 1), 0))
+    assert result.depth >= 1 and result.nodes > 0
+    assert result.score > 10000
+
+
+@pytest.mark.parametrize("epd", MALFORMED)
+def test_malformed(epd):
+    result = analyse(epd)
+    assert result.error is not None
+    assert result.moves == []
+    assert not (result.checkmate or result.stalemate)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_analyse_many(workers):
+    epds = [EPD, MALFORMED[0], "k6R/8/1K6/8/8/8/8/8 b - -"] * 3
+    results = list(analyse_many(epds, workers=workers, chunksize=2))
+    assert [result.index for result in results] == list(range(9))
+    assert [result.error is None for result in results] == [
+        True, False, True
+    ] * 3
+    assert [len(result.moves) for result in results[:3]] == [20, 0, 0]
+
+
+def test_analyse_many_unordered():
+    epds = [EPD] * 7
+    results = analyse_many(epds, workers=2, chunksize=3, ordered=False)
+    assert sorted(result.index for result in results) == list(range(7))
+
+
+def test_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        list(analyse_many([EPD], chunksize=0))
@@ -0,0 +1,69 @@
+"""Vectorized evaluation of many positions at once."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.batch_evaluation import (  # noqa: E402
+    evaluate_epds,
+    evaluate_games,
+)
+from src.chess import EPD, Chess  # noqa: E402
+from src.evaluation import evaluate  # noqa: E402
+
+FENS = [
+    EPD,
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "4k3/8/8/8/8/8/8/4K3 b - -",
+]
+
+
+def test_material_and_squares_match_evaluate():
+    expected = [evaluate(Chess(fen)) for fen in FENS]
+    scores = evaluate_epds(FENS, mobility_terms=False, pawn_terms=False)
+    assert scores.tolist() == expected
+    games = [Chess(fen) for fen in FENS]
+    scores = evaluate_games(games, mobility_terms=False, pawn_terms=False)
+    assert scores.tolist() == expected
+
+
+def test_side_to_move():
+    white, black = evaluate_epds(
+        ["4k3/8/8/8/8/8/8/Q3K3 w - -", "4k3/8/8/8/8/8/8/Q3K3 b - -"]
+    )
+    assert white > 0 and black == -white
+
+
+@pytest.mark.parametrize(
+    "fen,cells,weight",
+    [
+        ("4k3/8/8/8/8/8/8/N3K3 w - -", 2, 4),
+        ("4k3/8/8/8/3B4/8/8/4K3 w - -", 13, 5),
+        ("4k3/8/8/8/8/8/8/R3K3 w - -", 10, 2),
+    ],
+)
+def test_mobility(fen, cells, weight):
+    full = evaluate_epds([fen], pawn_terms=False)[0]
+    base = evaluate_epds([fen], mobility_terms=False, pawn_terms=False)[0]
+    assert full - base == cells * weight
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 4, 1000])
+def test_chunks(chunksize):
+    whole = evaluate_epds(FENS)
+    chunked = evaluate_epds(iter(FENS), chunksize=chunksize)
+    assert chunked.shape == (len(FENS),)
+    assert chunked.tolist() == whole.tolist()
+
+
+def test_no_positions():
+    assert evaluate_epds([]).shape == (0,)
+
+
+@pytest.mark.parametrize("chunksize", [0, -1])
+def test_invalid_chunksize(chunksize):
+    with pytest.raises(ValueError):
+        evaluate_epds(FENS, chunksize=chunksize)
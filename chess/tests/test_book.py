@@ -0,0 +1,100 @@
+"""Opening books built from PGN and probed."""
+
+import io
+import random
+
+import pytest
+
+from src.book import ENTRY, Book, build, pack_move, unpack_move
+from src.chess import Chess
+from src.notation import parse_san
+
+PGN = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Result "1/2-1/2"]
+
+1. e4 c5 2. Nf3 1/2-1/2
+
+[Result "0-1"]
+
+1. d4 d5 0-1
+
+[FEN "8/P6k/8/8/8/8/8/K7 w - - 0 1"]
+[Result "1-0"]
+
+1. a8=N 1-0
+"""
+
+
+def play(game: Chess, *moves: str) -> Chess:
+    for text in moves:
+        game.make_move(*parse_san(game, text))
+    return game
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path.joinpath("book.bin")
+    # moves scoring 0, the losers' and black's in the won game, are left out
+    assert build([io.StringIO(PGN)], path) == 6
+    with Book(path) as book:
+        yield book
+
+
+def test_pack_move():
+    moves = (((4, 6), (4, 4), 0), ((0, 1), (0, 0), 2), ((7, 7), (0, 0), 5))
+    for move in moves:
+        assert unpack_move(pack_move(move)) == move
+
+
+def test_moves(book):
+    game = Chess()
+    assert book.moves(game) == [(parse_san(game, "e4"), 3)]
+    play(game, "e4")
+    assert book.moves(game) == [(parse_san(game, "c5"), 1)]
+    play(game, "c5")
+    assert book.moves(game) == [(parse_san(game, "Nf3"), 1)]
+    play(game, "Nf3")
+    assert book.moves(game) == []
+    game = play(Chess(), "d4")
+    assert book.moves(game) == [(parse_san(game, "d5"), 2)]
+
+
+def test_promotion(book):
+    game = Chess("8/P6k/8/8/8/8/8/K7 w - -")
+    assert book.moves(game) == [(((0, 1), (0, 0), 2), 2)]
+
+
+def test_illegal_moves_are_left_out(tmp_path):
+    game = Chess("8/P6k/8/8/8/8/8/K7 w - -")
+    key = game.zobrist_key
+    path = tmp_path.joinpath("book.bin")
+    path.write_bytes(
+        ENTRY.pack(key, pack_move(((0, 1), (0, 0), 0)), 9)  # no promotion
+        + ENTRY.pack(key, pack_move(((0, 1), (0, 0), 6)), 8)  # to a king
+        + ENTRY.pack(key, pack_move(((0, 7), (0, 5), 0)), 7)  # too far
+        + ENTRY.pack(key, pack_move(((0, 1), (0, 0), 5)), 1)
+    )
+    with Book(path) as book:
+        assert len(book.entries(key)) == 4
+        assert book.moves(game) == [(((0, 1), (0, 0), 5), 1)]
+
+
+def test_choose(book):
+    game = play(Chess(), "e4", "e5")
+    assert book.choose(game, random.Random(1)) == parse_san(game, "Nf3")
+    assert book.choose(play(game, "Nf3")) is None
+
+
+def test_empty_and_invalid_files(tmp_path):
+    empty = tmp_path.joinpath("empty.bin")
+    empty.write_bytes(b"")
+    with Book(empty) as book:
+        assert len(book) == 0
+        assert book.moves(Chess()) == []
+    broken = tmp_path.joinpath("broken.bin")
+    broken.write_bytes(b"\0" * 5)
+    with pytest.raises(ValueError):
+        Book(broken)
@@ -0,0 +1,68 @@
+"""The LRU cache of position states."""
+
+import pytest
+
+from src.cache import STATE_CACHE, PositionCache, PositionState
+from src.chess import Chess
+from src.epd import get_coords
+
+STATE = PositionState(False, False, False, {})
+
+
+def test_bounded():
+    cache = PositionCache(3)
+    for key in range(10):
+        cache.put(key, STATE)
+        assert len(cache) <= 3
+    assert [key in cache for key in range(10)] == [False] * 7 + [True] * 3
+
+
+def test_least_recently_used_goes_first():
+    cache = PositionCache(2)
+    cache.put(1, STATE)
+    cache.put(2, STATE)
+    assert cache.get(1) is STATE
+    cache.put(3, STATE)
+    assert 1 in cache and 2 not in cache and 3 in cache
+
+
+def test_hits_and_misses():
+    cache = PositionCache(2)
+    assert cache.get(1) is None
+    cache.put(1, STATE)
+    assert cache.get(1) is STATE
+    assert cache.get(1) is STATE
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_resize():
+    cache = PositionCache(4)
+    for key in range(4):
+        cache.put(key, STATE)
+    cache.maxsize = 2
+    assert len(cache) == 2 and 2 in cache and 3 in cache
+    with pytest.raises(ValueError):
+        cache.maxsize = -1
+
+
+def test_disabled():
+    cache = PositionCache(0)
+    assert cache.put(1, STATE) is STATE
+    assert len(cache) == 0 and cache.get(1) is None
+
+
+def test_shared_by_games(monkeypatch):
+    cache = PositionCache(16)
+    monkeypatch.setattr(Chess, "state_cache", cache)
+    game = Chess()
+    first = game.get_state()
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert Chess().get_state() is first
+    game.make_move(get_coords("e2"), get_coords("e4"), 0)
+    game.get_state()
+    game.unmake_move()
+    assert game.get_state() is first
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert len(cache) == 2 and STATE_CACHE is not cache
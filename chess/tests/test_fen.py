@@ -0,0 +1,83 @@
+"""FEN clocks, and positions written and read back."""
+
+import pytest
+
+from src.chess import EPD, Chess
+from src.epd import EPDString, get_EPD, get_FEN, load_EPD
+
+FENS = [
+    f"{EPD} 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 37 64",
+    "4k3/8/8/8/8/8/8/4K2R w K - 99 120",
+]
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_fen_round_trip(fen):
+    game = Chess()
+    assert load_EPD(game, EPDString(fen))
+    assert get_FEN(game) == fen
+    assert get_EPD(game) == " ".join(fen.split()[:4])
+
+
+def test_clocks_default_and_operations():
+    game = Chess()
+    assert load_EPD(game, EPDString("8/8/8/4k3/8/8/8/4K2R b K - 12 30"))
+    assert load_EPD(game, EPD)
+    assert (game.halfmove, game.fullmove) == (0, 1)
+    assert load_EPD(game, EPDString(f"{EPD} hmvc 7; fmvn 21;"))
+    assert (game.halfmove, game.fullmove) == (7, 21)
+    assert get_FEN(game) == f"{EPD} 7 21"
+
+
+@pytest.mark.parametrize(
+    "epd",
+    [
+        "8/8/8 w",
+        "8/8/8 w - -",
+        "4k3/8/8/8/8/8/8/4K3 x - -",
+        "4k3/8/8/8/8/8/8/8 w - -",
+        "4k3/8/8/8/8/8/8/4K4 w - -",
+        "4k3/8/8/8/8/8/8/4K2 w - -",
+        "4k3/8/8/8/8/8/8/4K2R w Kx -",
+        "4k3/8/8/8/8/8/8/4K2R w K i3",
+        "4k3/8/8/8/8/8/8/4K2R w K - fmvn two;",
+    ],
+)
+def test_invalid_epd_leaves_the_game(epd):
+    game = Chess(FENS[1])
+    assert not load_EPD(game, EPDString(epd))
+    assert get_FEN(game) == FENS[1]
+
+
+def test_load_replaces_every_piece():
+    game = Chess(FENS[1])
+    assert load_EPD(game, EPDString("4k3/8/8/8/8/8/8/4K3 w - -"))
+    assert game.piece_lists == {1: [(4, 7)], -1: [(4, 0)]}
+    assert get_FEN(game) == "4k3/8/8/8/8/8/8/4K3 w - - 0 1"
+
+
+def test_clocks_follow_the_moves():
+    game = Chess(EPDString(f"{EPD} 0 1"))
+    game.make_move((6, 7), (5, 5))  # Nf3
+    assert (game.halfmove, game.fullmove) == (1, 1)
+    game.make_move((6, 0), (5, 2))  # Nf6
+    assert (game.halfmove, game.fullmove) == (2, 2)
+    game.make_move((4, 6), (4, 4))  # e4
+    assert (game.halfmove, game.fullmove) == (0, 2)
+    game.make_move((5, 2), (4, 4))  # Nxe4
+    assert (game.halfmove, game.fullmove) == (0, 3)
+    for clocks in ((0, 2), (2, 2), (1, 1), (0, 1)):
+        game.unmake_move()
+        assert (game.halfmove, game.fullmove) == clocks
+
+
+def test_fifty_move_rule():
+    game = Chess()
+    load_EPD(game, EPDString("4k3/8/8/8/8/8/8/4K2R w K - 99 120"))
+    assert not game._is_fifty_move_rule()
+    game.make_move((7, 7), (7, 3))
+    assert game._is_fifty_move_rule()
+    assert not game._is_seventy_five_move_rule()
@@ -0,0 +1,63 @@
+"""The flat move history, and the nested one of older saves."""
+
+import json
+from pathlib import Path
+
+from src.chess import EPD, Chess
+from src.epd import get_EPD
+
+LEGACY = Path(__file__).parent / "data" / "legacy_game.json"
+"A game.json written before the history was flattened"
+
+MOVES = [
+    ("e2", "e4"),
+    ("a7", "a6"),
+    ("e4", "e5"),
+    ("d7", "d5"),
+    ("e5", "d6"),
+    ("c7", "d6"),
+    ("d1", "g4"),
+    ("c8", "g4"),
+]
+"The moves of the legacy game, with an en passant capture and two more"
+
+
+def play() -> Chess:
+    game = Chess()
+    for start, end in MOVES:
+        game.move(start, end)
+        game.switch_player()
+    return game
+
+
+def test_round_trip():
+    game = play()
+    data = json.loads(json.dumps(game.serialize()))
+    assert len(data["history"]["moves"]) == len(MOVES)
+    loaded = Chess.deserialize(data)
+    assert list(loaded.history) == list(game.history)
+    assert get_EPD(loaded) == get_EPD(game)
+
+
+def test_legacy_save():
+    with LEGACY.open() as f:
+        data = json.load(f)
+    assert "history" not in data
+    game = Chess.deserialize(data)
+    played = play()
+    assert len(game.history) == len(MOVES)
+    assert list(game.history) == [
+        ply._replace(halfmove=0) for ply in played.history
+    ]
+    assert game.fullmove == played.fullmove
+
+    # every undo goes back to the position the old save stored
+    node = data["last_move"]
+    while node is not None:
+        assert game.undo_move()
+        assert get_EPD(game) == node["epd"]
+        assert game.log == node["log"]
+        assert [game.captured[1], game.captured[-1]] == node["captured"]
+        node = node["next"]
+    assert not game.undo_move()
+    assert get_EPD(game) == EPD
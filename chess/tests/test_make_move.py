@@ -0,0 +1,74 @@
+"""make_move/unmake_move, checked against positions built from scratch."""
+
+import random
+
+import pytest
+
+from src.bitboard import Bitboards
+from src.chess import Chess
+from src.epd import get_FEN, index_pieces
+
+POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq -",
+]
+
+
+def check_pieces(game: Chess):
+    """Check the piece lists and bitboards against the board."""
+    lists = {side: sorted(cells) for side, cells in game.piece_lists.items()}
+    kings = dict(game.kings)
+    index_pieces(game)
+    assert lists == {s: sorted(c) for s, c in game.piece_lists.items()}
+    assert kings == game.kings
+    if game._bitboards_key == game.board_key:
+        cached = game._bitboards
+        built = Bitboards.from_game(game)
+        assert cached.pieces == built.pieces
+        assert cached.sides == built.sides
+        assert cached.occupied == built.occupied
+
+
+@pytest.mark.parametrize("backend", ("board", "bitboard", "mailbox"))
+@pytest.mark.parametrize("epd", POSITIONS)
+def test_unmake_restores_the_position(backend, epd):
+    rng = random.Random(epd)
+    for _ in range(10):
+        game = Chess(epd, backend=backend)
+        fens = []
+        for _ in range(30):
+            moves = game.get_move_list()
+            if not moves:
+                break
+            fens.append((get_FEN(game), game.zobrist_key))
+            game.make_move(*rng.choice(moves))
+            game.get_state()
+            check_pieces(game)
+        while fens:
+            game.unmake_move()
+            assert (get_FEN(game), game.zobrist_key) == fens.pop()
+            check_pieces(game)
+        assert game.unmake_move() is None
+
+
+def test_make_move_records():
+    game = Chess(POSITIONS[1])
+    record = game.make_move((4, 7), (6, 7))  # castling
+    assert game.board[7][5] == 4 and game.board[7][7] == 0
+    assert game.castling[:2] == [0, 0]
+    assert record.castling[:2] == (1, 1)
+    game.unmake_move()
+    assert game.board[7][7] == 4 and game.castling[:2] == [1, 1]
+
+
+def test_promotion_and_en_passant():
+    game = Chess("4k3/1P6/8/8/3pP3/8/8/4K3 b - e3")
+    game.make_move((3, 4), (4, 5))  # d4xe3 en passant
+    assert game.board[4][4] == 0 and game.board[5][4] == -1
+    game.make_move((1, 1), (1, 0), 3)  # b8=B
+    assert game.board[0][1] == 3
+    game.unmake_move()
+    game.unmake_move()
+    assert get_FEN(game) == "4k3/1P6/8/8/3pP3/8/8/4K3 b - e3 0 1"
@@ -0,0 +1,82 @@
+"""Moves written and read in SAN and in UCI notation."""
+
+import random
+
+import pytest
+
+from src.chess import EPD, Chess
+from src.notation import parse_move, parse_san, parse_uci, san, uci
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -"
+PROMOTIONS = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 b kq -"
+
+
+@pytest.mark.parametrize("epd", (EPD, KIWIPETE, PROMOTIONS))
+def test_every_move_round_trips(epd):
+    rng = random.Random(epd)
+    game = Chess(epd)
+    for _ in range(20):
+        moves = game.get_move_list()
+        if not moves:
+            break
+        for move in moves:
+            assert parse_san(game, san(game, move)) == move
+            assert parse_uci(game, uci(move)) == move
+            assert parse_move(game, uci(move)) == move
+        game.make_move(*rng.choice(moves))
+
+
+@pytest.mark.parametrize(
+    "epd,text,move",
+    [
+        (EPD, "Nf3", ((6, 7), (5, 5), 0)),
+        (KIWIPETE, "O-O", ((4, 7), (6, 7), 0)),
+        (KIWIPETE, "0-0-0", ((4, 7), (2, 7), 0)),
+        (KIWIPETE, "dxe6", ((3, 3), (4, 2), 0)),
+        (KIWIPETE, "Nxf7", ((4, 3), (5, 1), 0)),
+        (PROMOTIONS, "bxa1=N", ((1, 6), (0, 7), 2)),
+        (PROMOTIONS, "b1=Q+", ((1, 6), (1, 7), 5)),
+        ("4k3/8/8/8/8/8/4K3/R6R w - -", "Rad1", ((0, 7), (3, 7), 0)),
+        ("4k3/8/8/N7/8/N7/8/4K3 w - -", "N5b3", ((0, 3), (1, 5), 0)),
+    ],
+)
+def test_parse_san(epd, text, move):
+    assert parse_san(Chess(epd), text) == move
+
+
+def test_san_suffixes():
+    game = Chess()
+    for text in ("f3", "e5", "g4"):
+        game.make_move(*parse_san(game, text))
+    mate = parse_san(game, "Qh4#")
+    assert san(game, mate) == "Qh4#"
+    assert san(game, mate, suffix=False) == "Qh4"
+    assert san(Chess(KIWIPETE), parse_san(Chess(KIWIPETE), "Qxf6")) == "Qxf6"
+    assert uci(((1, 6), (0, 7), 2)) == "b2a1n"
+    rooks = Chess("4k3/8/8/8/8/8/4K3/R6R w - -")
+    assert san(rooks, ((7, 7), (3, 7), 0)) == "Rhd1"
+
+
+@pytest.mark.parametrize(
+    "epd,text",
+    [
+        (EPD, "Ke2"),
+        (EPD, "e5"),
+        (EPD, "O-O"),
+        (EPD, "Zz9"),
+        ("4k3/8/8/8/8/8/4K3/R6R w - -", "Rd1"),
+        (PROMOTIONS, "b1"),
+    ],
+)
+def test_parse_san_errors(epd, text):
+    with pytest.raises(ValueError):
+        parse_san(Chess(epd), text)
+
+
+@pytest.mark.parametrize(
+    "epd,text",
+    [(EPD, "e2e5"), (EPD, "e2e4q"), (EPD, "i2i4"), (PROMOTIONS, "b2b1")],
+)
+def test_parse_uci_errors(epd, text):
+    with pytest.raises(ValueError):
+        parse_uci(Chess(epd), text)
@@ -0,0 +1,51 @@
+"""Move generation, checked against the reference perft counts."""
+
+import pytest
+
+from src.chess import Chess
+from src.epd import get_FEN
+
+BACKENDS = ("board", "bitboard", "mailbox")
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -"
+
+POSITIONS = [
+    # start position
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -", [20, 400, 8902]),
+    # castling, en passant and promotions
+    (KIWIPETE, [48, 2039]),
+    # en passant discovering checks along the rank
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -", [14, 191, 2812]),
+    # promotions with capture, castling out of reach
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq -", [6, 264]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ -", [44, 1486]),
+]
+
+
+@pytest.mark.usefixtures("no_state_cache")
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("epd,counts", POSITIONS)
+def test_perft(backend, epd, counts):
+    game = Chess(epd, backend=backend)
+    for depth, count in enumerate(counts, 1):
+        assert game.perft(depth) == count
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_divide(backend):
+    game = Chess(KIWIPETE, backend=backend)
+    divide = game.divide(2)
+    assert len(divide) == 48
+    assert sum(divide.values()) == 2039
+    assert divide["e1g1"] == 43  # castling
+    assert divide["d5e6"] == 46
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_perft_leaves_the_game_untouched(backend):
+    game = Chess(KIWIPETE, backend=backend)
+    key, fen = game.zobrist_key, get_FEN(game)
+    game.perft(2)
+    assert game.zobrist_key == key
+    assert get_FEN(game) == fen
+    assert not game.undo_stack
@@ -0,0 +1,79 @@
+"""PGN files read, replayed and written back."""
+
+import io
+
+import pytest
+
+from src.chess import Chess
+from src.epd import EPDString, get_FEN, load_EPD
+from src.pgn import load_games, read_games, write_game
+
+PGN = """[Event "Casual \\"blitz\\" game"]
+[White "Alice"]
+[Black "Bob"]
+[Result "1-0"]
+
+1. e4 {a comment
+over two lines} e5 2. Qh5 (2. Nf3 Nc6 (2... d6) 3. Bb5) Nc6 $1
+3. Bc4 Nf6?? ; a rest-of-line comment
+4. Qxf7# 1-0
+
+[Event "Second"]
+[SetUp "1"]
+[FEN "4k3/8/8/8/8/8/4P3/4K3 b - - 3 40"]
+
+40... Kd7 41. e4 *
+"""
+
+
+def test_read_games():
+    first, second = read_games(io.StringIO(PGN))
+    assert first.headers["Event"] == 'Casual "blitz" game'
+    assert first.moves == ["e4", "e5", "Qh5", "Nc6", "Bc4", "Nf6??", "Qxf7#"]
+    assert first.result == "1-0"
+    assert second.moves == ["Kd7", "e4"]
+    assert second.result == "*"
+    assert second.start == "4k3/8/8/8/8/8/4P3/4K3 b - -"
+
+
+def test_replay():
+    first, second = load_games(io.StringIO(PGN))
+    assert first.get_state().checkmate
+    assert first.players == ["Alice", "Bob"]
+    assert get_FEN(second) == "8/3k4/8/8/4P3/8/8/4K3 b - e3 0 41"
+
+
+def test_illegal_move():
+    with pytest.raises(ValueError, match="Ply 3"):
+        list(load_games(io.StringIO("1. e4 e5 2. Ke3 *")))
+
+
+@pytest.mark.parametrize(
+    "fen,text",
+    [
+        (None, "1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0"),
+        ("4k3/8/8/8/8/8/4P3/4K3 b - - 3 40", "40... Kd7 41. e4 Ke6 *"),
+    ],
+)
+def test_write_round_trip(fen, text):
+    source = f'[FEN "{fen}"]\n\n{text}\n' if fen else text
+    (game,) = load_games(io.StringIO(source))
+    target = io.StringIO()
+    write_game(target, game, {"Event": "Test"})
+    written = target.getvalue()
+    assert text in written.replace("\n", " ")
+    assert ('[SetUp "1"]' in written) == bool(fen)
+    (again,) = read_games(io.StringIO(written))
+    assert again.headers["Event"] == "Test"
+    assert get_FEN(again.replay()) == get_FEN(game)
+
+
+def test_write_moves_from_history():
+    game = Chess()
+    load_EPD(game, EPDString("4k3/8/8/8/8/8/4P3/4K3 w - - 0 12"))
+    for start, end in (("e2", "e4"), ("e8", "d7")):
+        game.move(start, end, dummy=True)
+        game.switch_player()
+    target = io.StringIO()
+    write_game(target, game)
+    assert "12. e4 Kd7 *" in target.getvalue()
@@ -0,0 +1,54 @@
+"""Repetitions counted on the stack of position keys."""
+
+from src.chess import Chess
+from src.epd import get_coords
+
+SHUFFLE = (("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8"))
+
+
+def shuffle(game: Chess, times: int):
+    """Play the knights out and back `times` times, with make_move."""
+    for _ in range(times):
+        for start, end in SHUFFLE:
+            game.make_move(get_coords(start), get_coords(end), 0)
+
+
+def test_threefold_and_fivefold():
+    game = Chess()
+    assert game.repetitions() == 1
+    shuffle(game, 1)
+    assert game.repetitions() == 2
+    assert not game._is_threefold_repetition()
+    shuffle(game, 1)
+    assert game._is_threefold_repetition()
+    assert not game._is_fivefold_repetition()
+    shuffle(game, 2)
+    assert game.repetitions() == 5
+    assert game._is_fivefold_repetition()
+    for _ in range(4):
+        game.unmake_move()
+    assert game.repetitions() == 4
+    assert len(game.key_stack) == 13
+
+
+def test_repetitions_after_pawn_moves():
+    game = Chess()
+    shuffle(game, 1)
+    game.make_move(get_coords("e2"), get_coords("e3"), 0)
+    game.make_move(get_coords("e7"), get_coords("e6"), 0)
+    shuffle(game, 1)
+    assert game.repetitions() == 2
+
+
+def test_repetitions_with_the_move_history():
+    game = Chess()
+    for _ in range(2):
+        for start, end in SHUFFLE:
+            game.move(start, end, dummy=True)
+            game.switch_player()
+    assert game._is_threefold_repetition()
+    game.undo_move()
+    assert game.repetitions() == 2
+    copy = Chess.deserialize(game.serialize())
+    assert copy.key_stack == game.key_stack
+    assert copy.repetitions() == 2
@@ -0,0 +1,164 @@
+"""Alpha-beta search and its transposition table."""
+
+import threading
+import time
+
+import pytest
+
+from src.chess import EPD, Chess
+from src.epd import get_EPD
+from src.search import MATE, Limits, Searcher
+from src.transposition import (
+    EXACT,
+    LOWER,
+    UPPER,
+    TranspositionTable,
+    decode_move,
+    encode_move,
+)
+
+MATE_IN_1 = "k7/8/1K6/8/8/8/7Q/8 w - -"
+MATE_IN_2 = "3k4/8/4K3/8/8/8/8/7R w - -"
+
+
+def test_mate_in_one():
+    result = Searcher().search(Chess(MATE_IN_1), Limits(None, 2))
+    assert result.move == ((7, 6), (7, 0), 0)
+    assert result.score == MATE - 1
+
+
+def test_mate_in_two():
+    game = Chess(MATE_IN_2)
+    assert Searcher().search(game, Limits(None, 2)).score < MATE - 100
+    result = Searcher().search(game, Limits(None, 3))
+    assert result.score == MATE - 3
+    game.make_move(*result.move)
+    for reply in game.get_move_list():
+        game.make_move(*reply)
+        mate = Searcher().search(game, Limits(None, 1))
+        game.make_move(*mate.move)
+        assert game.get_state().checkmate
+        game.unmake_move()
+        game.unmake_move()
+
+
+def test_quiescence_sees_mate_in_check():
+    # Rxa8 is mate, which standing pat on the material won would miss
+    game = Chess("r5k1/5ppp/8/8/8/8/5PPP/R3Q1K1 w - -")
+    result = Searcher().search(game, Limits(None, 1))
+    assert result.move == ((0, 7), (0, 0), 0)
+    assert result.score == MATE - 1
+
+
+def test_no_legal_move():
+    result = Searcher().search(Chess("k7/2Q5/1K6/8/8/8/8/8 b - -"))
+    assert result.move is None and result.nodes == 0
+
+
+def test_position_left_untouched():
+    game = Chess(EPD)
+    key, epd = game.zobrist_key, get_EPD(game)
+    Searcher().search(game, Limits(None, 3))
+    assert game.zobrist_key == key and get_EPD(game) == epd
+
+
+def test_depth_limit():
+    depths = []
+    result = Searcher().search(
+        Chess(EPD), Limits(None, 3), lambda r: depths.append(r.depth)
+    )
+    assert depths == [1, 2, 3] and result.depth == 3
+
+
+def test_node_limit():
+    result = Searcher().search(Chess(EPD), Limits(None, 100, 3000))
+    assert result.move is not None
+    assert result.nodes < 3000 + 1024
+
+
+def test_time_limit():
+    start = time.perf_counter()
+    result = Searcher().search(Chess(EPD), Limits(0.3))
+    assert time.perf_counter() - start < 1.5
+    assert result.move is not None and result.depth >= 1
+
+
+def test_stop_after_iteration():
+    searcher = Searcher()
+
+    def on_iteration(result):
+        if result.depth == 2:
+            searcher.stop()
+
+    result = searcher.search(Chess(EPD), Limits(None, 100), on_iteration)
+    assert result.depth == 2 and searcher.stopped
+
+
+def test_stop_from_another_thread():
+    searcher = Searcher()
+    timer = threading.Timer(0.3, searcher.stop)
+    start = time.perf_counter()
+    timer.start()
+    result = searcher.search(Chess(EPD), Limits(None, 100))
+    timer.join()
+    assert time.perf_counter() - start < 2
+    assert result.move is not None and searcher.stopped
+
+
+def test_table_reused_between_searches():
+    searcher = Searcher()
+    game = Chess(EPD)
+    first = searcher.search(game, Limits(None, 4))
+    second = searcher.search(game, Limits(None, 4))
+    assert second.move == first.move
+    assert second.nodes < first.nodes
+
+
+@pytest.mark.parametrize(
+    "move",
+    [None, ((4, 6), (4, 4), 0), ((0, 1), (0, 0), 5), ((7, 0), (0, 7), 0)],
+)
+def test_encode_move(move):
+    assert decode_move(encode_move(move)) == move
+
+
+def test_table_store_and_probe():
+    tt = TranspositionTable(1)
+    assert tt.size == (1 << 20) // 16
+    move = ((6, 7), (5, 5), 0)
+    tt.store(12345, 7, -321, UPPER, move)
+    entry = tt.probe(12345)
+    assert entry is not None
+    assert (entry.depth, entry.score, entry.bound, entry.move) == (
+        7,
+        -321,
+        UPPER,
+        move,
+    )
+    assert tt.probe(12345 + tt.size) is None
+    tt.store(12345, 8, MATE - 5, LOWER, None)
+    assert tt.probe(12345).move == move
+    assert tt.probe(12345).score == MATE - 5
+    tt.clear()
+    assert tt.probe(12345) is None
+
+
+def test_table_replacement():
+    tt = TranspositionTable(1)
+    deep, shallow = 5, 5 + tt.size
+    tt.store(deep, 6, 10, EXACT, None)
+    tt.store(shallow, 2, 20, EXACT, None)
+    assert tt.probe(deep) is not None and tt.probe(shallow) is None
+    tt.new_search()
+    tt.store(shallow, 2, 20, EXACT, None)
+    assert tt.probe(deep) is None and tt.probe(shallow) is not None
+
+
+def test_hashfull():
+    tt = TranspositionTable(1)
+    assert tt.hashfull() == 0
+    for key in range(1, 501):
+        tt.store(key, 1, 0, EXACT, None)
+    assert tt.hashfull() == 500
+    tt.new_search()
+    assert tt.hashfull() == 0
@@ -0,0 +1,126 @@
+"""Games saved to the binary store and loaded back."""
+
+import pytest
+
+from src.chess import Chess
+from src.epd import EPDString, get_coords, get_FEN, load_EPD
+from src.game import Game
+from src.store import MIN_CAPACITY, GameStore
+
+# captures, a promotion, castling and an en passant capture
+MOVES = [
+    ("e2", "e4"), ("d7", "d5"), ("e4", "d5"), ("g8", "f6"),
+    ("f1", "b5"), ("c7", "c6"), ("d5", "c6"), ("d8", "b6"),
+    ("c6", "b7"), ("b8", "d7"), ("b7", "a8"), ("e7", "e5"),
+    ("g1", "f3"), ("f8", "d6"), ("e1", "g1"), ("e5", "e4"),
+    ("d2", "d4"), ("e4", "d3"),
+]
+
+
+def play(game: Chess, moves) -> Chess:
+    """Play moves like the UI does, promoting pawns to queens."""
+    for start, end in moves:
+        cells = get_coords(start), get_coords(end)
+        assert cells[1] in game.get_state().legal_moves[cells[0]]
+        game.move(start, end)
+        if game._is_pawn_promotion():
+            game.promote_pawn(5)
+        game.switch_player()
+    return game
+
+
+@pytest.fixture
+def store(tmp_path):
+    with GameStore(tmp_path.joinpath("games.bin")) as store:
+        yield store
+
+
+def test_round_trip(store):
+    game = play(Chess(), MOVES)
+    game.players = ["Alice", "Bob"]
+    store.save(1, game)
+    loaded = store.load(1, Chess)
+    assert get_FEN(loaded) == get_FEN(game)
+    assert loaded.log[-8:] == [
+        "bxa8=Q", "e5", "Nf3", "Bd6", "O-O", "e4", "d4", "exd3"
+    ]
+    assert loaded.log == [move.rstrip("+#") for move in game.log]
+    assert loaded.players == game.players
+    assert loaded.captured == game.captured
+    assert loaded.key_stack == game.key_stack
+    assert list(loaded.history) == list(game.history)
+    assert store.get_EPD(1) == " ".join(get_FEN(game).split()[:4])
+    assert store.get_FEN(1) == get_FEN(game)
+    while game.undo_move():
+        assert loaded.undo_move()
+        assert get_FEN(loaded) == get_FEN(game)
+    assert not loaded.undo_move()
+
+
+def test_clocks_are_kept(store):
+    game = Chess()
+    load_EPD(game, EPDString("4k3/8/8/8/8/8/8/R3K3 w Q - 7 40"))
+    game.initial_pos = EPDString("4k3/8/8/8/8/8/8/R3K3 w Q -")
+    store.save(1, game)
+    assert get_FEN(store.load(1, Chess)) == get_FEN(game)
+    play(game, [("a1", "a7"), ("e8", "d8"), ("a7", "a6")])
+    store.save(1, game)
+    loaded = store.load(1, Chess)
+    assert get_FEN(loaded) == "3k4/8/R7/8/8/8/8/4K3 b - - 10 41"
+    for _ in range(3):
+        loaded.undo_move()
+    assert get_FEN(loaded) == "4k3/8/8/8/8/8/8/R3K3 w Q - 7 40"
+
+
+def test_save_again_and_grow(store):
+    game = Chess()
+    shuffle = [("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8")]
+    play(game, shuffle)
+    store.save(7, game)
+    offset = store.offsets[7]
+    play(game, shuffle * (MIN_CAPACITY // 4))
+    store.save(7, game)
+    assert store.offsets[7] != offset  # moved to a bigger record
+    loaded = store.load(7, Chess)
+    assert len(loaded.history) == len(game.history)
+    assert loaded._is_fivefold_repetition()
+
+
+def test_plain_game_loads(store):
+    play(Chess(), MOVES[:4]).save_by_id(3, store)
+    game = Game.load_by_id(3, store)
+    assert type(game) is Game
+    assert len(game.history) == 4
+    assert get_FEN(game) == store.get_FEN(3)
+
+
+def test_delete_compact_and_reopen(store):
+    for game_id in range(3):
+        store.save(game_id, play(Chess(), MOVES[: 4 + game_id]))
+    store.delete(1)
+    assert 1 not in store and len(store) == 2
+    store.compact()
+    with pytest.raises(KeyError):
+        store.load(1, Chess)
+    fen = store.get_FEN(2)
+    store.close()
+    with GameStore(store.path) as reopened:
+        assert sorted(reopened.offsets) == [0, 2]
+        assert get_FEN(reopened.load(2, Chess)) == fen
+
+
+def test_empty_store(store):
+    assert len(store) == 0
+    store.compact()
+    with pytest.raises(KeyError):
+        store.load(1, Chess)
+    with pytest.raises(KeyError):
+        store.get_FEN(1)
+    game = play(Chess(), MOVES[:2])
+    store.save(1, game)
+    store.delete(1)
+    store.compact()
+    assert store.path.stat().st_size == 0
+    store.compact()
+    store.save(2, game)
+    assert get_FEN(store.load(2, Chess)) == get_FEN(game)
@@ -0,0 +1,97 @@
+"""EPD operations and the test suite runner."""
+
+import pytest
+
+from src.chess import Chess
+from src.epd import (EPDString, format_operations, get_EPD, get_FEN,
+                     load_EPD, parse_operations)
+from src.suite import run, run_position
+
+MATE = "k7/8/1K6/8/8/8/7Q/8 w - -"
+
+
+def test_parse_operations():
+    operations = parse_operations(
+        'bm Nf3 Ng5; am Qxb7; id "WAC.001; the first"; hmvc 4; fmvn 12; c0;'
+    )
+    assert operations == {
+        "bm": "Nf3 Ng5",
+        "am": "Qxb7",
+        "id": "WAC.001; the first",
+        "hmvc": "4",
+        "fmvn": "12",
+        "c0": "",
+    }
+    assert parse_operations(format_operations(operations)) == operations
+
+
+@pytest.mark.parametrize(
+    "text", ['id "open;', "1bm e4;", "b-m e4;", "hmvc x;", "acd 1.5;"]
+)
+def test_invalid_operations(text):
+    with pytest.raises(ValueError):
+        parse_operations(text)
+
+
+def test_operations_of_a_position():
+    game = Chess()
+    assert load_EPD(
+        game, EPDString(f'{MATE} bm Qh8#; id "mate"; hmvc 3; fmvn 50;')
+    )
+    assert game.epd_operations["bm"] == "Qh8#"
+    assert get_FEN(game) == f"{MATE} 3 50"
+    assert get_EPD(game, game.epd_operations) == (
+        f'{MATE} bm Qh8#; id "mate"; hmvc 3; fmvn 50;'
+    )
+    assert not load_EPD(game, EPDString(f'{MATE} id "open;'))
+
+
+def test_solved():
+    result = run_position(
+        EPDString(f'{MATE} bm Qh8# Qb8+; id "mate";'), depth=3
+    )
+    assert result.error is None
+    assert result.id == "mate"
+    assert result.expected == "bm Qh8# Qb8+"
+    assert result.solved and result.found == "Qh8#"
+    assert result.solution_time is not None
+    assert result.depth >= 1 and result.nodes > 0
+
+
+def test_avoided():
+    result = run_position(EPDString(f"{MATE} am Qh8#;"), depth=3)
+    assert result.error is None
+    assert not result.solved and result.found == "Qh8#"
+    assert result.solution_time is None
+
+
+@pytest.mark.parametrize(
+    "epd,error",
+    [
+        ("8/8/8 w - - bm e4;", "Invalid EPD"),
+        (f"{MATE[:-6]} x - - bm Qh8#;", "Invalid EPD"),
+        (f"{MATE} id x;", "No bm or am operation"),
+        (f"{MATE} bm Qh9;", "Invalid move 'Qh9'."),
+        (f"{MATE} bm Ka1;", "Illegal move 'Ka1'."),
+    ],
+)
+def test_errors(epd, error):
+    result = run_position(EPDString(epd), depth=2)
+    assert result.error == error
+    assert not result.solved and result.nodes == 0
+
+
+def test_run(tmp_path):
+    suite = tmp_path.joinpath("suite.epd")
+    suite.write_text(
+        f"# a comment\n{MATE} bm Qh8#;\n\n8/8/8 w - - bm e4;\n"
+        f"{MATE} am Qh8#;\n"
+    )
+    output = tmp_path.joinpath("out.epd")
+    results = run(str(suite), depth=2, output=str(output))
+    assert [r.solved for r in results] == [True, False, False]
+    assert results[1].error == "Invalid EPD"
+    lines = output.read_text().splitlines()
+    assert lines[0].startswith(f"{MATE} bm Qh8#; acd ")
+    assert " ce " in lines[0]
+    assert lines[1] == "8/8/8 w - - bm e4;"
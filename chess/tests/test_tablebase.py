@@ -0,0 +1,87 @@
+"""Endgame tablebases generated and probed."""
+
+import pytest
+
+from src.chess import Chess
+from src.tablebase import INVALID, LOSS, Probe, Tablebases, generate
+
+
+@pytest.fixture(scope="module")
+def tablebases(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tablebases")
+    for name in ("KQK", "KRK"):
+        generate(name, directory)
+    with Tablebases(directory) as tablebases:
+        yield tablebases
+
+
+@pytest.mark.parametrize("name,longest", [("KQK", 19), ("KRK", 31)])
+def test_longest_mates(tablebases, name, longest):
+    data = bytes(tablebases.table(name)._map)
+    assert max(byte for byte in data if byte < LOSS) == longest
+    # the side to move of a lost position is mated one ply later
+    assert max(byte - LOSS for byte in data if LOSS <= byte < INVALID) == (
+        longest + 1
+    )
+
+
+@pytest.mark.parametrize(
+    "epd,probe",
+    [
+        ("k7/8/1K6/8/8/8/7Q/8 w - -", Probe(1, 1)),  # Qh8#
+        ("k6Q/8/1K6/8/8/8/8/8 b - -", Probe(-1, 0)),  # checkmated
+        ("k7/2Q5/1K6/8/8/8/8/8 b - -", Probe(0, 0)),  # stalemate
+        ("8/8/8/4k3/8/8/8/4K3 w - -", Probe(0, 0)),
+    ],
+)
+def test_probe(tablebases, epd, probe):
+    assert tablebases.probe(Chess(epd)) == probe
+
+
+def test_no_probe(tablebases):
+    assert tablebases.probe(Chess()) is None  # too many pieces
+    assert tablebases.probe(Chess("8/8/8/4k3/8/8/8/R3K3 w Q -")) is None
+    assert tablebases.probe(Chess("8/8/8/4k3/8/8/8/1N2K3 w - -")) is None
+
+
+@pytest.mark.parametrize(
+    "epd",
+    [
+        "K7/8/1k6/8/8/8/8/7q w - -",
+        "8/8/8/3rk3/8/8/8/4K3 w - -",
+        "8/8/8/4k3/8/8/8/4K2R b - -",
+        "8/2k5/8/8/3Q4/8/8/6K1 w - -",
+        "8/8/8/4k3/8/8/8/4K3 w - -",
+    ],
+)
+def test_distances_follow_the_moves(tablebases, epd):
+    game = Chess(epd)
+    probe = tablebases.probe(game)
+    replies = []
+    for move in game.get_move_list():
+        game.make_move(*move)
+        replies.append(tablebases.probe(game))
+        game.unmake_move()
+    if probe.wdl > 0:
+        # a quickest mate is one ply shorter
+        wins = [r.distance for r in replies if r.wdl < 0]
+        assert min(wins) == probe.distance - 1
+    elif probe.wdl < 0:
+        # every move loses, the longest defence one ply shorter
+        assert all(r.wdl > 0 for r in replies)
+        assert max(r.distance for r in replies) == probe.distance - 1
+    else:
+        assert all(r.wdl >= 0 for r in replies)
+
+
+@pytest.mark.parametrize(
+    "epd", ["8/8/8/4k3/8/8/8/4K2R w - -", "8/8/8/3k4/8/8/2K5/6q1 b - -"]
+)
+def test_best_moves_mate_in_time(tablebases, epd):
+    game = Chess(epd)
+    probe = tablebases.probe(game)
+    assert probe.wdl == 1
+    for _ in range(probe.distance):
+        move, _ = tablebases.best_move(game)
+        game.make_move(*move)
+    assert game.get_state().checkmate
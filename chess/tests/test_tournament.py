@@ -0,0 +1,106 @@
+"""Self-play tournaments and their adjudication."""
+
+import math
+
+import pytest
+
+from src.chess import EPD, Chess
+from src.epd import EPDString
+from src.search import Limits
+from src.tournament import (
+    Engine,
+    GameResult,
+    adjudicate,
+    elo,
+    elo_error,
+    report,
+    run_games,
+    schedule,
+)
+
+MATE_IN_1 = EPDString("k7/8/1K6/8/8/8/7Q/8 w - -")
+
+
+def engines() -> "tuple[Engine, Engine]":
+    return Engine("a", Limits(None, 2)), Engine("b", Limits(None, 2))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_two_games(workers):
+    played = run_games(engines(), [MATE_IN_1], 2, workers)
+    results = sorted((result for result, _ in played), key=lambda r: r.index)
+    assert [r.white for r in results] == [0, 1]
+    for result in results:
+        assert (result.score, result.reason) == (1.0, "checkmate")
+        assert result.moves == ["Qh8#"]
+    assert [r.first_score for r in results] == [1.0, 0.0]
+    assert results[0].plies == [1, 0] and results[1].plies == [0, 1]
+
+
+def test_ply_limit():
+    (result, game), = run_games(
+        engines(), [EPDString(EPD)], 1, 0, max_plies=4, keep=True
+    )
+    assert (result.score, result.reason) == (0.5, "ply limit")
+    assert len(result.moves) == 4 and result.plies == [2, 2]
+    assert game is not None and game.log == result.moves
+    assert game.players == ["a", "b"]
+
+
+def test_invalid_opening():
+    with pytest.raises(ValueError):
+        list(run_games(engines(), [EPDString("8/8/8 w - -")], 1, 0))
+
+
+@pytest.mark.parametrize(
+    "epd,ended",
+    [
+        ("k6R/8/1K6/8/8/8/8/8 b - -", (1.0, "checkmate")),
+        ("8/8/8/8/8/5k2/6q1/6K1 w - -", (0.0, "checkmate")),
+        ("k7/2Q5/1K6/8/8/8/8/8 b - -", (0.5, "stalemate")),
+        ("4k3/8/8/8/8/8/8/4KB2 w - -", (0.5, "dead position")),
+        ("4k3/8/8/8/8/8/8/R3K3 w - - 100 80", (0.5, "fifty-move rule")),
+        (EPD, None),
+    ],
+)
+def test_adjudicate(epd, ended):
+    assert adjudicate(Chess(epd)) == ended
+
+
+def test_engine_settings():
+    engine = Engine.parse("name=new, depth=3,hash=32,backend=mailbox")
+    assert engine.name == "new" and engine.hash_mb == 32
+    assert engine.backend == "mailbox"
+    assert (engine.limits.time, engine.limits.depth) == (None, 3)
+    assert Engine.parse("").limits.time == 0.1
+    with pytest.raises(ValueError):
+        Engine.parse("speed=3")
+    with pytest.raises(ValueError):
+        Engine.parse("depth=deep")
+
+
+def test_schedule():
+    openings = [EPDString("a"), EPDString("b")]
+    assert schedule(openings, 5) == [
+        (0, "a", 0),
+        (1, "a", 1),
+        (2, "b", 0),
+        (3, "b", 1),
+        (4, "a", 0),
+    ]
+
+
+def test_elo():
+    assert elo(0.5) == 0
+    assert elo(0.75) == pytest.approx(190.85, abs=0.01)
+    assert elo(0) == -math.inf and elo(1) == math.inf
+    assert elo_error([]) == (0.0, math.inf)
+    difference, margin = elo_error([1, 0, 0.5, 0.5])
+    assert difference == 0 and margin > 0
+
+
+def test_report():
+    results = [GameResult(0, EPD, 0, 1.0), GameResult(1, EPD, 1, 0.5)]
+    table = report(engines(), results)
+    assert table.row_count == 2
+    assert [cell for cell in table.columns[4].cells] == ["1.5/2", "0.5/2"]
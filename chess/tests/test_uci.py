@@ -0,0 +1,161 @@
+"""The UCI session, driven one command at a time."""
+
+import io
+import time
+
+import pytest
+
+from src.chess import EPD
+from src.epd import get_EPD
+from src.search import MATE
+from src.uci import UCI, score_info, time_budget
+
+MATE_IN_1 = "k7/8/1K6/8/8/8/7Q/8 w - -"
+
+
+@pytest.fixture
+def session():
+    out = io.StringIO()
+    uci = UCI(io.StringIO(), out)
+    yield uci, out
+    uci.stop()
+
+
+def lines(out: io.StringIO) -> "list[str]":
+    return out.getvalue().splitlines()
+
+
+def finish(uci: UCI):
+    """Wait for the search to end by itself."""
+    if uci._thread is not None:
+        uci._thread.join()
+
+
+def test_handshake(session):
+    uci, out = session
+    assert uci.handle("uci\n")
+    assert uci.handle("isready")
+    assert uci.handle("   ")
+    assert not uci.handle("quit")
+    replies = lines(out)
+    assert replies[0].startswith("id name ")
+    assert replies[1].startswith("id author ")
+    assert "option name Hash type spin default 16 min 1 max 1024" in replies
+    assert replies[-2:] == ["uciok", "readyok"]
+
+
+def test_position(session):
+    uci, out = session
+    uci.handle("position startpos moves e2e4 e7e5 g1f3")
+    assert get_EPD(uci.game) == (
+        "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq -"
+    )
+    uci.handle(f"position fen {MATE_IN_1} 0 1")
+    assert get_EPD(uci.game) == MATE_IN_1
+    assert lines(out) == []
+
+
+def test_illegal_move(session):
+    uci, out = session
+    uci.handle("position startpos moves e2e4 e2e4 d7d5")
+    assert get_EPD(uci.game) == (
+        "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3"
+    )
+    assert len(lines(out)) == 1 and lines(out)[0].startswith("info string")
+
+
+@pytest.mark.parametrize(
+    "command",
+    ["position fen 8/8/8 w - -", "position", "position e2e4"],
+)
+def test_invalid_position(session, command):
+    uci, out = session
+    uci.handle("position startpos moves e2e4")
+    uci.handle(command)
+    assert lines(out)[0].startswith("info string")
+    assert uci.game.player == -1
+
+
+def test_go_depth(session):
+    uci, out = session
+    uci.handle("position startpos")
+    uci.handle("go depth 2")
+    finish(uci)
+    replies = lines(out)
+    assert [r.split()[:3] for r in replies[:-1]] == [
+        ["info", "depth", "1"],
+        ["info", "depth", "2"],
+    ]
+    assert replies[-1].startswith("bestmove ") and len(replies[-1]) == 13
+    assert get_EPD(uci.game) == EPD
+
+
+def test_go_mate(session):
+    uci, out = session
+    uci.handle(f"position fen {MATE_IN_1}")
+    uci.handle("go movetime 1000")
+    finish(uci)
+    assert "score mate 1" in lines(out)[-2]
+    assert lines(out)[-1] == "bestmove h2h8"
+
+
+def test_go_infinite_waits_for_stop(session):
+    uci, out = session
+    uci.handle(f"position fen {MATE_IN_1}")
+    uci.handle("go infinite")
+    # the mate ends the search at once, but its move has to be held back
+    for _ in range(100):
+        if lines(out):
+            break
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert lines(out) and not any(
+        line.startswith("bestmove") for line in lines(out)
+    )
+    assert uci.handle("isready")
+    assert lines(out)[-1] == "readyok"
+    uci.handle("stop")
+    assert lines(out)[-1] == "bestmove h2h8"
+
+
+def test_no_legal_move(session):
+    uci, out = session
+    uci.handle("position fen k7/2Q5/1K6/8/8/8/8/8 b - -")
+    uci.handle("go depth 3")
+    finish(uci)
+    assert lines(out) == ["bestmove 0000"]
+
+
+def test_invalid_hash(session):
+    uci, out = session
+    uci.handle("setoption name Hash value lots")
+    assert lines(out)[0].startswith("info string invalid Hash")
+    uci.handle("setoption name Hash value 1")
+    assert uci.hash_mb == 1
+
+
+def test_run():
+    out = io.StringIO()
+    UCI(io.StringIO("isready\nquit\nisready\n"), out).run()
+    assert out.getvalue() == "readyok\n"
+
+
+def test_time_budget():
+    assert time_budget(None) is None
+    assert time_budget(60000) == pytest.approx(60 / 30 - 0.05)
+    assert time_budget(60000, 1000, 10) == pytest.approx(6 + 0.8 - 0.05)
+    assert time_budget(10) == 0.01
+
+
+@pytest.mark.parametrize(
+    "score,text",
+    [
+        (35, "cp 35"),
+        (-120, "cp -120"),
+        (MATE - 1, "mate 1"),
+        (MATE - 3, "mate 2"),
+        (-MATE + 2, "mate -1"),
+    ],
+)
+def test_score_info(score, text):
+    assert score_info(score) == text
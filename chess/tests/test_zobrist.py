@@ -0,0 +1,53 @@
+"""Incremental zobrist keys, checked against keys computed from scratch."""
+
+import random
+
+from src import zobrist
+from src.chess import Chess
+from src.epd import EPDString, get_FEN, load_EPD, set_piece
+
+
+def full_key(game: Chess) -> int:
+    """Compute the key of a game's position from scratch."""
+    fresh = Chess()
+    load_EPD(fresh, EPDString(get_FEN(game)))
+    return fresh.zobrist_key
+
+
+def test_incremental_keys_match_full_keys():
+    rng = random.Random(4)
+    game = Chess(
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -"
+    )
+    for _ in range(200):
+        moves = game.get_move_list()
+        if not moves:
+            break
+        game.make_move(*rng.choice(moves))
+        assert game.board_key == zobrist.board_key(game.board)
+        assert game.zobrist_key == full_key(game)
+        assert game.key_stack[-1] == game.zobrist_key
+
+
+def test_key_depends_on_the_state():
+    game = Chess()
+    key = game.zobrist_key
+    game.castling[0] = 0
+    assert game.zobrist_key != key
+    game.castling[0] = 1
+    game.switch_player()
+    assert game.zobrist_key == key ^ zobrist.SIDE
+    game.switch_player()
+    set_piece(game, (4, 4), 1)
+    assert game.board_key == zobrist.board_key(game.board)
+    set_piece(game, (4, 4), 0)
+    assert game.zobrist_key == key
+
+
+def test_transpositions_share_a_key():
+    first, second = Chess(), Chess()
+    for move in (((6, 7), (5, 5)), ((6, 0), (5, 2)), ((1, 7), (2, 5))):
+        first.make_move(*move, 0)
+    for move in (((1, 7), (2, 5)), ((6, 0), (5, 2)), ((6, 7), (5, 5))):
+        second.make_move(*move, 0)
+    assert first.zobrist_key == second.zobrist_key